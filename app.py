@@ -1,19 +1,30 @@
+import io
+import json
+import math
 import os
 import sys
+import tempfile
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, session, stream_with_context
 from modules.analytics import Analytics
 from modules.auth import Auth
 from modules.config import Config
 from modules.customers import Customers
 from modules.database import Database
+from modules.dedup import CustomerDedup
 from modules.departments import Departments
 from modules.employee import Employee
+from modules.importer import Importer
+from modules.occupancy import Occupancy
 from modules.orders import Orders
 from modules.rooms import Rooms
 from modules.security import Security
+from modules.stats import StatsEngine
+from modules.stream import DashboardStream
+from modules.suggest import Suggest
+from modules.throttle import LoginThrottle
 from modules.weather import Weather
 
 app = Flask(__name__)
@@ -23,18 +34,26 @@ config_manager = Config()
 db = Database()
 security_manager = Security()
 
-analytics_manager = Analytics(db)
-auth_manager = Auth()
+stats_engine = StatsEngine(db)
+analytics_manager = Analytics(db, stats=stats_engine)
+auth_manager = Auth(config=config_manager)
+login_throttle = LoginThrottle()
 customer_manager = Customers(db)
+customer_dedup = CustomerDedup(db)
 department_manager = Departments(db)
-employee_manager = Employee(db)
-orders_manager = Orders(db)
+employee_manager = Employee(db, stats=stats_engine)
+importer = Importer(db)
+occupancy_manager = Occupancy(db)
 room_manager = Rooms(db)
-weather_service = Weather()
+orders_manager = Orders(db, rooms=room_manager, stats=stats_engine)
+dashboard_stream = DashboardStream(db, stats=stats_engine)
+suggest_manager = Suggest(db)
+weather_service = Weather(config=config_manager)
 
 @app.route('/')
 def login():
-    is_valid, corrupted_files = security_manager.verify_integrity()
+    # 读取后台校验的最近结论，请求中不计算文件摘要
+    is_valid, corrupted_files = security_manager.cached_verdict()
     if not is_valid:
         return render_template('security.html', corrupted_files=corrupted_files)
     if session.get('logged_in'):
@@ -46,8 +65,17 @@ def login_post():
     username = request.form.get('username')
     password = request.form.get('password')
 
+    # 限流：超出用户名或 IP 的尝试频率时直接拒绝，不再读取配置或查询数据库
+    retry_after = login_throttle.check(username, request.remote_addr)
+    if retry_after:
+        seconds = math.ceil(retry_after)
+        response = jsonify({'success': False, 'message': f'登录尝试过于频繁，请{seconds}秒后再试'})
+        response.headers['Retry-After'] = str(seconds)
+        return response, 429
+
     # 管理员
     if auth_manager.verify_admin(username, password):
+        login_throttle.record_success(username, request.remote_addr)
         session['logged_in'] = True
         session['username'] = username
         session['role'] = 'admin'
@@ -64,8 +92,10 @@ def login_post():
         session['department'] = employee['department']
         session['role'] = 'employee'
         session['allowed_pages'] = result['allowed_pages']
+        login_throttle.record_success(username, request.remote_addr)
         return jsonify({'success': True, 'message': '登录成功'})
 
+    login_throttle.record_failure(username, request.remote_addr)
     return jsonify({'success': False, 'message': '用户名或密码错误'})
 
 @app.route('/change-password', methods=['POST'])
@@ -166,8 +196,8 @@ def api_get_employees():
     if not session.get('logged_in'):
         return jsonify({'success': False, 'message': '请先登录'}), 401
 
-    # 这里可以添加过滤参数，目前先返回所有员工
-    result = employee_manager.get_all_employees()
+    # 筛选、排序和键集分页参数见 Employee.get_employees_page
+    result = employee_manager.get_employees_page(request.args.to_dict())
     return jsonify(result)
 
 @app.route('/api/employee/<employee_id>', methods=['GET'])
@@ -210,14 +240,7 @@ def api_get_employee_statistics():
         return jsonify({'success': False, 'message': '请先登录'}), 401
 
     try:
-        # 打印调用前的提示
-        print("开始获取员工统计数据...")
-
         statistics = employee_manager.get_employee_statistics()
-
-        # 打印函数返回的完整数据
-        print("获取到的统计数据:", statistics)
-
         return jsonify({
             'success': True,
             'data': statistics,
@@ -236,10 +259,39 @@ def api_get_customers():
     if not session.get('logged_in'):
         return jsonify({'success': False, 'message': '请先登录'}), 401
 
-    # 调用 Customers 类的 get_all_customers 方法
-    result = customer_manager.get_all_customers()
+    # 键集分页：after_id 为上一页最后一位客户的 ID
+    result = customer_manager.get_customers_page(
+        after_id=request.args.get('after_id'),
+        limit=request.args.get('limit', type=int),
+        sort=request.args.get('sort', 'id'),
+        order=request.args.get('order', 'asc'),
+        with_total=request.args.get('total') == '1'
+    )
+    return jsonify(result)
+
+@app.route('/api/customer/top', methods=['GET'])
+def api_top_customers():
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+
+    result = customer_manager.get_top_customers(request.args.get('by', 'spent'), request.args.get('limit', type=int))
+    return jsonify(result)
+
+@app.route('/api/customer/<customer_id>/summary', methods=['GET'])
+def api_customer_summary(customer_id):
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+
+    result = customer_manager.get_customer_summary(customer_id, request.args.get('recent', type=int))
     return jsonify(result)
 
+@app.route('/api/customer/<customer_id>/orders', methods=['GET'])
+def api_customer_orders(customer_id):
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+
+    return jsonify(orders_manager.get_orders_by_customer(customer_id))
+
 @app.route('/api/customer/<customer_id>', methods=['GET'])
 def api_get_customer(customer_id):
     if not session.get('logged_in'):
@@ -275,15 +327,74 @@ def api_delete_customer(customer_id):
     result = customer_manager.delete_customer(customer_id)
     return jsonify(result)
 
+@app.route('/api/customer/duplicates', methods=['GET'])
+def api_customer_duplicates():
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+
+    return jsonify(customer_dedup.find_duplicates(request.args.get('limit', type=int)))
+
+@app.route('/api/customer/merge', methods=['POST'])
+def api_customer_merge():
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+    if session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': '只有管理员可以合并客户'}), 403
+
+    # 所选客户须属于同一组疑似重复客户；订单改挂与删除重复客户在同一事务内完成
+    data = request.json or {}
+    return jsonify(customer_dedup.merge(data.get('keep_id'), data.get('merge_ids') or []))
+
 @app.route('/api/customer/search', methods=['GET'])
 def api_search_customers():
     if not session.get('logged_in'):
         return jsonify({'success': False, 'message': '请先登录'}), 401
 
     keyword = request.args.get('keyword', '')
-    result = customer_manager.search_customers(keyword)
+    limit = request.args.get('limit', type=int)
+    result = customer_manager.search_customers(keyword, limit)
     return jsonify(result)
 
+@app.route('/api/suggest/<kind>', methods=['GET'])
+def api_suggest(kind):
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', type=int)
+    return jsonify(suggest_manager.suggest(kind, query, limit))
+
+@app.route('/api/import/<entity>', methods=['POST'])
+def api_import(entity):
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+    if session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': '只有管理员可以批量导入'}), 403
+    if entity not in Importer.LOADERS:
+        return jsonify({'success': False, 'message': f'不支持的导入类型: {entity}'}), 400
+
+    # 支持表单上传（file 字段）或直接以请求体发送文件内容（需指定 format）
+    upload = request.files.get('file')
+    fmt = Importer.detect_format(upload.filename if upload else '', request.args.get('format'))
+    if fmt is None:
+        return jsonify({'success': False, 'message': '无法判断文件格式，请指定 format=csv 或 ndjson'}), 400
+    if upload:
+        # 请求结束时 Flask 会关闭上传文件，而导入在响应流中进行，先转存到自己持有的临时文件
+        source = tempfile.TemporaryFile()
+        upload.save(source)
+        source.seek(0)
+    else:
+        source = request.stream
+    stream = io.TextIOWrapper(source, encoding=request.args.get('encoding', 'utf-8-sig'), newline='')
+
+    # 逐块导入，每个事件一行 JSON（NDJSON），前端可边读边显示进度
+    events = importer.run(entity, stream, fmt,
+                          chunk_size=request.args.get('chunk_size', type=int),
+                          update_existing=request.args.get('skip_existing') != '1')
+    lines = (json.dumps(event, ensure_ascii=False) + '\n' for event in events)
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/rooms')
 def rooms():
     if not session.get('logged_in'):
@@ -305,6 +416,12 @@ def api_get_rooms():
     if not session.get('logged_in'): return jsonify({'success': False}), 401
     return jsonify(room_manager.get_all_rooms())
 
+@app.route('/api/rooms/search', methods=['GET'])
+def api_search_rooms():
+    if not session.get('logged_in'): return jsonify({'success': False}), 401
+    # 参数见 Rooms.search_rooms，如 ?room_type=双人房&floor=3&has_window=1&check_in=2025-01-01&check_out=2025-01-03
+    return jsonify(room_manager.search_rooms(request.args.to_dict()))
+
 @app.route('/api/rooms/add', methods=['POST'])
 def api_add_room():
     if not session.get('logged_in'): return jsonify({'success': False}), 401
@@ -326,6 +443,12 @@ def api_room_status():
     # data: { room_number: "101", action: "checkin" }
     return jsonify(room_manager.update_status(request.json.get('room_number'), request.json.get('action')))
 
+@app.route('/api/rooms/status/batch', methods=['POST'])
+def api_room_status_batch():
+    if not session.get('logged_in'): return jsonify({'success': False}), 401
+    # data: { transitions: [{ room_number: "101", action: "checkout" }, ...] }
+    return jsonify(room_manager.update_status_batch((request.json or {}).get('transitions')))
+
 @app.route('/customers')
 def customers():
     if not session.get('logged_in'):
@@ -647,8 +770,6 @@ def api_get_dashboard():
         return jsonify({'success': False, 'message': '请先登录'}), 401
     stat_date = request.args.get('stat_date')
 
-    print('dashboard stat_date =', stat_date)  # 调试用
-
     result = analytics_manager.get_dashboard_summary(stat_date)
     return jsonify(result)
 
@@ -681,7 +802,22 @@ def api_get_room_stats():
     if not session.get('logged_in'):
         return jsonify({'success': False, 'message': '请先登录'}), 401
 
-    result = analytics_manager.get_room_statistics()
+    stat_date = request.args.get('stat_date')
+    # 诊断明细只对管理员开放
+    diagnostics = request.args.get('diagnostics') == '1' and session.get('role') == 'admin'
+
+    result = analytics_manager.get_room_statistics(stat_date, diagnostics)
+    return jsonify(result)
+
+@app.route('/api/analytics/occupancy', methods=['GET'])
+def api_get_occupancy():
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+
+    result = occupancy_manager.get_occupancy(start_date, end_date)
     return jsonify(result)
 
 @app.route('/api/analytics/revenue', methods=['GET'])
@@ -714,7 +850,13 @@ def api_generate_chart():
     if end_date:
         params['end_date'] = end_date
 
-    result = analytics_manager.generate_chart_data(chart_type, params)
+    # 支持 type=a,b,c 一次获取多个图表，底层统计只计算一次
+    chart_types = [t.strip() for t in chart_type.split(',') if t.strip()]
+    if len(chart_types) > 1:
+        charts = analytics_manager.generate_charts(chart_types, params)
+        return jsonify({'success': True, 'charts': charts})
+
+    result = analytics_manager.generate_chart_data(chart_types[0] if chart_types else chart_type, params)
     return jsonify(result)
 
 @app.route('/api/analytics/export', methods=['GET'])
@@ -732,27 +874,34 @@ def api_get_full_report():
     if not session.get('logged_in'):
         return jsonify({'success': False, 'message': '请先登录'}), 401
 
-    # 获取所有统计数据
-    dashboard_result = analytics_manager.get_dashboard_summary()
+    # 仪表板与图表共用同一请求作用域内的统计结果
+    with analytics_manager.request_cache():
+        dashboard_result = analytics_manager.get_dashboard_summary()
 
-    if not dashboard_result['success']:
-        return jsonify(dashboard_result)
+        if not dashboard_result['success']:
+            return jsonify(dashboard_result)
 
-    # 生成报告
-    report = {
-        'success': True,
-        'data': dashboard_result['data'],
-        'charts': {
-            'employee_dept': analytics_manager.generate_chart_data('employee_dept'),
-            'order_status': analytics_manager.generate_chart_data('order_status'),
-            'room_type': analytics_manager.generate_chart_data('room_type'),
-            'revenue_trend': analytics_manager.generate_chart_data('revenue_trend')
-        },
-        'message': '综合报告生成完成'
-    }
+        # 生成报告
+        report = {
+            'success': True,
+            'data': dashboard_result['data'],
+            'charts': analytics_manager.generate_charts(
+                ['employee_dept', 'order_status', 'room_type', 'revenue_trend']
+            ),
+            'message': '综合报告生成完成'
+        }
 
     return jsonify(report)
 
+@app.route('/api/stream/dashboard', methods=['GET'])
+def api_stream_dashboard():
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'message': '请先登录'}), 401
+
+    # 所有订阅者共享同一个生产者，写入后只推送变化的指标
+    return Response(dashboard_stream.events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/weather')
 def weather():
     if not session.get('logged_in'):
@@ -1,9 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+import functools
+import json
+import sqlite3
+import threading
 from typing import Dict, List, Any
 
+from modules.stats import StatsEngine
+
+
+def request_memoized(method):
+    """在请求作用域内按参数记忆化 Analytics 方法的返回值"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return self._memo(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
 class Analytics:
-    def __init__(self, db):
+    # 并行计算统计块的线程数上限，设为 1 时按顺序计算
+    MAX_WORKERS = 4
+
+    def __init__(self, db, max_workers: int = None, stats: StatsEngine = None):
         self.db = db
+        self.stats = stats or StatsEngine(db)
+        self._local = threading.local()
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @contextmanager
+    def request_cache(self):
+        """
+        请求作用域的记忆化缓存
+        作用域内相同参数的统计只计算一次，嵌套使用时沿用外层缓存
+        """
+        if getattr(self._local, 'cache', None) is not None:
+            yield
+            return
+
+        self._local.cache = {}
+        try:
+            yield
+        finally:
+            self._local.cache = None
+
+    def _memo(self, key: tuple, compute):
+        cache = getattr(self._local, 'cache', None)
+        if cache is None:
+            return compute()
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    def _stats_block(self, conn, block, *args):
+        """
+        计算一个统计块，请求作用域内相同参数的块只计算一次
+        未传入连接时为该块单独开启读事务
+        """
+        def compute():
+            if conn is not None:
+                return block(conn, *args)
+            with self.db.read_transaction() as own_conn:
+                return block(own_conn, *args)
+
+        return self._memo((block.__name__,) + args, compute)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='analytics')
+        return self._executor
+
+    def _parallel_blocks(self, tasks: List[tuple]) -> List[Any]:
+        """
+        并行计算多个互不依赖的统计块，返回结果与 tasks 顺序一致
+        每个块在工作线程中使用自己的读连接；请求缓存只在调用线程中，
+        因此先在调用线程查缓存，再把算好的结果写回
+        """
+        if self.max_workers <= 1:
+            with self.db.read_transaction() as conn:
+                return [self._stats_block(conn, block, *args) for block, *args in tasks]
+
+        cache = getattr(self._local, 'cache', None)
+        results = [None] * len(tasks)
+        pending = []
+        for i, (block, *args) in enumerate(tasks):
+            key = (block.__name__,) + tuple(args)
+            if cache is not None and key in cache:
+                results[i] = cache[key]
+            else:
+                pending.append((i, key, self._get_executor().submit(self._run_block, block, *args)))
+
+        for i, key, future in pending:
+            results[i] = future.result()
+            if cache is not None:
+                cache[key] = results[i]
+        return results
+
+    def _run_block(self, block, *args):
+        with self.db.read_transaction() as conn:
+            return block(conn, *args)
+
+    def _utc_day(self, offset: int = 0) -> int:
+        """UTC 当天（与 SQLite 的 DATE('now') 一致）加偏移天数后的日序号"""
+        return self.stats.utc_day(offset)
+
+    @staticmethod
+    def _normalize_date(stat_date: str = None) -> str:
+        if not stat_date:
+            return datetime.now().strftime('%Y-%m-%d')
+        return stat_date.replace('/', '-')
 
     def get_employee_statistics(self) -> Dict[str, Any]:
         """
@@ -11,44 +122,11 @@ class Analytics:
         迁移自 employee.py 的 get_employee_statistics 方法
         """
         try:
-            total = 0
-            active = 0
-            terminated = 0
-
-            total_res = self.db.execute_query("SELECT COUNT(*) as total FROM employees")
-            if total_res:
-                total = total_res[0]['total']
-
-            active_res = self.db.execute_query("SELECT COUNT(*) as active FROM employees WHERE status = '在职'")
-            if active_res:
-                active = active_res[0]['active']
-
-            term_res = self.db.execute_query("SELECT COUNT(*) as terminated FROM employees WHERE status = '离职'")
-            if term_res:
-                terminated = term_res[0]['terminated']
-
-            active_rate = (active / total * 100) if total > 0 else 0
-
-            dept_sql = '''
-                       SELECT d.department_name, COUNT(e.employee_id) as count
-                       FROM departments d
-                           LEFT JOIN employees e
-                       ON d.department_id = e.department_id AND e.status = '在职'
-                       GROUP BY d.department_id
-                       ORDER BY count DESC
-                       '''
-            by_dept = self.db.execute_query(dept_sql)
-
+            data = self._stats_block(None, self.stats.employees)
             return {
                 'success': True,
-                'data': {
-                    'total': total,
-                    'active': active,
-                    'terminated': terminated,
-                    'active_rate': round(active_rate, 2),
-                    'by_department': by_dept or []
-                },
-                'message': f'员工统计完成，共{total}名员工'
+                'data': data,
+                'message': f"员工统计完成，共{data['total']}名员工"
             }
         except Exception as e:
             return {
@@ -63,72 +141,11 @@ class Analytics:
         迁移自 orders.py 的 get_order_statistics 方法
         """
         try:
-            total_res = self.db.execute_query("SELECT COUNT(*) as total FROM orders")
-            total = total_res[0]['total'] if total_res else 0
-
-            status_sql = '''
-                         SELECT order_status, COUNT(*) as count
-                         FROM orders
-                         GROUP BY order_status
-                         '''
-            by_status = self.db.execute_query(status_sql) or []
-
-            payment_sql = '''
-                          SELECT payment_status, COUNT(*) as count
-                          FROM orders
-                          GROUP BY payment_status
-                          '''
-            by_payment = self.db.execute_query(payment_sql) or []
-            print("订单状态统计 by_status:", by_status)
-
-            today = datetime.now().strftime('%Y-%m-%d')
-            today_sql = '''
-                        SELECT COUNT(*)                                                 as today_total, \
-                               SUM(CASE WHEN order_status = '预定中' THEN 1 ELSE 0 END) as today_reserved, \
-                               SUM(CASE WHEN order_status = '已入住' THEN 1 ELSE 0 END) as today_checked_in, \
-                               SUM(CASE WHEN order_status = '已完成' THEN 1 ELSE 0 END) as today_completed, \
-                               SUM(total_amount)                                        as today_total_amount, \
-                               SUM(paid_amount)                                         as today_paid_amount
-                        FROM orders
-                        WHERE DATE (created_at) = DATE (?)
-                        '''
-            today_stats_result = self.db.execute_query(today_sql, (today,))
-            today_stats = today_stats_result[0] if today_stats_result else {
-                'today_total': 0,
-                'today_reserved': 0,
-                'today_checked_in': 0,
-                'today_completed': 0,
-                'today_total_amount': 0,
-                'today_paid_amount': 0
-            }
-
-            trend_sql = '''
-                        SELECT
-                            DATE (created_at) as date, COUNT (*) as count, SUM (total_amount) as total_amount
-                        FROM orders
-                        WHERE created_at >= DATE ('now', '-7 days')
-                        GROUP BY DATE (created_at)
-                        ORDER BY date
-                        '''
-            trend_data = self.db.execute_query(trend_sql) or []
-
-            # 计算支付率
-            payment_rate = 0
-            if today_stats.get('today_total_amount', 0) > 0:
-                payment_rate = (today_stats.get('today_paid_amount', 0) /
-                                today_stats.get('today_total_amount', 0) * 100)
-
+            data = self._stats_block(None, self.stats.orders, self._normalize_date())['order_stats']
             return {
                 'success': True,
-                'data': {
-                    'total': total,
-                    'by_status': by_status,
-                    'by_payment': by_payment,
-                    'today_stats': today_stats,
-                    'trend_data': trend_data,
-                    'payment_rate': round(payment_rate, 2)
-                },
-                'message': f'订单统计完成，共{total}个订单'
+                'data': data,
+                'message': f"订单统计完成，共{data['total']}个订单"
             }
         except Exception as e:
             return {
@@ -142,54 +159,11 @@ class Analytics:
         获取客户统计信息
         """
         try:
-            # 客户总数
-            total_res = self.db.execute_query("SELECT COUNT(*) as total FROM customers")
-            total = total_res[0]['total'] if total_res else 0
-
-            # 今日新增客户
-            today = datetime.now().strftime('%Y-%m-%d')
-            today_sql = """
-                        SELECT COUNT(*) as today_new
-                        FROM customers
-                        WHERE DATE (created_at) = DATE (?) \
-                        """
-            today_result = self.db.execute_query(today_sql, (today,))
-            today_new = today_result[0]['today_new'] if today_result else 0
-
-            # 近7天新增客户趋势
-            trend_sql = """
-                        SELECT
-                            DATE (created_at) as date, COUNT (*) as count
-                        FROM customers
-                        WHERE created_at >= DATE ('now', '-7 days')
-                        GROUP BY DATE (created_at)
-                        ORDER BY date
-                        """
-            trend_data = self.db.execute_query(trend_sql) or []
-
-            # 客户订单统计
-            order_sql = """
-                        SELECT c.id, \
-                               c.name, \
-                               COUNT(o.order_id)   as order_count, \
-                               SUM(o.total_amount) as total_spent
-                        FROM customers c
-                                 LEFT JOIN orders o ON c.id = o.customer_id
-                        GROUP BY c.id
-                        HAVING order_count > 0
-                        ORDER BY total_spent DESC LIMIT 10
-                        """
-            top_customers = self.db.execute_query(order_sql) or []
-
+            data = self._stats_block(None, self.stats.customers)
             return {
                 'success': True,
-                'data': {
-                    'total': total,
-                    'today_new': today_new,
-                    'trend_data': trend_data,
-                    'top_customers': top_customers
-                },
-                'message': f'客户统计完成，共{total}名客户'
+                'data': data,
+                'message': f"客户统计完成，共{data['total']}名客户"
             }
         except Exception as e:
             return {
@@ -198,220 +172,108 @@ class Analytics:
                 'data': {}
             }
 
-    def get_room_statistics(self, stat_date: str = None):
+    def get_room_statistics(self, stat_date: str = None, diagnostics: bool = False):
         """
         获取房间统计信息
-        """
-        print("stat_date =", stat_date)
 
-        if not stat_date:
-            stat_date = datetime.now().strftime('%Y-%m-%d')
-        
+        Args:
+            stat_date: 统计日期 (YYYY-MM-DD 或 YYYY/MM/DD)，默认今天
+            diagnostics: 是否附带入住判断的诊断明细（仅供管理员排查使用）
+        """
         # 统一日期格式为 YYYY-MM-DD
-        stat_date_clean = stat_date.replace('/', '-')
-        
+        stat_date_clean = self._normalize_date(stat_date)
+
         try:
-            # 房间总数及各状态统计
-            status_sql = """
-                        SELECT status, \
-                                COUNT(*) as count,
-                            ROUND(AVG(price), 2) as avg_price
-                        FROM rooms
-                        GROUP BY status \
-                        """
-            status_stats = self.db.execute_query(status_sql) or []
-
-            # 房型统计
-            type_sql = """
-                    SELECT room_type, \
-                            COUNT(*) as count,
-                        ROUND(AVG(price), 2) as avg_price,
-                        ROUND(AVG(area), 2) as avg_area
-                    FROM rooms
-                    GROUP BY room_type
-                    ORDER BY count DESC \
-                    """
-            type_stats = self.db.execute_query(type_sql) or []
-
-            # 价格区间统计
-            price_sql = """
-                        SELECT CASE \
-                                WHEN price < 200 THEN '经济型 (<200)' \
-                                WHEN price BETWEEN 200 AND 400 THEN '舒适型 (200-400)' \
-                                WHEN price > 400 THEN '豪华型 (>400)' \
-                                END as price_range, \
-                            COUNT(*) as count
-                        FROM rooms
-                        GROUP BY price_range
-                        ORDER BY price_range \
-                        """
-            price_stats = self.db.execute_query(price_sql) or []
-
-            # 房间总数
-            total_res = self.db.execute_query("SELECT COUNT(*) as total FROM rooms")
-            total = total_res[0]['total'] if total_res else 0
-
-            # 查看所有当前有效的订单
-            debug_sql = """
-                    SELECT 
-                        order_id,
-                        room_number,
-                        check_in_date,
-                        check_out_date,
-                        order_status,
-                        DATE(check_in_date) as check_in_date_parsed,
-                        DATE(check_out_date) as check_out_date_parsed
-                    FROM orders
-                    WHERE order_status IN ('预定中', '已入住')
-                    """
-            debug_result = self.db.execute_query(debug_sql) or []
-            print("=== 调试信息 - 当前有效订单 ===")
-            print(f"找到 {len(debug_result)} 个有效订单")
-            for order in debug_result:
-                print(f"订单 {order['order_id']}: 房间 {order['room_number']}, "
-                    f"入住 {order['check_in_date']} -> 退房 {order['check_out_date']}, "
-                    f"状态: {order['order_status']}")
-                print(f"  解析后入住: {order.get('check_in_date_parsed')}, "
-                    f"解析后退房: {order.get('check_out_date_parsed')}")
-            print("=== 调试信息结束 ===\n")
-
-            #测试统计日期的解析
-            test_date_sql = """
-                        SELECT DATE(?) as test_date_parsed,
-                                DATE('now') as current_date
-                        """
-            test_date_res = self.db.execute_query(test_date_sql, (stat_date_clean,))
-            print(f"测试日期解析: 输入={stat_date_clean}, 解析结果={test_date_res}")
-
-            #详细的入住率查询（带更多信息）
-            detailed_occupied_sql = """
-                                SELECT 
-                                    o.order_id,
-                                    o.room_number,
-                                    o.check_in_date,
-                                    o.check_out_date,
-                                    o.order_status,
-                                    DATE(o.check_in_date) as ci_parsed,
-                                    DATE(o.check_out_date) as co_parsed,
-                                    DATE(?) as stat_date_parsed,
-                                    CASE 
-                                        WHEN DATE(?) >= DATE(o.check_in_date) 
-                                            AND DATE(?) < DATE(o.check_out_date)
-                                        THEN 1 
-                                        ELSE 0 
-                                    END as is_occupied
-                                FROM orders o
-                                WHERE o.order_status IN ('预定中', '已入住')
-                                ORDER BY o.order_id
-                                """
-            detailed_res = self.db.execute_query(
-                detailed_occupied_sql,
-                (stat_date_clean, stat_date_clean, stat_date_clean)
-            )
-            
-            print(f"\n=== 详细的入住判断 ===")
-            print(f"统计日期: {stat_date_clean}")
-            if detailed_res:
-                for row in detailed_res:
-                    print(f"订单 {row['order_id']}: 房间 {row['room_number']}")
-                    print(f"  原始: 入住 {row['check_in_date']} -> 退房 {row['check_out_date']}")
-                    print(f"  解析: 入住 {row['ci_parsed']} -> 退房 {row['co_parsed']}")
-                    print(f"  统计日期解析: {row['stat_date_parsed']}")
-                    print(f"  是否入住: {row['is_occupied']}")
-                    
-                    # 额外的日期比较逻辑
-                    try:
-                        # 尝试手动比较
-                        check_in = str(row['check_in_date'])
-                        check_out = str(row['check_out_date'])
-                        stat_date_str = stat_date_clean
-                        
-                        print(f"  手动比较: {stat_date_str} >= {check_in} and < {check_out}")
-                        print(f"  比较结果: {'是' if stat_date_str >= check_in and stat_date_str < check_out else '否'}")
-                    except Exception as e:
-                        print(f"  手动比较错误: {e}")
-                    print()
-            
-            #计算入住率
-            occupied_sql = """
-                        SELECT COUNT(DISTINCT room_number) as occupied_count
-                        FROM orders
-                        WHERE order_status IN ('预定中', '已入住')
-                        AND DATE(?) >= DATE(check_in_date)
-                        AND DATE(?) < DATE(check_out_date)
-                        """
-            
-            occupied_res = self.db.execute_query(
-                occupied_sql,
-                (stat_date_clean, stat_date_clean)
-            )
-            
-            print(f"\n=== 入住率计算结果 ===")
-            print(f"查询结果: {occupied_res}")
-            
-            occupied = occupied_res[0]['occupied_count'] if occupied_res else 0
-            occupancy_rate = (occupied / total * 100) if total > 0 else 0
-            
-            print(f"入住房间数: {occupied}, 总房间数: {total}, 入住率: {occupancy_rate}%")
-            
-            # 尝试其他查询方法
-            if occupied == 0:
-                print("\n=== 尝试其他查询方法 ===")
-                
-                # 方法A：使用字符串比较
-                alt_sql_a = """
-                        SELECT COUNT(DISTINCT room_number) as occupied_count
-                        FROM orders
-                        WHERE order_status IN ('预定中', '已入住')
-                        AND ? >= check_in_date
-                        AND ? < check_out_date
-                        """
-                alt_res_a = self.db.execute_query(alt_sql_a, (stat_date_clean, stat_date_clean))
-                print(f"方法A（字符串比较）结果: {alt_res_a}")
-                
-                # 方法B：只检查 check_in_date 等于统计日期的情况
-                alt_sql_b = """
-                        SELECT COUNT(DISTINCT room_number) as occupied_count
-                        FROM orders
-                        WHERE order_status IN ('预定中', '已入住')
-                        AND DATE(check_in_date) = DATE(?)
-                        """
-                alt_res_b = self.db.execute_query(alt_sql_b, (stat_date_clean,))
-                print(f"方法B（入住日期等于统计日期）结果: {alt_res_b}")
-                
-                # 方法C：查看今天的所有订单
-                today_sql = """
-                        SELECT room_number, check_in_date, check_out_date, order_status
-                        FROM orders
-                        WHERE DATE(check_in_date) <= DATE('now')
-                        AND DATE(check_out_date) >= DATE('now')
-                        AND order_status IN ('预定中', '已入住')
-                        """
-                today_res = self.db.execute_query(today_sql)
-                print(f"今天（当前日期）的有效订单: {today_res}")
+            if diagnostics:
+                with self.db.read_transaction() as conn:
+                    room_stats = dict(self._stats_block(conn, self.stats.rooms, stat_date_clean))
+                    room_stats['diagnostics'] = self._room_diagnostics(conn, stat_date_clean, room_stats['occupied'])
+            else:
+                room_stats = self._stats_block(None, self.stats.rooms, stat_date_clean)
 
             return {
                 'success': True,
-                'data': {
-                    'total': total,
-                    'occupied': occupied,
-                    'occupancy_rate': round(occupancy_rate, 2),
-                    'status_stats': status_stats,
-                    'type_stats': type_stats,
-                    'price_stats': price_stats
-                },
-                'message': f'房间统计完成，共{total}间房间，入住率{round(occupancy_rate, 2)}%'
+                'data': room_stats,
+                'message': f"房间统计完成，共{room_stats['total']}间房间，入住率{room_stats['occupancy_rate']}%"
             }
         except Exception as e:
             print(f"房间统计异常: {str(e)}")
-            import traceback
-            traceback.print_exc()
             return {
                 'success': False,
                 'message': f'房间统计失败: {str(e)}',
                 'data': {}
             }
-        
+
+    def _room_diagnostics(self, conn, stat_date: str, occupied: int) -> Dict[str, Any]:
+        """收集入住率计算的诊断明细：有效订单的日期解析与逐单入住判断，入住数为 0 时附加备选查询结果"""
+        detailed_sql = """
+            SELECT o.order_id,
+                   o.room_number,
+                   o.check_in_date,
+                   o.check_out_date,
+                   o.order_status,
+                   DATE(o.check_in_date) as ci_parsed,
+                   DATE(o.check_out_date) as co_parsed,
+                   o.check_in_day,
+                   o.check_out_day,
+                   CASE
+                       WHEN ? >= o.check_in_day
+                           AND ? < o.check_out_day
+                       THEN 1
+                       ELSE 0
+                   END as is_occupied
+            FROM orders o
+            WHERE o.order_status IN ('预定中', '已入住')
+            ORDER BY o.order_id
+        """
+        stat_day = self.db.day_number(stat_date)
+        active_orders = self.db.fetch_all(conn, detailed_sql, (stat_day, stat_day))
+        for row in active_orders:
+            check_in = str(row['check_in_date'])
+            check_out = str(row['check_out_date'])
+            row['string_compare'] = 1 if check_in <= stat_date < check_out else 0
+
+        date_sql = "SELECT DATE(?) as stat_date_parsed, DATE('now') as current_date"
+        result = {
+            'stat_date': stat_date,
+            'stat_day': stat_day,
+            'date_parse': self.db.fetch_all(conn, date_sql, (stat_date,))[0],
+            'active_orders': active_orders
+        }
+
+        if occupied == 0:
+            # 方法A：使用字符串比较
+            string_sql = """
+                SELECT COUNT(DISTINCT room_number) as occupied_count
+                FROM orders
+                WHERE order_status IN ('预定中', '已入住')
+                AND ? >= check_in_date
+                AND ? < check_out_date
+            """
+            # 方法B：只检查 check_in_date 等于统计日期的情况
+            check_in_sql = """
+                SELECT COUNT(DISTINCT room_number) as occupied_count
+                FROM orders
+                WHERE order_status IN ('预定中', '已入住')
+                AND check_in_day = ?
+            """
+            # 方法C：查看今天的所有订单
+            today_sql = """
+                SELECT room_number, check_in_date, check_out_date, order_status
+                FROM orders
+                WHERE check_in_day <= ?
+                AND check_out_day >= ?
+                AND order_status IN ('预定中', '已入住')
+            """
+            result['fallback'] = {
+                'string_compare': self.db.fetch_all(conn, string_sql, (stat_date, stat_date))[0]['occupied_count'],
+                'check_in_equals': self.db.fetch_all(conn, check_in_sql, (stat_day,))[0]['occupied_count'],
+                'today_active_orders': self.db.fetch_all(conn, today_sql, (self._utc_day(), self._utc_day()))
+            }
+
+        return result
+
+    @request_memoized
     def get_revenue_analysis(self, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
         """
         获取收入分析
@@ -426,6 +288,7 @@ class Analytics:
                 end_date = datetime.now().strftime('%Y-%m-%d')
             if not start_date:
                 start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            day_range = (self.db.day_number(start_date), self.db.day_number(end_date))
 
             # 总收入统计
             revenue_sql = """
@@ -433,9 +296,9 @@ class Analytics:
                                  SUM(paid_amount)  as total_paid, \
                                  COUNT(*)          as order_count
                           FROM orders
-                          WHERE DATE (created_at) BETWEEN DATE (?) AND DATE (?) \
+                          WHERE created_day BETWEEN ? AND ? \
                           """
-            revenue_res = self.db.execute_query(revenue_sql, (start_date, end_date))
+            revenue_res = self.db.execute_query(revenue_sql, day_range)
             revenue_stats = revenue_res[0] if revenue_res else {
                 'total_revenue': 0,
                 'total_paid': 0,
@@ -445,13 +308,13 @@ class Analytics:
             # 每日收入趋势
             daily_sql = """
                         SELECT
-                            DATE (created_at) as date, SUM (total_amount) as daily_revenue, SUM (paid_amount) as daily_paid, COUNT (*) as daily_orders
+                            DATE (created_day * 86400, 'unixepoch') as date, SUM (total_amount) as daily_revenue, SUM (paid_amount) as daily_paid, COUNT (*) as daily_orders
                         FROM orders
-                        WHERE DATE (created_at) BETWEEN DATE (?) AND DATE (?)
-                        GROUP BY DATE (created_at)
-                        ORDER BY date \
+                        WHERE created_day BETWEEN ? AND ?
+                        GROUP BY created_day
+                        ORDER BY created_day \
                         """
-            daily_trend = self.db.execute_query(daily_sql, (start_date, end_date)) or []
+            daily_trend = self.db.execute_query(daily_sql, day_range) or []
 
             # 房型收入分析
             room_type_sql = """
@@ -461,11 +324,11 @@ class Analytics:
                                    ROUND(AVG(o.total_amount), 2) as avg_order_value
                             FROM orders o
                                      JOIN rooms r ON o.room_number = r.room_number
-                            WHERE DATE (o.created_at) BETWEEN DATE (?) AND DATE (?)
+                            WHERE o.created_day BETWEEN ? AND ?
                             GROUP BY r.room_type
                             ORDER BY revenue DESC \
                             """
-            room_type_stats = self.db.execute_query(room_type_sql, (start_date, end_date)) or []
+            room_type_stats = self.db.execute_query(room_type_sql, day_range) or []
 
             # 支付方式统计
             payment_sql = """
@@ -473,10 +336,10 @@ class Analytics:
                                  SUM(total_amount) as amount, \
                                  COUNT(*) as count
                           FROM orders
-                          WHERE DATE (created_at) BETWEEN DATE (?) AND DATE (?)
+                          WHERE created_day BETWEEN ? AND ?
                           GROUP BY payment_status \
                           """
-            payment_stats = self.db.execute_query(payment_sql, (start_date, end_date)) or []
+            payment_stats = self.db.execute_query(payment_sql, day_range) or []
 
             return {
                 'success': True,
@@ -496,80 +359,52 @@ class Analytics:
                 'data': {}
             }
 
+    @request_memoized
     def get_dashboard_summary(self, stat_date: str = None) -> Dict[str, Any]:
         """
         获取仪表板汇总数据（基于指定日期）
+        各统计块分发到线程池并行计算，各自使用独立的 WAL 读连接
+        员工、客户、房态、订单总数等反映当前状态的数据总是实时计算；
+        历史日期的收入与入住数先查日结快照（主键查找），命中时不再计算统计日相关的查询，
+        未命中时在一个读事务内计算并写入快照
         """
         try:
             # 统一统计日期
             if not stat_date:
                 stat_date = datetime.now().strftime('%Y/%m/%d')
 
-            # 各模块统计
-            employee_stats = self.get_employee_statistics()
-            order_stats = self.get_order_statistics()
-            customer_stats = self.get_customer_statistics()
-            room_stats = self.get_room_statistics(stat_date)
-
-            # 指定日期收入
-            revenue_sql = """
-                SELECT
-                    COUNT(*) as total_orders,
-                    SUM(CASE WHEN order_status = '预定中' THEN 1 ELSE 0 END) as reserved,
-                    SUM(CASE WHEN order_status = '已入住' THEN 1 ELSE 0 END) as checked_in,
-                    SUM(CASE WHEN order_status = '已完成' THEN 1 ELSE 0 END) as completed,
-                    SUM(total_amount) as total_amount,
-                    SUM(paid_amount) as paid_amount
-                FROM orders
-                WHERE DATE(REPLACE(created_at, '/', '-')) = DATE(REPLACE(?, '/', '-'))
-            """
-
-            revenue_res = self.db.execute_query(revenue_sql, (stat_date,))
-            revenue = revenue_res[0] if revenue_res else {
-                'total_orders': 0,
-                'reserved': 0,
-                'checked_in': 0,
-                'completed': 0,
-                'total_amount': 0,
-                'paid_amount': 0
-            }
-
-            # 最近 7 天趋势
-            week_trend_sql = """
-                SELECT
-                    DATE(REPLACE(created_at, '/', '-')) as date,
-                    COUNT(*) as orders,
-                    SUM(total_amount) as revenue
-                FROM orders
-                WHERE DATE(REPLACE(created_at, '/', '-')) >= DATE('now', '-6 days')
-                GROUP BY DATE(REPLACE(created_at, '/', '-'))
-                ORDER BY date
-            """
-            week_trend = self.db.execute_query(week_trend_sql) or []
-
-            summary = {
-                'stat_date': stat_date,
-                'employees': employee_stats['data']['total'] if employee_stats['success'] else 0,
-                'active_employees': employee_stats['data']['active'] if employee_stats['success'] else 0,
-                'customers': customer_stats['data']['total'] if customer_stats['success'] else 0,
-                'rooms': room_stats['data']['total'] if room_stats['success'] else 0,
-                'occupied_rooms': room_stats['data']['occupied'] if room_stats['success'] else 0,
-                'occupancy_rate': room_stats['data']['occupancy_rate'] if room_stats['success'] else 0,
-                'total_orders': order_stats['data']['total'] if order_stats['success'] else 0,
-                'revenue': revenue
-            }
+            stat_day = self._normalize_date(stat_date)
+            is_past = stat_day < datetime.now().strftime('%Y-%m-%d')
+
+            message = f'{stat_date} 仪表板数据加载完成'
+            if not is_past:
+                tasks = [
+                    (self.stats.employees,),
+                    (self.stats.orders, stat_day),
+                    (self.stats.customers,),
+                    (self.stats.rooms, stat_day),
+                ]
+                data = self._build_dashboard(stat_date, *self._parallel_blocks(tasks))
+            else:
+                closed = self._load_snapshot(stat_day)
+                if closed is None:
+                    with self.db.read_transaction() as conn:
+                        closed = self.stats.day(conn, stat_day)
+                        self._save_snapshot(conn, stat_day, closed)
+                else:
+                    message += '（日结快照）'
+                tasks = [
+                    (self.stats.employees,),
+                    (self.stats.orders,),
+                    (self.stats.customers,),
+                    (self.stats.rooms,),
+                ]
+                data = self._apply_closed_day(self._build_dashboard(stat_date, *self._parallel_blocks(tasks)), closed)
 
             return {
                 'success': True,
-                'data': {
-                    'summary': summary,
-                    'week_trend': week_trend,
-                    'employee_stats': employee_stats['data'] if employee_stats['success'] else {},
-                    'order_stats': order_stats['data'] if order_stats['success'] else {},
-                    'customer_stats': customer_stats['data'] if customer_stats['success'] else {},
-                    'room_stats': room_stats['data'] if room_stats['success'] else {}
-                },
-                'message': f'{stat_date} 仪表板数据加载完成'
+                'data': data,
+                'message': message
             }
 
         except Exception as e:
@@ -579,6 +414,83 @@ class Analytics:
                 'data': {}
             }
 
+    @staticmethod
+    def _build_dashboard(stat_date: str, employee_stats, orders, customer_stats, room_stats) -> Dict[str, Any]:
+        """把各统计块合并为仪表板数据"""
+        order_stats = orders['order_stats']
+        summary = {
+            'stat_date': stat_date,
+            'employees': employee_stats['total'],
+            'active_employees': employee_stats['active'],
+            'customers': customer_stats['total'],
+            'rooms': room_stats['total'],
+            'occupied_rooms': room_stats['occupied'],
+            'occupancy_rate': room_stats['occupancy_rate'],
+            'total_orders': order_stats['total'],
+            'revenue': orders['revenue']
+        }
+        return {
+            'summary': summary,
+            'week_trend': orders['week_trend'],
+            'employee_stats': employee_stats,
+            'order_stats': order_stats,
+            'customer_stats': customer_stats,
+            'room_stats': room_stats
+        }
+
+    def _apply_closed_day(self, data: Dict[str, Any], closed: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        填入日结快照中的统计日收入与入住数，入住率按当前房间总数计算
+        room_stats 可能是请求缓存中共享的统计块，复制后再修改
+        """
+        room_stats = dict(data['room_stats'])
+        room_stats['occupied'] = closed['occupied']
+        room_stats['occupancy_rate'] = self.stats.occupancy_rate(closed['occupied'], room_stats['total'])
+        data['room_stats'] = room_stats
+        data['summary'].update({
+            'revenue': dict(closed['revenue']),
+            'occupied_rooms': room_stats['occupied'],
+            'occupancy_rate': room_stats['occupancy_rate']
+        })
+        return data
+
+    def _load_snapshot(self, stat_day: str):
+        rows = self.db.execute_query("SELECT data FROM daily_snapshots WHERE stat_date = ?", (stat_day,))
+        return json.loads(rows[0]['data']) if rows else None
+
+    def _save_snapshot(self, conn, stat_day: str, data: Dict[str, Any]) -> None:
+        """
+        在计算快照的同一事务内写入，读取之后若有并发写入提交，
+        升级写锁会失败，此时放弃保存，避免留下过期快照
+        """
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO daily_snapshots (stat_date, data) VALUES (?, ?)",
+                (stat_day, json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str))
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"保存日结快照失败: {e}")
+
+    def close_day(self, stat_date: str = None) -> Dict[str, Any]:
+        """
+        日结：重新计算并保存某一天的收入与入住数快照
+
+        Args:
+            stat_date: 统计日期 (YYYY-MM-DD)，默认昨天
+        """
+        if not stat_date:
+            stat_date = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        stat_day = self._normalize_date(stat_date)
+
+        if stat_day >= datetime.now().strftime('%Y-%m-%d'):
+            return {'success': False, 'message': '只能对已经结束的日期日结'}
+
+        try:
+            self.db.execute_update("DELETE FROM daily_snapshots WHERE stat_date = ?", (stat_day,))
+        except Exception as e:
+            return {'success': False, 'message': f'日结失败: {str(e)}'}
+        return self.get_dashboard_summary(stat_day)
 
 
     def generate_chart_data(self, chart_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -610,8 +522,6 @@ class Analytics:
 
             elif chart_type == 'order_status':
                 # 订单状态分布图
-                print("订单状态统计:", stats)
-
                 stats = self.get_order_statistics()
                 if stats['success']:
                     by_status = stats['data']['by_status']
@@ -680,6 +590,17 @@ class Analytics:
                 'message': f'图表数据生成失败: {str(e)}'
             }
 
+    def generate_charts(self, chart_types: List[str], params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        一次生成多个图表，底层统计在同一请求作用域内共享
+
+        Args:
+            chart_types: 图表类型列表
+            params: 额外参数
+        """
+        with self.request_cache():
+            return {chart_type: self.generate_chart_data(chart_type, params) for chart_type in chart_types}
+
     def _generate_colors(self, count: int) -> List[str]:
         """生成颜色数组"""
         colors = [
@@ -1,40 +1,40 @@
-import configparser
 import hashlib
-import os
+
+from modules.config import Config
 
 class Auth:
     def __init__(
             self,
             config_file: str = "config/admin.cfg",
-            permission_file: str = "config/permission.cfg"
+            permission_file: str = "config/permission.cfg",
+            config: Config = None
     ) -> None:
         self.config_file = config_file
         self.permission_file = permission_file
-
-        self.permissions = {}
-        self._load_permissions()
+        # 配置读自 Config 缓存的快照，文件修改后自动生效，无需重启
+        self.config = config or Config()
+        # (权限文件快照, 解析后的权限)，整体替换
+        self._permission_cache = (None, {})
 
     def _load_admin(self) -> dict[str, str]:
-        _config = configparser.ConfigParser()
-        if os.path.exists(self.config_file):
-            _config.read(self.config_file, encoding='utf-8')
-            if 'admin' in _config:
-                return {
-                    'username': _config['admin'].get('username', 'admin'),
-                    'password': _config['admin'].get('password', 'admin123')
-                }
-        return {'username': 'admin', 'password': 'admin123'}
-
-    def _load_permissions(self):
-        self.permissions = {}
-        if os.path.exists(self.permission_file):
-            config = configparser.ConfigParser()
-            config.read(self.permission_file, encoding='utf-8')
-            if 'departments' in config:
-                for dept, perms in config['departments'].items():
-                    # 将权限字符串转换为列表
-                    perm_list = [p.strip() for p in perms.split(',') if p.strip()]
-                    self.permissions[dept] = perm_list
+        admin = self.config.snapshot(self.config_file).get('admin', {})
+        return {
+            'username': admin.get('username', 'admin'),
+            'password': admin.get('password', 'admin123')
+        }
+
+    @property
+    def permissions(self) -> dict:
+        """部门 -> 可访问页面列表，权限文件的快照变化时重新解析"""
+        snapshot = self.config.snapshot(self.permission_file)
+        source, permissions = self._permission_cache
+        if snapshot is not source:
+            permissions = {}
+            for dept, perms in snapshot.get('departments', {}).items():
+                # 将权限字符串转换为列表
+                permissions[dept] = [p.strip() for p in perms.split(',') if p.strip()]
+            self._permission_cache = (snapshot, permissions)
+        return permissions
 
     def verify_admin(self, username: str, password: str) -> bool:
         """
@@ -130,15 +130,13 @@ class Auth:
             return False, "新密码长度至少6位"
 
         # 更新密码
-        _config = configparser.ConfigParser()
-        _config['admin'] = {
-            'username': _admin_creds['username'],
-            'password': new_password
-        }
-
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as _configfile:
-                _config.write(_configfile)
+            self.config.save(self.config_file, {
+                'admin': {
+                    'username': _admin_creds['username'],
+                    'password': new_password
+                }
+            })
             return True, "密码修改成功"
         except Exception as _e:
             return False, f"密码修改失败: {str(_e)}"
@@ -1,14 +1,87 @@
 import configparser
 import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping
+
 
 class Config:
+    """
+    配置文件的初始化与读取
+    读取返回按文件缓存的不可变快照（节 -> 键 -> 值 的只读映射），
+    只有文件的 mtime 或大小变化时才重新解析；同一文件最多每 RELOAD_CHECK_SECONDS 秒检查一次
+    """
+
+    # 两次检查文件是否变化的最短间隔（秒），间隔内直接返回缓存的快照
+    RELOAD_CHECK_SECONDS = 1.0
+
     def __init__(self):
         self.config_dir = "config"
         self.admin_config_file = os.path.join(self.config_dir, "admin.cfg")
         self.permission_config_file = os.path.join(self.config_dir, "permission.cfg")
         self.weather_config_file = os.path.join(self.config_dir, "weather_api.cfg")
+        # 文件路径 -> (文件签名, 快照, 上次检查时间)
+        self._snapshots = {}
+        self._lock = threading.Lock()
         self._check_configs()
 
+    @staticmethod
+    def _signature(path: str):
+        """文件的 (mtime_ns, 大小)，文件不存在时为 None"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _parse(path: str) -> Mapping[str, Mapping[str, str]]:
+        parser = configparser.ConfigParser()
+        parser.read(path, encoding='utf-8')
+        return MappingProxyType({
+            section: MappingProxyType(dict(parser[section])) for section in parser.sections()
+        })
+
+    def snapshot(self, path: str) -> Mapping[str, Mapping[str, str]]:
+        """
+        获取配置文件的只读快照，文件不存在时为空映射
+        快照不会被修改，文件变化后换成新快照，持有旧快照的调用方不受影响
+        """
+        entry = self._snapshots.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry[2] < self.RELOAD_CHECK_SECONDS:
+            return entry[1]
+
+        with self._lock:
+            entry = self._snapshots.get(path)
+            signature = self._signature(path)
+            if entry is not None and entry[0] == signature:
+                snapshot = entry[1]
+            else:
+                snapshot = self._parse(path) if signature is not None else MappingProxyType({})
+            self._snapshots[path] = (signature, snapshot, now)
+            return snapshot
+
+    def save(self, path: str, sections: Mapping[str, Mapping[str, str]]) -> None:
+        """
+        整体写入配置文件并使缓存失效，下次读取即为新内容
+        先写临时文件再替换，读者不会读到写了一半的文件
+        """
+        parser = configparser.ConfigParser()
+        parser.read_dict({section: dict(values) for section, values in sections.items()})
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as configfile:
+            parser.write(configfile)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._snapshots.pop(path, None)
+
     def _check_configs(self):
         # 检查并创建配置目录
         if not os.path.exists(self.config_dir):
@@ -23,46 +96,46 @@ class Config:
             self._create_weather_config()
 
     def _create_admin_config(self):
-        config = configparser.ConfigParser()
-        config['admin'] = {
-            'username': 'admin',
-            'password': 'admin123'
+        sections = {
+            'admin': {
+                'username': 'admin',
+                'password': 'admin123'
+            }
         }
 
         try:
-            with open(self.admin_config_file, 'w', encoding='utf-8') as configfile:
-                config.write(configfile)
+            self.save(self.admin_config_file, sections)
             print(f"创建管理员配置文件: {self.admin_config_file}")
         except Exception as e:
             print(f"创建管理员配置文件失败: {e}")
 
     def _create_permission_config(self):
-        config = configparser.ConfigParser()
-        config['departments'] = {
-            '前厅部': 'rooms, orders, customers',
-            '客房部': 'rooms',
-            '餐饮部': 'orders',
-            '财务部': 'orders, customers, analytics',
-            '人事部': 'employees'
+        sections = {
+            'departments': {
+                '前厅部': 'rooms, orders, customers',
+                '客房部': 'rooms',
+                '餐饮部': 'orders',
+                '财务部': 'orders, customers, analytics',
+                '人事部': 'employees'
+            }
         }
 
         try:
-            with open(self.permission_config_file, 'w', encoding='utf-8') as configfile:
-                config.write(configfile)
+            self.save(self.permission_config_file, sections)
             print(f"创建权限配置文件: {self.permission_config_file}")
         except Exception as e:
             print(f"创建权限配置文件失败: {e}")
 
     def _create_weather_config(self):
-        config = configparser.ConfigParser()
-        config['weather_api'] = {
-            'api_host': 'your-api-host.re.qweatherapi.com',
-            'api_key': 'your-api-key'
+        sections = {
+            'weather_api': {
+                'api_host': 'your-api-host.re.qweatherapi.com',
+                'api_key': 'your-api-key'
+            }
         }
 
         try:
-            with open(self.weather_config_file, 'w', encoding='utf-8') as configfile:
-                config.write(configfile)
+            self.save(self.weather_config_file, sections)
             print(f"创建天气API配置文件: {self.weather_config_file}")
         except Exception as e:
             print(f"创建天气API配置文件失败: {e}")
\ No newline at end of file
@@ -1,78 +1,56 @@
 # modules/customers.py
 from datetime import datetime
 
+from modules.dedup import normalize_id_card, normalize_phone
+
 
 class Customers:
+    # 按 ID 顺序的连续序号，读取时用窗口函数计算
+    DISPLAY_NO_SQL = "SELECT *, ROW_NUMBER() OVER (ORDER BY id) AS display_no FROM customers"
+    # 列表可排序字段（created_at 可能为空，按与索引一致的表达式排序）
+    SORT_FIELDS = {'id': 'id', 'name': 'name', 'created_at': "IFNULL(created_at, '')"}
+    # 列表每页默认条数与上限
+    PAGE_LIMIT = 50
+    MAX_PAGE_LIMIT = 500
+    # 检索默认返回条数与上限
+    SEARCH_LIMIT = 50
+    MAX_SEARCH_LIMIT = 500
+    # 参与相关度排序的候选条数上限
+    SEARCH_CANDIDATES = 1000
+    # 排行榜字段（customer_stats 上各有倒序索引）与默认条数
+    TOP_FIELDS = {'spent': 'total_spent', 'orders': 'order_count', 'nights': 'nights'}
+    TOP_LIMIT = 10
+    # 客户汇总中默认附带的最近订单数
+    RECENT_ORDERS = 10
+
     def __init__(self, db):
         self.db = db
+        self._search_index = None
         # self.create_table_if_not_exists() 数据表的初始化移动至database.py
-        self.reorder_all_ids()
-
-    def reorder_all_ids(self):
-        """
-        [核心修复逻辑]
-        强制重排整个客户表的所有 ID，使其变成连续的 1, 2, 3...
-        例如：数据库里有 ID [2, 5, 8]，执行后会变成 [1, 2, 3]
-        """
-        try:
-            # 1. 获取所有客户，按当前 ID 从小到大排序
-            sql_get_all = "SELECT id FROM customers ORDER BY id ASC"
-            rows = self.db.execute_query(sql_get_all)
-
-            if not rows:
-                return
-
-            # 2. 像报数一样，给每个客户分配正确的“行号”
-            expected_id = 1
-            for row in rows:
-                current_id = row['id']
-
-                # 如果当前 ID 不等于它应该在的位置 (比如它是 2，但应该在第 1 位)
-                if current_id != expected_id:
-                    # 更新 ID
-                    sql_update = "UPDATE customers SET id = ? WHERE id = ?"
-                    self.db.execute_update(sql_update, (expected_id, current_id))
-                    print(f"系统自检：已自动修正客户 ID {current_id} -> {expected_id}")
-
-                expected_id += 1
-
-        except Exception as e:
-            print(f"重排 ID 失败: {str(e)}")
-
-    def get_next_id(self):
-        """获取下一个 ID"""
-        try:
-            sql = "SELECT COUNT(*) as count FROM customers"
-            result = self.db.execute_query(sql)
-            count = result[0]['count'] if result else 0
-            return count + 1
-        except:
-            return 1
+        # 客户 ID 是稳定主键，订单通过它引用客户，不再重排；列表中的连续序号由 display_no 提供
 
     def create_customer(self, input_data: dict) -> dict:
         try:
-            # 1. 验证
-            if not input_data.get('name'): return {'success': False, 'message': '姓名不能为空'}
-            if not input_data.get('phone'): return {'success': False, 'message': '手机号不能为空'}
-            if not input_data.get('id_card'): return {'success': False, 'message': '身份证不能为空'}
+            # 1. 验证；手机号、身份证号按与批量导入、查重相同的规则归一化后入库
+            name = (input_data.get('name') or '').strip()
+            phone = normalize_phone(input_data.get('phone'))
+            id_card = normalize_id_card(input_data.get('id_card'))
+            if not name: return {'success': False, 'message': '姓名不能为空'}
+            if not phone: return {'success': False, 'message': '手机号不能为空'}
+            if not id_card: return {'success': False, 'message': '身份证不能为空'}
 
-            if self.check_exists(input_data['phone'], input_data['id_card']):
+            if self.check_exists(phone, id_card):
                 return {'success': False, 'message': '手机号或身份证已存在'}
 
-            # 2. 插入前先重排一次，确保环境干净
-            self.reorder_all_ids()
-
-            # 3. 计算新 ID
-            new_id = self.get_next_id()
+            # 2. ID 由 SQLite 分配，已有客户的 ID 保持不变
             created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-            sql = "INSERT INTO customers (id, name, phone, id_card, created_at) VALUES (?, ?, ?, ?, ?)"
-            params = (
-            new_id, input_data['name'].strip(), input_data['phone'].strip(), input_data['id_card'].strip(), created_at)
+            sql = "INSERT INTO customers (name, phone, id_card, created_at) VALUES (?, ?, ?, ?) RETURNING id"
+            params = (name, phone, id_card, created_at)
 
-            res = self.db.execute_update(sql, params)
-            if res is not None:
-                return {'success': True, 'message': f'添加成功，ID: {new_id}'}
+            res = self.db.execute_query(sql, params)
+            if res:
+                return {'success': True, 'message': f'添加成功，ID: {res[0]["id"]}', 'data': {'id': res[0]['id']}}
             else:
                 return {'success': False, 'message': '添加失败'}
 
@@ -80,16 +58,20 @@ class Customers:
             return {'success': False, 'message': f'错误: {str(e)}'}
 
     def delete_customer(self, customer_id: str) -> dict:
-        """删除客户后，立即执行全表重排"""
+        """删除客户，仍被订单引用的客户不能删除"""
         try:
             cid = int(customer_id)
+            orders = self.db.execute_query(
+                "SELECT COUNT(*) as count FROM orders WHERE customer_id = ?", (cid,)
+            )
+            if orders and orders[0]['count'] > 0:
+                return {'success': False, 'message': f'该客户还有 {orders[0]["count"]} 个订单，不能删除'}
+
             sql = "DELETE FROM customers WHERE id = ?"
             result = self.db.execute_update(sql, (cid,))
 
             if result is not None and result > 0:
-                # [关键步骤] 删除后立即重排，填补空缺
-                self.reorder_all_ids()
-                return {'success': True, 'message': '删除成功，ID已自动重新排序'}
+                return {'success': True, 'message': '删除成功'}
             else:
                 return {'success': False, 'message': '删除失败'}
         except Exception as e:
@@ -105,12 +87,12 @@ class Customers:
             if input_data.get('name'):
                 set_fields.append("name = ?")
                 params.append(input_data['name'].strip())
-            if input_data.get('phone'):
+            if normalize_phone(input_data.get('phone')):
                 set_fields.append("phone = ?")
-                params.append(input_data['phone'].strip())
-            if input_data.get('id_card'):
+                params.append(normalize_phone(input_data['phone']))
+            if normalize_id_card(input_data.get('id_card')):
                 set_fields.append("id_card = ?")
-                params.append(input_data['id_card'].strip())
+                params.append(normalize_id_card(input_data['id_card']))
 
             if not set_fields: return {'success': False, 'message': '无修改内容'}
 
@@ -126,41 +108,220 @@ class Customers:
 
     def get_all_customers(self) -> dict:
         try:
-            # 每次获取列表前，也可以尝试重排（为了保险），但一般删除/增加时处理就够了
-            # self.reorder_all_ids()
-            sql = "SELECT * FROM customers ORDER BY id ASC"
+            sql = f"{self.DISPLAY_NO_SQL} ORDER BY id ASC"
             data = self.db.execute_query(sql)
             return {'success': True, 'data': data if data else []}
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
+    def get_customers_page(self, after_id=None, limit: int = None, sort: str = 'id',
+                           order: str = 'asc', with_total: bool = False) -> dict:
+        """
+        键集分页获取客户列表
+        以上一页最后一位客户的 ID 为游标，按 (排序字段, id) 定位下一页起点，
+        翻到任意深度都只读取一页数据
+
+        Args:
+            after_id: 上一页最后一条记录的 ID，为空时从第一页开始
+            limit: 每页条数，默认 50，最多 500
+            sort: 排序字段 id / name / created_at
+            order: asc / desc
+            with_total: 是否附带客户总数的估算值
+        """
+        try:
+            column = self.SORT_FIELDS.get(sort)
+            if column is None:
+                return {'success': False, 'message': f'不支持的排序字段: {sort}'}
+            limit = max(1, min(int(limit or self.PAGE_LIMIT), self.MAX_PAGE_LIMIT))
+            direction = 'DESC' if str(order).lower() == 'desc' else 'ASC'
+            compare = '<' if direction == 'DESC' else '>'
+
+            where, params = '', {'limit': limit + 1}
+            if after_id not in (None, ''):
+                params['after_id'] = int(after_id)
+                if sort == 'id':
+                    where = f"WHERE id {compare} :after_id"
+                else:
+                    # 等价于 (column, id) > (游标值, after_id)，拆成范围条件才能走索引定位
+                    cursor = f"(SELECT {column} FROM customers WHERE id = :after_id)"
+                    where = (f"WHERE {column} {compare}= {cursor} "
+                             f"AND ({column} {compare} {cursor} OR id {compare} :after_id)")
+
+            order_by = f"id {direction}" if sort == 'id' else f"{column} {direction}, id {direction}"
+            sql = f"SELECT * FROM customers {where} ORDER BY {order_by} LIMIT :limit"
+            rows = self.db.execute_query(sql, params) or []
+
+            # 多取一条用于判断是否还有下一页
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            paging = {
+                'limit': limit,
+                'sort': sort,
+                'order': direction.lower(),
+                'has_more': has_more,
+                'next_after_id': rows[-1]['id'] if has_more else None
+            }
+            if with_total:
+                paging['total'] = self._estimate_total()
+                paging['total_is_estimate'] = True
+            return {'success': True, 'data': rows, 'paging': paging}
+        except (TypeError, ValueError):
+            return {'success': False, 'message': '分页参数无效'}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    def _estimate_total(self) -> int:
+        """
+        估算客户总数，避免每次翻页都 COUNT(*) 全表
+        有 ANALYZE 统计信息时直接读取，否则用最大 ID（ID 不重排，删除留下的空洞会使其略偏大）
+        """
+        has_stat = self.db.execute_query(
+            "SELECT COUNT(*) as count FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+        if has_stat and has_stat[0]['count']:
+            stat = self.db.execute_query("SELECT stat FROM sqlite_stat1 WHERE tbl = 'customers' LIMIT 1")
+            if stat and stat[0]['stat']:
+                return int(str(stat[0]['stat']).split()[0])
+        res = self.db.execute_query("SELECT MAX(id) as max_id FROM customers")
+        return (res[0]['max_id'] or 0) if res else 0
+
     def get_customer_by_id(self, customer_id: str) -> dict:
         try:
-            sql = "SELECT * FROM customers WHERE id = ?"
-            res = self.db.execute_query(sql, (customer_id,))
+            # 连续序号 display_no 只由列表查询的窗口函数给出，详情按主键取一行
+            res = self.db.execute_query("SELECT * FROM customers WHERE id = ?", (customer_id,))
             if res: return {'success': True, 'data': res[0]}
             return {'success': False, 'message': '未找到'}
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
-    def search_customers(self, keyword: str) -> dict:
+    def get_customer_summary(self, customer_id: str, recent: int = None) -> dict:
+        """
+        客户消费汇总：订单数、累计消费与已付、入住晚数、首末入住日（读 customer_stats），
+        以及最近的若干笔订单
+        """
         try:
-            p = [f"%{keyword}%"] * 3
-            sql_parts = ["name LIKE ?", "phone LIKE ?", "id_card LIKE ?"]
-            if keyword.isdigit():
-                sql_parts.append("id = ?")
-                p.append(int(keyword))
-
-            sql = f"SELECT * FROM customers WHERE {' OR '.join(sql_parts)} ORDER BY id ASC"
-            data = self.db.execute_query(sql, tuple(p))
-            return {'success': True, 'data': data if data else []}
+            recent = max(1, min(int(recent or self.RECENT_ORDERS), self.MAX_PAGE_LIMIT))
+            with self.db.read_transaction() as conn:
+                customer = self.db.fetch_all(
+                    conn, "SELECT id, name, phone, id_card, created_at FROM customers WHERE id = ?", (customer_id,)
+                )
+                if not customer:
+                    return {'success': False, 'message': '未找到'}
+                stats = self.db.fetch_all(conn, "SELECT * FROM customer_stats WHERE customer_id = ?", (customer_id,))
+                orders = self.db.fetch_all(conn, """
+                    SELECT order_id, room_number, check_in_date, check_out_date, days,
+                           order_status, payment_status, total_amount, paid_amount
+                    FROM orders
+                    WHERE customer_id = ?
+                    ORDER BY check_in_day DESC
+                    LIMIT ?
+                """, (customer_id, recent))
+
+            stats = stats[0] if stats else {}
+            first_day, last_day = stats.get('first_stay_day'), stats.get('last_stay_day')
+            return {
+                'success': True,
+                'data': {
+                    'customer': customer[0],
+                    'order_count': stats.get('order_count', 0),
+                    'total_spent': stats.get('total_spent', 0),
+                    'total_paid': stats.get('total_paid', 0),
+                    'nights': stats.get('nights', 0),
+                    'first_stay': self.db.day_to_date(first_day) if first_day is not None else None,
+                    'last_stay': self.db.day_to_date(last_day) if last_day is not None else None,
+                    'recent_orders': orders
+                }
+            }
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
+    def get_top_customers(self, by: str = 'spent', limit: int = None) -> dict:
+        """消费排行榜，按 spent（累计消费）/ orders（订单数）/ nights（入住晚数）倒序，沿汇总表索引读取前 N 名"""
+        column = self.TOP_FIELDS.get(by)
+        if column is None:
+            return {'success': False, 'message': f'不支持的排行字段: {by}', 'data': []}
+        try:
+            limit = max(1, min(int(limit or self.TOP_LIMIT), self.MAX_PAGE_LIMIT))
+            sql = f"""
+                  SELECT c.id, c.name, s.order_count, s.total_spent, s.nights
+                  FROM customer_stats s
+                           JOIN customers c ON c.id = s.customer_id
+                  ORDER BY s.{column} DESC
+                  LIMIT ?
+                  """
+            rows = self.db.execute_query(sql, (limit,)) or []
+            return {'success': True, 'data': rows, 'message': f'前{len(rows)}名客户'}
+        except Exception as e:
+            return {'success': False, 'message': str(e), 'data': []}
+
+    def search_customers(self, keyword: str, limit: int = None) -> dict:
+        """
+        按姓名、手机号、身份证号的任意片段检索客户
+        关键字不少于 3 个字符时走 trigram 索引，按相关度排序（完全匹配优先）；
+        更短的关键字退回 LIKE 扫描
+        """
+        try:
+            keyword = (keyword or '').strip()
+            limit = max(1, min(int(limit or self.SEARCH_LIMIT), self.MAX_SEARCH_LIMIT))
+
+            if len(keyword) >= 3 and self._has_search_index():
+                data = self._search_indexed(keyword, limit)
+            else:
+                data = self._search_scan(keyword, limit)
+            return {'success': True, 'data': data}
+        except Exception as e:
+            return {'success': False, 'message': str(e)}
+
+    def _has_search_index(self) -> bool:
+        if self._search_index is None:
+            res = self.db.execute_query(
+                "SELECT COUNT(*) as count FROM sqlite_master WHERE type = 'table' AND name = 'customers_fts'"
+            )
+            self._search_index = bool(res and res[0]['count'])
+        return self._search_index
+
+    def _search_indexed(self, keyword: str, limit: int) -> list:
+        # 整个关键字作为一个短语，trigram 分词下即为子串匹配
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        # 相关度：完全匹配 > 尾号匹配 > 开头匹配 > 其他，只在有限的候选集内排序
+        sql = """
+              SELECT c.*
+              FROM (SELECT rowid FROM customers_fts WHERE customers_fts MATCH :phrase LIMIT :candidates) f
+                  JOIN customers c ON c.id = f.rowid
+              ORDER BY CASE
+                           WHEN c.phone = :kw OR c.id_card = :kw OR c.name = :kw THEN 0
+                           WHEN substr(c.phone, -length(:kw)) = :kw OR substr(c.id_card, -length(:kw)) = :kw THEN 1
+                           WHEN substr(c.phone, 1, length(:kw)) = :kw OR substr(c.id_card, 1, length(:kw)) = :kw
+                                OR substr(c.name, 1, length(:kw)) = :kw THEN 2
+                           ELSE 3
+                       END,
+                       c.id
+              LIMIT :limit
+              """
+        params = {'phrase': phrase, 'kw': keyword, 'candidates': self.SEARCH_CANDIDATES, 'limit': limit}
+        data = self.db.execute_query(sql, params) or []
+
+        # 纯数字关键字同时按客户 ID 精确匹配
+        if keyword.isdigit() and all(row['id'] != int(keyword) for row in data):
+            exact = self.db.execute_query("SELECT * FROM customers WHERE id = ?", (int(keyword),))
+            data = (exact + data)[:limit] if exact else data
+        return data
+
+    def _search_scan(self, keyword: str, limit: int) -> list:
+        p = [f"%{keyword}%"] * 3
+        sql_parts = ["name LIKE ?", "phone LIKE ?", "id_card LIKE ?"]
+        if keyword.isdigit():
+            sql_parts.append("id = ?")
+            p.append(int(keyword))
+        p.append(limit)
+
+        sql = f"SELECT * FROM customers WHERE {' OR '.join(sql_parts)} ORDER BY id ASC LIMIT ?"
+        return self.db.execute_query(sql, tuple(p)) or []
+
     def check_exists(self, phone, id_card):
         try:
             sql = "SELECT COUNT(*) as count FROM customers WHERE phone = ? OR id_card = ?"
-            res = self.db.execute_query(sql, (phone, id_card))
+            res = self.db.execute_query(sql, (normalize_phone(phone), normalize_id_card(id_card)))
             return res[0]['count'] > 0 if res else False
         except:
             return False
\ No newline at end of file
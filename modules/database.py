@@ -1,8 +1,46 @@
+import itertools
+import re
 import sqlite3
+from contextlib import contextmanager
+from datetime import date
+
+from modules.dedup import normalize_id_card, normalize_phone
+
+# 日序号：距 1970-01-01 的天数，与 SQLite 中 strftime('%s', ...) / 86400 一致
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# 需要归一化并生成日序号列的日期字段：(表, 原始列, 日序号列)
+DATE_COLUMNS = [
+    ('orders', 'created_at', 'created_day'),
+    ('orders', 'check_in_date', 'check_in_day'),
+    ('orders', 'check_out_date', 'check_out_day'),
+    ('customers', 'created_at', 'created_day'),
+]
+
+# 记录变更日志的表：表名 -> (主键, 记录旧值的字段)
+# 字段与 Suggest.KINDS 中的索引字段一致，联想索引据旧值删去旧键
+CHANGE_LOG_TABLES = {
+    'customers': ('id', ('name', 'phone')),
+    'rooms': ('room_number', ('room_number', 'room_type')),
+    'employees': ('employee_id', ('employee_id', 'employee_name')),
+}
+
+SCHEMA_VERSION = 12
+
+# 从写语句中解析被修改的表名
+WRITE_TABLE_PATTERN = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+["`\[]?(\w+)',
+    re.IGNORECASE
+)
 
 class Database:
+    # bulk_load 每个事务写入的行数与装载连接的页缓存大小（KB）
+    BULK_CHUNK_SIZE = 50000
+    BULK_CACHE_KB = 256 * 1024
+
     def __init__(self, db_path: str = "hotel.db"):
         self.db_path = db_path
+        self._write_listeners = []
         self._init_database()
 
     def _get_connection(self):
@@ -13,6 +51,9 @@ class Database:
     def _init_database(self):
         conn = self._get_connection()
         try:
+            # WAL 模式下读不阻塞写，多个读连接可以并行执行统计查询（设置持久保存在数据库文件中）
+            conn.execute("PRAGMA journal_mode=WAL")
+
             # 创建部门表
             conn.execute('''
                          CREATE TABLE IF NOT EXISTS departments(
@@ -144,7 +185,52 @@ class Database:
                          END;
             ''')
 
+            # 创建日结快照表，按统计日期保存当日收入与入住数
+            conn.execute('''
+                         CREATE TABLE IF NOT EXISTS daily_snapshots(
+                             stat_date TEXT PRIMARY KEY,
+                             data TEXT NOT NULL,
+                             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                         ) WITHOUT ROWID
+            ''')
+
+            # 创建触发器，订单写入（含补录历史订单）时使受影响日期的快照失效
+            # 受影响日期：订单创建日，以及入住日至退房日前一天
+            snapshot_invalidation = '''
+                             DELETE FROM daily_snapshots
+                             WHERE stat_date = DATE(REPLACE({row}.created_at, '/', '-'))
+                                OR (stat_date >= DATE(REPLACE({row}.check_in_date, '/', '-'))
+                                    AND stat_date < DATE(REPLACE({row}.check_out_date, '/', '-')));
+            '''
+            conn.execute(f'''
+                         CREATE TRIGGER IF NOT EXISTS invalidate_snapshots_order_insert
+                         AFTER INSERT ON orders
+                         FOR EACH ROW
+                         BEGIN
+                             {snapshot_invalidation.format(row='NEW')}
+                         END;
+            ''')
+            conn.execute(f'''
+                         CREATE TRIGGER IF NOT EXISTS invalidate_snapshots_order_update
+                         AFTER UPDATE OF customer_id, room_number, check_in_date, check_out_date, total_amount,
+                                         paid_amount, payment_status, order_status, created_at ON orders
+                         FOR EACH ROW
+                         BEGIN
+                             {snapshot_invalidation.format(row='OLD')}
+                             {snapshot_invalidation.format(row='NEW')}
+                         END;
+            ''')
+            conn.execute(f'''
+                         CREATE TRIGGER IF NOT EXISTS invalidate_snapshots_order_delete
+                         AFTER DELETE ON orders
+                         FOR EACH ROW
+                         BEGIN
+                             {snapshot_invalidation.format(row='OLD')}
+                         END;
+            ''')
+
             conn.commit()
+            self._migrate_schema(conn)
             print("数据库初始化成功！")
 
         except Exception as e:
@@ -152,6 +238,397 @@ class Database:
         finally:
             conn.close()
 
+    def _migrate_schema(self, conn):
+        """按 PRAGMA user_version 执行一次性的数据库迁移"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        if version < 1:
+            print("正在升级数据库: 归一化日期并添加日序号列...")
+            self._migrate_date_columns(conn)
+
+        if version < 2:
+            print("正在升级数据库: 创建客户三元组检索索引...")
+            self._migrate_customer_search(conn)
+
+        if version < 3:
+            print("正在升级数据库: 创建客户列表排序索引...")
+            # 键集分页按 (排序字段, id) 定位，索引隐含 rowid 即 id
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_created_at ON customers(IFNULL(created_at, ''))")
+
+        if version < 4:
+            print("正在升级数据库: 创建客户手机号与身份证号索引...")
+            # 批量导入按手机号、身份证号去重
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_phone ON customers(phone)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_id_card ON customers(id_card)")
+
+        if version < 5:
+            print("正在升级数据库: 创建订单客户索引...")
+            # 合并客户时按客户改挂订单，删除客户前检查订单引用
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id)")
+
+        if version < 6:
+            print("正在升级数据库: 创建客户消费汇总表...")
+            self._migrate_customer_stats(conn)
+
+        if version < 7:
+            print("正在升级数据库: 创建数据版本表...")
+            # 进程内缓存（如房间目录）按版本号判断其他进程是否修改过对应的表
+            conn.execute('''
+                         CREATE TABLE IF NOT EXISTS data_versions(
+                             name TEXT PRIMARY KEY,
+                             version INTEGER NOT NULL
+                         ) WITHOUT ROWID
+            ''')
+            conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('rooms', 0)")
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                conn.execute(f'''
+                             CREATE TRIGGER IF NOT EXISTS rooms_version_{event.lower()}
+                             AFTER {event} ON rooms
+                             BEGIN
+                                 UPDATE data_versions SET version = version + 1 WHERE name = 'rooms';
+                             END;
+                ''')
+
+        if version < 8:
+            print("正在升级数据库: 创建有效订单住期索引...")
+            # 按日期查可订房间：只索引未取消、未完成的订单，退房日晚于查询起点的通常只占很少一部分
+            conn.execute('''
+                         CREATE INDEX IF NOT EXISTS idx_orders_active_stay
+                         ON orders(check_out_day, check_in_day, room_number)
+                         WHERE order_status NOT IN ('已取消', '已完成')
+            ''')
+
+        if version < 9:
+            print("正在升级数据库: 创建员工列表筛选与排序索引...")
+            self._migrate_employee_indexes(conn)
+
+        if version < 10:
+            print("正在升级数据库: 清除旧格式的日结快照...")
+            # 快照改为只保存统计日的收入与入住数，旧快照保存的是整个仪表板
+            conn.execute("DELETE FROM daily_snapshots")
+
+        if version < 11:
+            print("正在升级数据库: 创建变更日志...")
+            self._migrate_change_log(conn)
+
+        if version < 12:
+            print("正在升级数据库: 归一化客户手机号与身份证号...")
+            self._migrate_customer_identity(conn)
+
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+
+    def _migrate_change_log(self, conn):
+        """
+        变更日志 change_log：CHANGE_LOG_TABLES 中的表每写入一行，由触发器追加 (表名, 主键, 旧值)
+        插入只记主键，修改和删除另记索引字段的旧值（JSON 数组）；record_key 为 NULL 表示整张表都已变化
+        进程内的联想索引按序号读取新增的日志，只更新变化的记录
+        """
+        conn.execute('''
+                     CREATE TABLE IF NOT EXISTS change_log(
+                         seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                         name TEXT NOT NULL,
+                         record_key,
+                         old_values TEXT
+                     )
+        ''')
+        for table, (key, fields) in CHANGE_LOG_TABLES.items():
+            old_values = f"json_array({', '.join(f'OLD.{field}' for field in fields)})"
+            watched = ', '.join(dict.fromkeys((key,) + fields))
+            conn.execute(f'''
+                         CREATE TRIGGER IF NOT EXISTS {table}_change_insert
+                         AFTER INSERT ON {table}
+                         FOR EACH ROW
+                         BEGIN
+                             INSERT INTO change_log (name, record_key) VALUES ('{table}', NEW.{key});
+                         END;
+            ''')
+            conn.execute(f'''
+                         CREATE TRIGGER IF NOT EXISTS {table}_change_update
+                         AFTER UPDATE OF {watched} ON {table}
+                         FOR EACH ROW
+                         BEGIN
+                             INSERT INTO change_log (name, record_key, old_values)
+                             VALUES ('{table}', OLD.{key}, {old_values});
+                             INSERT INTO change_log (name, record_key)
+                             SELECT '{table}', NEW.{key} WHERE NEW.{key} IS NOT OLD.{key};
+                         END;
+            ''')
+            conn.execute(f'''
+                         CREATE TRIGGER IF NOT EXISTS {table}_change_delete
+                         AFTER DELETE ON {table}
+                         FOR EACH ROW
+                         BEGIN
+                             INSERT INTO change_log (name, record_key, old_values)
+                             VALUES ('{table}', OLD.{key}, {old_values});
+                         END;
+            ''')
+
+    def _migrate_customer_identity(self, conn):
+        """
+        客户的手机号、身份证号统一按 normalize_phone / normalize_id_card 保存，
+        页面新增的客户与批量导入、查重按同一个值比较（如 '138-0000-0001' 保存为 '13800000001'）
+        """
+        updates = []
+        for customer_id, phone, id_card in conn.execute("SELECT id, phone, id_card FROM customers"):
+            normalized = (normalize_phone(phone) or phone, normalize_id_card(id_card) or id_card)
+            if normalized != (phone, id_card):
+                updates.append(normalized + (customer_id,))
+        conn.executemany("UPDATE customers SET phone = ?, id_card = ? WHERE id = ?", updates)
+
+    def _migrate_employee_indexes(self, conn):
+        """
+        员工列表按部门、状态、职位筛选，按工号、姓名、入职日期键集分页；
+        索引末尾带上工号，筛选后按工号翻页、按 (排序字段, 工号) 定位都不需要额外排序
+        """
+        # 入职日期按文本比较区间，先统一为 YYYY-MM-DD
+        updates = []
+        for employee_id, value in conn.execute(
+            "SELECT employee_id, hire_date FROM employees "
+            "WHERE hire_date IS NOT NULL AND hire_date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+        ).fetchall():
+            normalized = self.normalize_date_text(value)
+            if normalized and normalized != value:
+                updates.append((normalized, employee_id))
+        conn.executemany("UPDATE employees SET hire_date = ? WHERE employee_id = ?", updates)
+
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_department ON employees(department_id, employee_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_status ON employees(status, employee_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_position ON employees(position_name, employee_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_name ON employees(employee_name, employee_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_hire_date ON employees(IFNULL(hire_date, ''), employee_id)")
+
+    def _migrate_date_columns(self, conn):
+        """
+        把日期字段统一为 YYYY-MM-DD[ HH:MM:SS] 格式，
+        并添加由原始列生成的整数日序号列及索引，使日期范围查询可以走索引
+        """
+        for table, column, day_column in DATE_COLUMNS:
+            rows = conn.execute(
+                f"SELECT rowid, {column} FROM {table} "
+                f"WHERE {column} IS NOT NULL "
+                f"AND {column} NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+            ).fetchall()
+            updates = []
+            for rowid, value in rows:
+                normalized = self.normalize_date_text(value)
+                if normalized and normalized != value:
+                    updates.append((normalized, rowid))
+            conn.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+
+            existing = [row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})").fetchall()]
+            if day_column not in existing:
+                conn.execute(
+                    f"ALTER TABLE {table} ADD COLUMN {day_column} INTEGER "
+                    f"GENERATED ALWAYS AS (CAST(strftime('%s', REPLACE({column}, '/', '-')) AS INTEGER) / 86400) VIRTUAL"
+                )
+
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_created_day ON orders(created_day)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_stay ON orders(check_in_day, check_out_day)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_room_stay ON orders(room_number, check_in_day)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_created_day ON customers(created_day)")
+
+    def _migrate_customer_search(self, conn):
+        """
+        为客户的姓名、手机号、身份证号建立 FTS5 trigram 索引（外部内容表，不重复存储数据），
+        由触发器与 customers 表保持同步；SQLite 未编译 FTS5 时跳过，检索退回 LIKE 扫描
+        """
+        try:
+            conn.execute('''
+                         CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+                             name, phone, id_card,
+                             content='customers', content_rowid='id', tokenize='trigram'
+                         )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"当前 SQLite 不支持 FTS5 trigram，客户检索使用 LIKE: {e}")
+            return
+
+        conn.execute('''
+                     CREATE TRIGGER IF NOT EXISTS customers_fts_insert
+                     AFTER INSERT ON customers
+                     FOR EACH ROW
+                     BEGIN
+                         INSERT INTO customers_fts(rowid, name, phone, id_card)
+                         VALUES (NEW.id, NEW.name, NEW.phone, NEW.id_card);
+                     END;
+        ''')
+        conn.execute('''
+                     CREATE TRIGGER IF NOT EXISTS customers_fts_delete
+                     AFTER DELETE ON customers
+                     FOR EACH ROW
+                     BEGIN
+                         INSERT INTO customers_fts(customers_fts, rowid, name, phone, id_card)
+                         VALUES ('delete', OLD.id, OLD.name, OLD.phone, OLD.id_card);
+                     END;
+        ''')
+        conn.execute('''
+                     CREATE TRIGGER IF NOT EXISTS customers_fts_update
+                     AFTER UPDATE OF id, name, phone, id_card ON customers
+                     FOR EACH ROW
+                     BEGIN
+                         INSERT INTO customers_fts(customers_fts, rowid, name, phone, id_card)
+                         VALUES ('delete', OLD.id, OLD.name, OLD.phone, OLD.id_card);
+                         INSERT INTO customers_fts(rowid, name, phone, id_card)
+                         VALUES (NEW.id, NEW.name, NEW.phone, NEW.id_card);
+                     END;
+        ''')
+        conn.execute("INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')")
+
+    def _migrate_customer_stats(self, conn):
+        """
+        客户消费汇总表 customer_stats，每位有订单的客户一行；已取消的订单只计入订单数
+        订单增删改时由触发器按差值增减，所有写入途径（页面、导入、合并、其他进程）都能保持一致；
+        只有删掉的恰好是最早/最近一次入住时，才沿 (customer_id, check_in_day) 索引重新取首末入住日
+        """
+        conn.execute('''
+                     CREATE TABLE IF NOT EXISTS customer_stats(
+                         customer_id INTEGER PRIMARY KEY,
+                         order_count INTEGER NOT NULL,
+                         total_spent REAL NOT NULL,
+                         total_paid REAL NOT NULL,
+                         nights INTEGER NOT NULL,
+                         first_stay_day INTEGER,
+                         last_stay_day INTEGER
+                     )
+        ''')
+        # 排行榜按各指标倒序取前 N 名，直接读索引
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_stats_spent ON customer_stats(total_spent DESC)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_stats_orders ON customer_stats(order_count DESC)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_stats_nights ON customer_stats(nights DESC)")
+        # 取代 idx_orders_customer：同样支持按客户查找，并能按入住日有序取首末入住
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_customer_stay ON orders(customer_id, check_in_day)")
+        conn.execute("DROP INDEX IF EXISTS idx_orders_customer")
+
+        active = "{row}.order_status != '已取消'"
+        add = f'''
+                         INSERT INTO customer_stats (customer_id, order_count, total_spent, total_paid, nights,
+                                                     first_stay_day, last_stay_day)
+                         VALUES ({{row}}.customer_id, 1,
+                                 CASE WHEN {active} THEN {{row}}.total_amount ELSE 0 END,
+                                 CASE WHEN {active} THEN COALESCE({{row}}.paid_amount, 0) ELSE 0 END,
+                                 CASE WHEN {active} THEN {{row}}.days ELSE 0 END,
+                                 CASE WHEN {active} THEN {{row}}.check_in_day END,
+                                 CASE WHEN {active} THEN {{row}}.check_in_day END)
+                         ON CONFLICT(customer_id) DO UPDATE SET
+                             order_count = order_count + 1,
+                             total_spent = total_spent + excluded.total_spent,
+                             total_paid = total_paid + excluded.total_paid,
+                             nights = nights + excluded.nights,
+                             first_stay_day = COALESCE(MIN(first_stay_day, excluded.first_stay_day),
+                                                       first_stay_day, excluded.first_stay_day),
+                             last_stay_day = COALESCE(MAX(last_stay_day, excluded.last_stay_day),
+                                                      last_stay_day, excluded.last_stay_day);
+        '''
+        stay = '''(SELECT check_in_day FROM orders
+                                      WHERE customer_id = {row}.customer_id AND order_status != '已取消'
+                                      ORDER BY check_in_day {direction} LIMIT 1)'''
+        remove = f'''
+                         UPDATE customer_stats SET
+                             order_count = order_count - 1,
+                             total_spent = total_spent - CASE WHEN {active} THEN {{row}}.total_amount ELSE 0 END,
+                             total_paid = total_paid - CASE WHEN {active} THEN COALESCE({{row}}.paid_amount, 0) ELSE 0 END,
+                             nights = nights - CASE WHEN {active} THEN {{row}}.days ELSE 0 END,
+                             first_stay_day = CASE WHEN {active} AND {{row}}.check_in_day <= first_stay_day
+                                                   THEN {stay.replace('{direction}', 'ASC')}
+                                                   ELSE first_stay_day END,
+                             last_stay_day = CASE WHEN {active} AND {{row}}.check_in_day >= last_stay_day
+                                                  THEN {stay.replace('{direction}', 'DESC')}
+                                                  ELSE last_stay_day END
+                         WHERE customer_id = {{row}}.customer_id;
+                         DELETE FROM customer_stats WHERE customer_id = {{row}}.customer_id AND order_count <= 0;
+        '''
+        conn.execute(f'''
+                     CREATE TRIGGER IF NOT EXISTS customer_stats_order_insert
+                     AFTER INSERT ON orders
+                     FOR EACH ROW
+                     BEGIN
+                         {add.format(row='NEW')}
+                     END;
+        ''')
+        # 只在影响汇总的字段变化时触发（预定中 -> 已入住 -> 已完成 等状态流转不触发）
+        conn.execute(f'''
+                     CREATE TRIGGER IF NOT EXISTS customer_stats_order_update
+                     AFTER UPDATE OF customer_id, total_amount, paid_amount, days, check_in_date, order_status ON orders
+                     FOR EACH ROW
+                     WHEN OLD.customer_id IS NOT NEW.customer_id
+                       OR OLD.total_amount IS NOT NEW.total_amount
+                       OR OLD.paid_amount IS NOT NEW.paid_amount
+                       OR OLD.days IS NOT NEW.days
+                       OR OLD.check_in_day IS NOT NEW.check_in_day
+                       OR (OLD.order_status = '已取消') != (NEW.order_status = '已取消')
+                     BEGIN
+                         {remove.format(row='OLD')}
+                         {add.format(row='NEW')}
+                     END;
+        ''')
+        conn.execute(f'''
+                     CREATE TRIGGER IF NOT EXISTS customer_stats_order_delete
+                     AFTER DELETE ON orders
+                     FOR EACH ROW
+                     BEGIN
+                         {remove.format(row='OLD')}
+                     END;
+        ''')
+
+        self._backfill_customer_stats(conn)
+
+    @staticmethod
+    def _backfill_customer_stats(conn):
+        """按订单表重算全部客户消费汇总"""
+        conn.execute("DELETE FROM customer_stats")
+        conn.execute('''
+                     INSERT INTO customer_stats
+                     SELECT customer_id,
+                            COUNT(*),
+                            COALESCE(SUM(CASE WHEN order_status != '已取消' THEN total_amount END), 0),
+                            COALESCE(SUM(CASE WHEN order_status != '已取消' THEN paid_amount END), 0),
+                            COALESCE(SUM(CASE WHEN order_status != '已取消' THEN days END), 0),
+                            MIN(CASE WHEN order_status != '已取消' THEN check_in_day END),
+                            MAX(CASE WHEN order_status != '已取消' THEN check_in_day END)
+                     FROM orders
+                     GROUP BY customer_id
+        ''')
+
+    @staticmethod
+    def normalize_date_text(value):
+        """把 '2025/1/5'、'2025-01-05 8:03:00' 等格式统一为 '2025-01-05'、'2025-01-05 08:03:00'"""
+        if value is None:
+            return None
+        text = str(value).strip().replace('/', '-').replace('T', ' ')
+        date_part, _, time_part = text.partition(' ')
+        try:
+            year, month, day = (int(part) for part in date_part.split('-'))
+            normalized = date(year, month, day).strftime('%Y-%m-%d')
+        except ValueError:
+            return None
+        if time_part:
+            try:
+                pieces = [int(float(part)) for part in time_part.split(':')]
+                pieces += [0] * (3 - len(pieces))
+                normalized += ' {:02d}:{:02d}:{:02d}'.format(*pieces[:3])
+            except ValueError:
+                pass
+        return normalized
+
+    @staticmethod
+    def day_number(value) -> int:
+        """把日期（date 对象或 YYYY-MM-DD 文本）转换为与日序号列一致的整数"""
+        if isinstance(value, date):
+            return value.toordinal() - EPOCH_ORDINAL
+        text = Database.normalize_date_text(value)
+        if text is None:
+            raise ValueError(f'无效日期: {value}')
+        return date.fromisoformat(text[:10]).toordinal() - EPOCH_ORDINAL
+
+    @staticmethod
+    def day_to_date(day: int) -> str:
+        """日序号转换回 YYYY-MM-DD 文本"""
+        return date.fromordinal(day + EPOCH_ORDINAL).strftime('%Y-%m-%d')
+
     def execute_query(self, sql: str, params: tuple = None):
         """执行查询并返回结果"""
         conn = self._get_connection()
@@ -165,8 +642,15 @@ class Database:
             if sql.strip().upper().startswith('SELECT'):
                 rows = cursor.fetchall()
                 return [dict(row) for row in rows]
+            elif re.search(r'\bRETURNING\b', sql, re.IGNORECASE):
+                # 带 RETURNING 的写语句：先取回结果再提交
+                rows = [dict(row) for row in cursor.fetchall()]
+                conn.commit()
+                self._notify_write(sql)
+                return rows
             else:
                 conn.commit()
+                self._notify_write(sql)
                 return cursor.rowcount
         except Exception as e:
             conn.rollback()
@@ -175,6 +659,140 @@ class Database:
         finally:
             conn.close()
 
+    def execute_many(self, sql: str, seq_of_params) -> int:
+        """在一个事务内对多组参数执行同一条写语句，返回受影响的行数"""
+        conn = self._get_connection()
+        try:
+            cursor = conn.executemany(sql, seq_of_params)
+            conn.commit()
+            self._notify_write(sql)
+            return cursor.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"数据库批量操作失败: {e}")
+            raise e
+        finally:
+            conn.close()
+
+    def add_write_listener(self, callback):
+        """注册写入监听器，每次写语句提交后以被修改的表名调用 callback(table)"""
+        self._write_listeners.append(callback)
+
+    def _notify_write(self, sql: str):
+        match = WRITE_TABLE_PATTERN.match(sql)
+        self._notify_table(match.group(1).lower() if match else None)
+
+    def _notify_table(self, table):
+        for callback in self._write_listeners:
+            try:
+                callback(table)
+            except Exception as e:
+                print(f"写入监听器执行失败: {e}")
+
     def execute_update(self, sql: str, params: tuple = None):
         """执行更新操作"""
-        return self.execute_query(sql, params)
\ No newline at end of file
+        return self.execute_query(sql, params)
+
+    @contextmanager
+    def read_transaction(self):
+        """
+        在同一连接的读事务中执行多条查询
+        事务内的所有 SELECT 看到的是同一个数据库快照，退出时释放连接
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN")
+            yield conn
+        finally:
+            conn.rollback()
+            conn.close()
+
+    @contextmanager
+    def write_transaction(self, *tables: str):
+        """
+        在一个写事务中执行多条语句：正常退出时提交，并以 tables 中的表名通知写入监听器；出错时整体回滚
+        事务开始即获取写锁（BEGIN IMMEDIATE），事务内读到的数据在提交前不会被其他连接修改
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        for table in tables:
+            self._notify_table(table)
+
+    @contextmanager
+    def bulk_load(self, *tables: str):
+        """
+        离线批量装载：暂时删除 tables 上的二级索引和触发器，装载结束后按原定义重建，
+        并重算原本由触发器维护的派生数据（客户检索索引、客户消费汇总、房间版本号、日结快照、变更日志）
+        yield 装载用的连接，配合 bulk_insert 分块写入；
+        装载期间其他连接也看不到这些索引和触发器，只应在没有其他写入时使用
+        """
+        conn = self._get_connection()
+        conn.execute(f"PRAGMA cache_size = {-self.BULK_CACHE_KB}")
+        placeholders = ', '.join('?' * len(tables))
+        saved = conn.execute(
+            f"SELECT type, name, sql FROM sqlite_master "
+            f"WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ({placeholders})",
+            tables
+        ).fetchall()
+        for kind, name, _ in saved:
+            conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+        conn.commit()
+
+        try:
+            yield conn
+        finally:
+            try:
+                conn.rollback()
+                # 先建索引（一次排序建成，比逐行维护快得多），再恢复触发器，最后重算派生数据
+                for kind, _, sql in sorted(saved, key=lambda item: item[0] != 'index'):
+                    conn.execute(sql)
+                self._rebuild_derived(conn, tables)
+                conn.commit()
+            finally:
+                conn.close()
+            for table in tables:
+                self._notify_table(table)
+
+    @classmethod
+    def bulk_insert(cls, conn, sql: str, rows) -> int:
+        """把任意长的行迭代器按 BULK_CHUNK_SIZE 行分块，每块一个事务写入，返回写入行数"""
+        count = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, cls.BULK_CHUNK_SIZE))
+            if not chunk:
+                return count
+            conn.executemany(sql, chunk)
+            conn.commit()
+            count += len(chunk)
+
+    def _rebuild_derived(self, conn, tables):
+        """重算 tables 的写入触发器本应维护的派生数据"""
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if 'customers' in tables and 'customers_fts' in existing:
+            conn.execute("INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')")
+        if 'orders' in tables:
+            if 'customer_stats' in existing:
+                self._backfill_customer_stats(conn)
+            conn.execute("DELETE FROM daily_snapshots")
+        if 'data_versions' in existing:
+            for table in tables:
+                conn.execute("UPDATE data_versions SET version = version + 1 WHERE name = ?", (table,))
+        if 'change_log' in existing:
+            for table in tables:
+                if table in CHANGE_LOG_TABLES:
+                    conn.execute("INSERT INTO change_log (name, record_key) VALUES (?, NULL)", (table,))
+
+    @staticmethod
+    def fetch_all(conn, sql: str, params: tuple = None) -> list:
+        """在给定连接上执行查询并返回字典列表"""
+        cursor = conn.execute(sql, params) if params else conn.execute(sql)
+        return [dict(row) for row in cursor.fetchall()]
@@ -0,0 +1,343 @@
+import hashlib
+import math
+import re
+import unicodedata
+from typing import Dict, Any, Iterable, List
+
+import numpy as np
+
+
+def normalize_phone(phone) -> str:
+    """手机号只保留数字并去掉 86 国家码，如 '+86 138-0000-0001' -> '13800000001'"""
+    digits = str(phone or '')
+    if not (digits.isascii() and digits.isdigit()):
+        digits = re.sub(r'\D', '', unicodedata.normalize('NFKC', digits))
+    if len(digits) == 13 and digits.startswith('86'):
+        digits = digits[2:]
+    return digits
+
+
+def normalize_id_card(id_card) -> str:
+    """身份证号去掉空白、全角转半角、校验位 x 统一为大写"""
+    text = str(id_card or '')
+    if text.isascii() and text.isalnum():
+        return text.upper()
+    return re.sub(r'\s', '', unicodedata.normalize('NFKC', text)).upper()
+
+
+def normalize_name(name) -> str:
+    """姓名去掉空白和间隔号、全角转半角、字母小写"""
+    return re.sub(r'[\s·•.]', '', unicodedata.normalize('NFKC', str(name or ''))).lower()
+
+
+def birth_date(id_card: str) -> str:
+    """18 位身份证号中的出生日期 YYYYMMDD，无法识别时返回空字符串"""
+    if len(id_card) == 18 and id_card[6:14].isdigit():
+        return id_card[6:14]
+    return ''
+
+
+class BloomFilter:
+    """
+    布隆过滤器：判断键“一定不存在”或“可能存在”
+    容量 n、误判率 p 时位数 m = -n·ln(p)/ln²2，哈希次数 k = m/n·ln2；
+    每个键取一次 blake2b 摘要拆成两个 64 位值，按 h1 + i·h2 (mod 2^64) 双重哈希得到 k 个位置。
+    位数组用 NumPy 保存，批量加入时整批向量化计算位置
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.count = 0
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = np.zeros(self.size, dtype=bool)
+        self._steps = np.arange(self.hashes, dtype=np.uint64)
+
+    def _positions(self, keys: List[str]) -> np.ndarray:
+        digests = b''.join(hashlib.blake2b(key.encode(), digest_size=16).digest() for key in keys)
+        pairs = np.frombuffer(digests, dtype='<u8').reshape(-1, 2)
+        h1, h2 = pairs[:, :1], pairs[:, 1:] | np.uint64(1)
+        return (h1 + self._steps * h2) % np.uint64(self.size)
+
+    def add_many(self, keys: List[str]):
+        if keys:
+            self.bits[self._positions(keys).ravel()] = True
+            self.count += len(keys)
+
+    def add(self, key: str):
+        self.add_many([key])
+
+    def contains_many(self, keys: List[str]) -> np.ndarray:
+        """逐个键判断是否可能存在，返回布尔数组"""
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        return self.bits[self._positions(keys)].all(axis=1)
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self.contains_many([key])[0])
+
+
+class CustomerDedup:
+    """
+    客户查重与合并
+    一次扫描客户表，为每位客户生成分块键（归一化手机号、归一化身份证号、姓名 + 出生日期），
+    共享任一分块键的客户用并查集合并为同一簇；合并时把订单改挂到保留的客户名下并删除其余客户
+    """
+
+    # 分块键及其含义
+    REASONS = {
+        'phone': '手机号相同',
+        'id_card': '身份证号相同',
+        'name_birth': '姓名与出生日期相同',
+    }
+    # 可以自动合并的分块键；只因姓名与出生日期相同而连通的客户需人工确认
+    MERGE_KEYS = ('phone', 'id_card')
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 500
+    # 建立布隆过滤器时每批读取的行数
+    BLOOM_BATCH = 50000
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def blocking_keys(name, phone, id_card) -> List[str]:
+        """客户的分块键，空值不参与分块"""
+        keys = []
+        phone = normalize_phone(phone)
+        if phone:
+            keys.append(f'phone:{phone}')
+        id_card = normalize_id_card(id_card)
+        if id_card:
+            keys.append(f'id_card:{id_card}')
+            name, birth = normalize_name(name), birth_date(id_card)
+            if name and birth:
+                keys.append(f'name_birth:{name}|{birth}')
+        return keys
+
+    def build_bloom_filter(self, extra_capacity: int = 0, error_rate: float = 0.01) -> BloomFilter:
+        """用现有客户的归一化手机号和身份证号建立布隆过滤器，extra_capacity 为预计新增的客户数"""
+        with self.db.read_transaction() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+            bloom = BloomFilter(2 * (count + extra_capacity), error_rate)
+            cursor = conn.execute("SELECT phone, id_card FROM customers")
+            while True:
+                rows = cursor.fetchmany(self.BLOOM_BATCH)
+                if not rows:
+                    break
+                bloom.add_many([f'phone:{normalize_phone(phone)}' for phone, _ in rows]
+                               + [f'id_card:{normalize_id_card(id_card)}' for _, id_card in rows])
+        return bloom
+
+    def _scan_clusters(self) -> List[Dict[str, Any]]:
+        """
+        一次扫描得到所有疑似重复簇：[{'ids': [...], 'reasons': {...}, 'groups': [[...], ...], 'confirmed': bool}]
+        簇由任一分块键连通；groups 是簇内仅凭手机号或身份证号连通的子簇（只含两人以上的），
+        confirmed 表示整个簇就是一个这样的子簇。姓名 + 出生日期只用于发现候选，不作为自动合并的依据。
+        簇内和子簇内 ID 升序
+        """
+        parent: Dict[int, int] = {}
+        strong_parent: Dict[int, int] = {}
+
+        def find(tree: Dict[int, int], x: int) -> int:
+            root = x
+            while tree.get(root, root) != root:
+                root = tree[root]
+            # 路径压缩
+            while tree.get(x, x) != root:
+                tree[x], x = root, tree[x]
+            return root
+
+        def union(tree: Dict[int, int], x: int, y: int):
+            """合并两棵树，以较小的 ID 为根（根即簇内最早的客户），返回 (新根, 被并入的根)；已连通时被并入的根为 None"""
+            a, b = find(tree, x), find(tree, y)
+            if a == b:
+                return a, None
+            a, b = min(a, b), max(a, b)
+            tree[b] = a
+            tree.setdefault(a, a)
+            return a, b
+
+        first_seen: Dict[str, int] = {}
+        reasons: Dict[int, set] = {}
+        with self.db.read_transaction() as conn:
+            for customer_id, name, phone, id_card in conn.execute(
+                "SELECT id, name, phone, id_card FROM customers ORDER BY id"
+            ):
+                for key in self.blocking_keys(name, phone, id_card):
+                    other = first_seen.setdefault(key, customer_id)
+                    if other == customer_id:
+                        continue
+                    kind = key.split(':', 1)[0]
+                    root, merged = union(parent, other, customer_id)
+                    if merged is not None:
+                        reasons[root] = reasons.pop(merged, set()) | reasons.get(root, set())
+                    reasons.setdefault(root, set()).add(kind)
+                    if kind in self.MERGE_KEYS:
+                        union(strong_parent, other, customer_id)
+
+        clusters: Dict[int, List[int]] = {}
+        for customer_id in parent:
+            clusters.setdefault(find(parent, customer_id), []).append(customer_id)
+
+        result = []
+        for root, members in sorted(clusters.items()):
+            ids = sorted(members)
+            groups: Dict[int, List[int]] = {}
+            for customer_id in ids:
+                groups.setdefault(find(strong_parent, customer_id), []).append(customer_id)
+            groups = [group for group in groups.values() if len(group) > 1]
+            result.append({
+                'ids': ids,
+                'reasons': reasons.get(root, set()),
+                'groups': groups,
+                'confirmed': len(groups) == 1 and len(groups[0]) == len(ids)
+            })
+        return result
+
+    def find_duplicates(self, limit: int = None) -> Dict[str, Any]:
+        """
+        查找重复客户簇
+
+        Args:
+            limit: 返回的簇数，默认 50，最多 500；total 为全部簇数
+
+        每个簇建议保留最早建档（ID 最小）的客户，并附带各客户的订单数；
+        confirmed 为 False 的簇有客户只因姓名与出生日期相同而归入，需人工确认后再合并
+        """
+        try:
+            limit = max(1, min(int(limit or self.DEFAULT_LIMIT), self.MAX_LIMIT))
+            clusters = self._scan_clusters()
+            shown = clusters[:limit]
+
+            ids = [customer_id for cluster in shown for customer_id in cluster['ids']]
+            customers, order_counts = {}, {}
+            if ids:
+                placeholders = ', '.join('?' * len(ids))
+                customers = {row['id']: row for row in self.db.execute_query(
+                    f"SELECT id, name, phone, id_card, created_at FROM customers WHERE id IN ({placeholders})",
+                    tuple(ids)
+                ) or []}
+                order_counts = {row['customer_id']: row['orders'] for row in self.db.execute_query(
+                    f"SELECT customer_id, COUNT(*) as orders FROM orders "
+                    f"WHERE customer_id IN ({placeholders}) GROUP BY customer_id", tuple(ids)
+                ) or []}
+
+            data = []
+            for cluster in shown:
+                members = [dict(customers[customer_id], orders=order_counts.get(customer_id, 0))
+                           for customer_id in cluster['ids'] if customer_id in customers]
+                data.append({
+                    'keep_id': cluster['ids'][0],
+                    'reasons': [self.REASONS[key] for key in self.REASONS if key in cluster['reasons']],
+                    'confirmed': cluster['confirmed'],
+                    'customers': members
+                })
+
+            review = sum(1 for cluster in clusters if not cluster['confirmed'])
+            return {
+                'success': True,
+                'data': data,
+                'total': len(clusters),
+                'review': review,
+                'message': f'发现{len(clusters)}组疑似重复客户，其中{review}组需人工确认'
+            }
+        except Exception as e:
+            return {'success': False, 'message': f'查重失败: {str(e)}', 'data': []}
+
+    def merge(self, keep_id, merge_ids: Iterable) -> Dict[str, Any]:
+        """
+        合并客户：在一个事务内把 merge_ids 的订单改挂到 keep_id 名下，再删除 merge_ids
+        keep_id 与 merge_ids 必须经共享的分块键（手机号、身份证号、姓名 + 出生日期）彼此连通
+
+        Args:
+            keep_id: 保留的客户 ID
+            merge_ids: 被合并（删除）的客户 ID 列表
+        """
+        try:
+            keep_id = int(keep_id)
+            merge_ids = sorted({int(customer_id) for customer_id in merge_ids} - {keep_id})
+        except (TypeError, ValueError):
+            return {'success': False, 'message': '客户 ID 无效'}
+        if not merge_ids:
+            return {'success': False, 'message': '请选择要合并的客户'}
+
+        try:
+            moved = self._merge_ids(keep_id, merge_ids)
+        except (LookupError, ValueError) as e:
+            return {'success': False, 'message': str(e)}
+        except Exception as e:
+            return {'success': False, 'message': f'合并失败: {str(e)}'}
+        return {
+            'success': True,
+            'data': {'keep_id': keep_id, 'merged_ids': merge_ids, 'moved_orders': moved},
+            'message': f'已合并{len(merge_ids)}位客户，转移订单{moved}条'
+        }
+
+    def _connected(self, rows) -> bool:
+        """rows [(id, 姓名, 手机号, 身份证号)] 中的客户是否经共享的分块键彼此连通"""
+        groups = {row[0]: {row[0]} for row in rows}
+        owner: Dict[str, int] = {}
+        for customer_id, name, phone, id_card in rows:
+            for key in self.blocking_keys(name, phone, id_card):
+                other = owner.setdefault(key, customer_id)
+                if groups[other] is not groups[customer_id]:
+                    merged = groups[other] | groups[customer_id]
+                    for member in merged:
+                        groups[member] = merged
+        return len({id(group) for group in groups.values()}) == 1
+
+    def _merge_ids(self, keep_id: int, merge_ids: List[int]) -> int:
+        """
+        执行合并，返回转移的订单数（事务回滚的情况：客户不存在时抛出 LookupError，
+        所选客户按事务内读到的手机号、身份证号、姓名不再彼此连通时抛出 ValueError）
+        """
+        ids = [keep_id] + merge_ids
+        placeholders = ', '.join('?' * len(merge_ids))
+        with self.db.write_transaction('orders', 'customers') as conn:
+            rows = conn.execute(
+                f"SELECT id, name, phone, id_card FROM customers WHERE id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+            found = {row[0] for row in rows}
+            missing = [customer_id for customer_id in ids if customer_id not in found]
+            if missing:
+                raise LookupError(f'客户不存在: {", ".join(map(str, missing))}')
+            if not self._connected(rows):
+                raise ValueError('所选客户不属于同一组疑似重复客户')
+
+            moved = conn.execute(
+                f"UPDATE orders SET customer_id = ?, updated_at = datetime('now') WHERE customer_id IN ({placeholders})",
+                [keep_id] + merge_ids
+            ).rowcount
+            conn.execute(f"DELETE FROM customers WHERE id IN ({placeholders})", merge_ids)
+        return moved
+
+    def merge_all(self) -> Dict[str, Any]:
+        """
+        合并手机号或身份证号相同的重复客户，每组保留 ID 最小的客户；每组一个事务
+        只因姓名与出生日期相同而归入的客户不自动合并，计入 review 留待人工确认
+        """
+        try:
+            clusters = self._scan_clusters()
+            groups = [group for cluster in clusters for group in cluster['groups']]
+            review = sum(1 for cluster in clusters if not cluster['confirmed'])
+            merged = moved = 0
+            skipped = 0
+            for group in groups:
+                try:
+                    moved += self._merge_ids(group[0], group[1:])
+                except (LookupError, ValueError):
+                    # 扫描之后客户已被删除、合并或修改，跳过该组
+                    skipped += 1
+                    continue
+                merged += len(group) - 1
+            return {
+                'success': True,
+                'data': {'clusters': len(groups), 'merged': merged, 'moved_orders': moved,
+                         'skipped': skipped, 'review': review},
+                'message': f'合并{len(groups) - skipped}组重复客户，删除{merged}条重复记录，转移订单{moved}条，'
+                           f'{review}组需人工确认'
+            }
+        except Exception as e:
+            return {'success': False, 'message': f'合并失败: {str(e)}'}
@@ -1,9 +1,28 @@
 from datetime import datetime
 import hashlib
 
+from modules.stats import StatsEngine
+
 class Employee:
-    def __init__(self, db):
+    # 列表可排序字段（入职日期可能为空，按与索引一致的表达式排序）
+    SORT_FIELDS = {
+        'employee_id': 'e.employee_id',
+        'name': 'e.employee_name',
+        'hire_date': "IFNULL(e.hire_date, '')",
+    }
+    # 列表每页默认条数与上限
+    PAGE_LIMIT = 50
+    MAX_PAGE_LIMIT = 500
+    # 精确匹配的筛选条件：参数名 -> 列
+    EXACT_FILTERS = {
+        'department_id': 'e.department_id',
+        'status': 'e.status',
+        'position': 'e.position_name',
+    }
+
+    def __init__(self, db, stats: StatsEngine = None):
         self.db = db
+        self.stats = stats or StatsEngine(db)
 
     def create_employee(self, input_data: dict) -> dict:
         try:
@@ -20,9 +39,18 @@ class Employee:
                     'message': '性别必须是"男"或"女"'
                 }
 
+            # 入职日期统一为 YYYY-MM-DD，与筛选、排序使用的文本比较一致
+            hire_date = input_data.get('hire_date') or datetime.now().strftime('%Y-%m-%d')
+            normalized = self.db.normalize_date_text(hire_date)
+            if normalized is None:
+                return {
+                    'success': False,
+                    'message': f'入职日期格式无效: {hire_date}'
+                }
+            hire_date = normalized[:10]
+
             # 生成工号
-            hire_date = input_data.get('hire_date')
-            year = hire_date[:4] if hire_date else str(datetime.now().year)
+            year = hire_date[:4]
 
             max_id = self.get_max_id(year)
             if max_id:
@@ -63,7 +91,7 @@ class Employee:
                 db_data['password_hash'] = hashlib.sha256(input_data['password'].encode()).hexdigest()
 
             # 设置默认值
-            db_data['hire_date'] = input_data.get('hire_date') or datetime.now().strftime('%Y-%m-%d')
+            db_data['hire_date'] = hire_date
             db_data['status'] = input_data.get('status', '在职')
 
             # 插入数据库
@@ -96,6 +124,15 @@ class Employee:
                     'message': '员工不存在'
                 }
 
+            if update_data.get('hire_date'):
+                normalized = self.db.normalize_date_text(update_data['hire_date'])
+                if normalized is None:
+                    return {
+                        'success': False,
+                        'message': f"入职日期格式无效: {update_data['hire_date']}"
+                    }
+                update_data = dict(update_data, hire_date=normalized[:10])
+
             if self.db_update_employee(employee_id, update_data):
                 return {
                     'success': True,
@@ -127,74 +164,119 @@ class Employee:
                 'message': f'删除员工失败: {str(e)}'
             }
 
-    def get_employee_statistics(self) -> dict:
-        print("执行 get_employee_statistics()")
+    def get_all_employees(self) -> dict:
         try:
-            # 总员工数
-            total_res = self.db.execute_query("SELECT COUNT(*) AS total FROM employees")
-            print("total_res:", total_res)  # 调试输出
-            total = total_res[0]['total'] if total_res else 0
-
-            # 在职员工数
-            active_res = self.db.execute_query("SELECT COUNT(*) AS active FROM employees WHERE TRIM(status) = '在职'")
-            print("active_res:", active_res)  # 调试输出
-            active = active_res[0]['active'] if active_res else 0
-
-            # 离职员工数
-            terminated_res = self.db.execute_query("SELECT COUNT(*) AS terminated FROM employees WHERE TRIM(status) = '离职'")
-            print("terminated_res:", terminated_res)  # 调试输出
-            terminated = terminated_res[0]['terminated'] if terminated_res else 0
-
-            # 在职率
-            active_rate = f"{(active / total * 100):.0f}%" if total else '0%'
-
-            # 按部门统计在职员工
-            dept_sql = '''
-                SELECT d.department_name, COUNT(e.employee_id) AS count
-                FROM departments d
-                LEFT JOIN employees e
-                    ON d.department_id = e.department_id AND TRIM(e.status) = '在职'
-                GROUP BY d.department_id
-                ORDER BY count DESC
-            '''
-            by_dept = self.db.execute_query(dept_sql) or []
-            print("by_department:", by_dept)  # 调试输出
-
+            sql = '''
+                  SELECT e.*, d.department_name
+                  FROM employees e
+                      LEFT JOIN departments d ON e.department_id = d.department_id
+                  ORDER BY e.employee_id
+                  '''
+            employees = self.db.execute_query(sql)
             return {
                 'success': True,
-                'total': total,
-                'active': active,
-                'terminated': terminated,
-                'active_rate': active_rate,
-                'by_department': by_dept
+                'data': employees or [],
+                'message': f'获取到{len(employees) if employees else 0}名员工'
             }
-
         except Exception as e:
-            print(f"统计失败: {e}")
             return {
                 'success': False,
-                'total': 0,
-                'active': 0,
-                'terminated': 0,
-                'active_rate': '0%',
-                'by_department': []
+                'message': f'获取员工列表失败: {str(e)}'
             }
 
-
-    def get_all_employees(self) -> dict:
+    def get_employees_page(self, filters: dict) -> dict:
+        """
+        按条件筛选员工，键集分页返回
+        以上一页最后一名员工的工号为游标，按 (排序字段, 工号) 定位下一页起点，筛选和排序都在 SQL 中完成
+
+        Args:
+            filters: department_id、status、position 精确匹配；hire_from、hire_to 为入职日期闭区间；
+                     keyword 为姓名或工号前缀；sort 为 employee_id / name / hire_date，order 为 asc / desc；
+                     after_id 为上一页最后一名员工的工号，limit 为每页条数（默认 50，最多 500）；
+                     total 为 1 时附带符合条件的员工总数
+        """
+        filters = filters or {}
         try:
-            sql = '''
+            sort = filters.get('sort') or 'employee_id'
+            column = self.SORT_FIELDS.get(sort)
+            if column is None:
+                return {'success': False, 'message': f'不支持的排序字段: {sort}'}
+            limit = max(1, min(int(filters.get('limit') or self.PAGE_LIMIT), self.MAX_PAGE_LIMIT))
+            direction = 'DESC' if str(filters.get('order', 'asc')).lower() == 'desc' else 'ASC'
+            compare = '<' if direction == 'DESC' else '>'
+
+            conditions, params = [], {}
+            for key, field in self.EXACT_FILTERS.items():
+                value = str(filters.get(key) or '').strip()
+                if value:
+                    conditions.append(f"{field} = :{key}")
+                    params[key] = value
+
+            hire_from, hire_to = filters.get('hire_from'), filters.get('hire_to')
+            if hire_from or hire_to:
+                # 与排序共用 IFNULL(hire_date, '') 索引；空串小于任何日期，没有入职日期的员工不会落在区间内
+                conditions.append("IFNULL(e.hire_date, '') BETWEEN :hire_from AND :hire_to")
+                params['hire_from'] = self.db.day_to_date(self.db.day_number(hire_from)) if hire_from else '0'
+                params['hire_to'] = self.db.day_to_date(self.db.day_number(hire_to)) if hire_to else '9'
+
+            keyword = str(filters.get('keyword') or '').strip()
+            if keyword:
+                # 前缀写成范围条件，姓名和工号各自走索引
+                conditions.append("(e.employee_name >= :keyword AND e.employee_name < :keyword_end "
+                                  "OR e.employee_id >= :keyword AND e.employee_id < :keyword_end)")
+                params.update(keyword=keyword, keyword_end=keyword + '\U0010ffff')
+
+            where = ' AND '.join(conditions)
+            total = None
+            if str(filters.get('total')) == '1':
+                total = self.db.execute_query(
+                    f"SELECT COUNT(*) AS total FROM employees e {'WHERE ' + where if where else ''}", params
+                )[0]['total']
+
+            after_id = str(filters.get('after_id') or '').strip()
+            if after_id:
+                params['after_id'] = after_id
+                if sort == 'employee_id':
+                    conditions.append(f"e.employee_id {compare} :after_id")
+                else:
+                    # 等价于 (column, employee_id) > (游标值, after_id)，拆成范围条件才能走索引定位
+                    cursor = f"(SELECT {column} FROM employees e WHERE e.employee_id = :after_id)"
+                    conditions.append(f"{column} {compare}= {cursor} "
+                                      f"AND ({column} {compare} {cursor} OR e.employee_id {compare} :after_id)")
+
+            order_by = (f"e.employee_id {direction}" if sort == 'employee_id'
+                        else f"{column} {direction}, e.employee_id {direction}")
+            params['limit'] = limit + 1
+            sql = f'''
                   SELECT e.*, d.department_name
                   FROM employees e
                       LEFT JOIN departments d ON e.department_id = d.department_id
-                  ORDER BY e.employee_id
+                  {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+                  ORDER BY {order_by}
+                  LIMIT :limit
                   '''
-            employees = self.db.execute_query(sql)
+            rows = self.db.execute_query(sql, params) or []
+
+            # 多取一条用于判断是否还有下一页
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            paging = {
+                'limit': limit,
+                'sort': sort,
+                'order': direction.lower(),
+                'has_more': has_more,
+                'next_after_id': rows[-1]['employee_id'] if has_more else None
+            }
+            if total is not None:
+                paging['total'] = total
             return {
                 'success': True,
-                'data': employees or [],
-                'message': f'获取到{len(employees) if employees else 0}名员工'
+                'data': rows,
+                'paging': paging,
+                'message': f'获取到{len(rows)}名员工'
             }
+        except (TypeError, ValueError):
+            return {'success': False, 'message': '筛选参数无效'}
         except Exception as e:
             return {
                 'success': False,
@@ -286,39 +368,10 @@ class Employee:
         return result is not None and result > 0
 
     def get_employee_statistics(self) -> dict:
+        """员工统计：由统计引擎一次扫描员工表得到总数、在职、离职和各部门在职人数"""
         try:
-            total = 0
-            active = 0
-            terminated = 0
-
-            total_res = self.db.execute_query("SELECT COUNT(*) as total FROM employees")
-            if total_res: total = total_res[0]['total']
-
-            active_res = self.db.execute_query("SELECT COUNT(*) as active FROM employees WHERE status = '在职'")
-            if active_res: active = active_res[0]['active']
-
-            term_res = self.db.execute_query("SELECT COUNT(*) as terminated FROM employees WHERE status = '离职'")
-            if term_res: terminated = term_res[0]['terminated']
-
-            active_rate = f"{(active / total * 100):.0f}%" if total > 0 else '0%'
-
-            dept_sql = '''
-                    SELECT d.department_name, COUNT(e.employee_id) as count
-                    FROM departments d
-                        LEFT JOIN employees e 
-                    ON d.department_id = e.department_id AND e.status = '在职'
-                    GROUP BY d.department_id
-                    ORDER BY count DESC
-                    '''
-            by_dept = self.db.execute_query(dept_sql)
-
-            return {
-                'total': total,
-                'active': active,
-                'terminated': terminated,
-                'active_rate': active_rate,
-                'by_department': by_dept or []
-            }
+            data = self.stats.compute(self.stats.employees)
+            return dict(data, active_rate=f"{data['active_rate']:.0f}%")
         except Exception as e:
             print(f"统计失败: {e}")
             return {'total': 0, 'active': 0, 'terminated': 0, 'active_rate': '0%', 'by_department': []}
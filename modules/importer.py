@@ -0,0 +1,701 @@
+import csv
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from modules.dedup import BloomFilter, CustomerDedup, normalize_id_card, normalize_phone
+
+
+def _text(row: dict, field: str) -> str:
+    """取字段的文本值，缺失和空值统一为空字符串"""
+    value = row.get(field)
+    return '' if value is None else str(value).strip()
+
+
+def _number(row: dict, field: str, cast, default):
+    """取数值字段，空值返回默认值，无法转换时抛出 ValueError"""
+    text = _text(row, field)
+    if text == '':
+        return default
+    try:
+        return cast(float(text))
+    except ValueError:
+        raise ValueError(f'{field} 不是有效数字: {text}')
+
+
+def _date(db, row: dict, field: str, label: str) -> Optional[str]:
+    """取日期字段并归一化为 YYYY-MM-DD，空值返回 None"""
+    text = _text(row, field)
+    if text == '':
+        return None
+    normalized = db.normalize_date_text(text)
+    if normalized is None:
+        raise ValueError(f'{label}格式无效: {text}')
+    return normalized[:10]
+
+
+def _placeholders(values) -> str:
+    return ', '.join('?' * len(values))
+
+
+class _Loader(ABC):
+    """
+    单个实体的导入器：逐块校验、去重并写入
+    校验规则与对应模块的新增方法一致；跨块的去重状态（文件内已出现的唯一键、已分配的编号）保存在实例上
+    """
+
+    # 写入语句，参数顺序与 params() 一致
+    UPSERT_SQL = ''
+
+    def __init__(self, db, update_existing: bool):
+        self.db = db
+        self.update_existing = update_existing
+
+    @abstractmethod
+    def validate(self, row: dict) -> Dict[str, Any]:
+        """校验并转换一行，失败时抛出 ValueError"""
+
+    @abstractmethod
+    def resolve(self, records: List[Tuple[int, dict]]):
+        """
+        按唯一键与文件内先前的行、数据库中已有的记录去重
+        返回 ([(行号, 记录, 是否已存在)], [(行号, 错误信息)])
+        """
+
+    @abstractmethod
+    def params(self, record: dict) -> tuple:
+        """记录转换为 UPSERT_SQL 的参数"""
+
+    def load(self, chunk: List[Tuple[int, Optional[dict]]]) -> Dict[str, Any]:
+        """处理一块数据，整块在一个事务内写入"""
+        records, errors = [], []
+        for line, row in chunk:
+            if row is None:
+                errors.append((line, '不是有效的 JSON 对象'))
+                continue
+            try:
+                records.append((line, self.validate(row)))
+            except ValueError as e:
+                errors.append((line, str(e)))
+
+        resolved, resolve_errors = self.resolve(records) if records else ([], [])
+        errors.extend(resolve_errors)
+
+        skipped = 0
+        writes = []
+        for line, record, exists in resolved:
+            if exists and not self.update_existing:
+                skipped += 1
+                continue
+            writes.append((record, exists))
+
+        if writes:
+            self.db.execute_many(self.UPSERT_SQL, [self.params(record) for record, _ in writes])
+
+        updated = sum(1 for _, exists in writes if exists)
+        errors.sort()
+        return {
+            'inserted': len(writes) - updated,
+            'updated': updated,
+            'skipped': skipped,
+            'errors': errors
+        }
+
+
+class _CustomerLoader(_Loader):
+    """
+    客户：姓名、手机号、身份证号必填，手机号或身份证号相同视为同一客户（手机号、身份证号归一化后入库）
+    已查询数据库的行数达到客户表行数后建立布隆过滤器（建立成本与表大小成正比，先查后建最多多花一倍），
+    之后布隆过滤器判定一定不存在的行不再查询数据库（过滤器建立后由其他途径新增的客户不在其中）
+    """
+
+    UPSERT_SQL = """
+        INSERT INTO customers (id, name, phone, id_card, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            phone = excluded.phone,
+            id_card = excluded.id_card
+    """
+
+    def __init__(self, db, update_existing: bool):
+        super().__init__(db, update_existing)
+        self.seen_ids = set()
+        self.seen_phones = set()
+        self.seen_id_cards = set()
+        self.dedup = CustomerDedup(db)
+        self.bloom: Optional[BloomFilter] = None
+        self.table_rows = db.execute_query("SELECT COUNT(*) as count FROM customers")[0]['count']
+        self.looked_up = 0
+
+    def validate(self, row: dict) -> Dict[str, Any]:
+        record = {
+            'name': _text(row, 'name'),
+            'phone': normalize_phone(_text(row, 'phone')),
+            'id_card': normalize_id_card(_text(row, 'id_card'))
+        }
+        if not record['name']:
+            raise ValueError('姓名不能为空')
+        if not record['phone']:
+            raise ValueError('手机号不能为空')
+        if not record['id_card']:
+            raise ValueError('身份证不能为空')
+        record['id'] = _number(row, 'id', int, None)
+        created_at = _text(row, 'created_at')
+        record['created_at'] = (self.db.normalize_date_text(created_at) if created_at
+                                else datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        if record['created_at'] is None:
+            raise ValueError(f'创建时间格式无效: {created_at}')
+        return record
+
+    def _candidates(self, records) -> list:
+        """可能已存在于数据库的行：尚未建立布隆过滤器时为全部行"""
+        if self.bloom is None and self.looked_up >= self.table_rows:
+            self.bloom = self.dedup.build_bloom_filter(extra_capacity=max(self.table_rows, self.looked_up))
+        if self.bloom is None:
+            return records
+        maybe_phone = self.bloom.contains_many([f"phone:{record['phone']}" for _, record in records])
+        maybe_id_card = self.bloom.contains_many([f"id_card:{record['id_card']}" for _, record in records])
+        return [item for item, phone, id_card in zip(records, maybe_phone, maybe_id_card) if phone or id_card]
+
+    def resolve(self, records):
+        candidates = self._candidates(records)
+        self.looked_up += len(candidates)
+        phones = list({record['phone'] for _, record in candidates})
+        id_cards = list({record['id_card'] for _, record in candidates})
+        ids = list({record['id'] for _, record in records if record['id'] is not None})
+
+        by_phone, by_id_card = {}, {}
+        if candidates:
+            for row in self.db.execute_query(
+                f"SELECT id, phone, id_card FROM customers WHERE phone IN ({_placeholders(phones)}) "
+                f"OR id_card IN ({_placeholders(id_cards)})", tuple(phones + id_cards)
+            ) or []:
+                by_phone.setdefault(row['phone'], row['id'])
+                by_id_card.setdefault(row['id_card'], row['id'])
+        existing_ids = set()
+        if ids:
+            existing_ids = {row['id'] for row in self.db.execute_query(
+                f"SELECT id FROM customers WHERE id IN ({_placeholders(ids)})", tuple(ids)
+            ) or []}
+
+        resolved, errors = [], []
+        for line, record in records:
+            if (record['phone'] in self.seen_phones or record['id_card'] in self.seen_id_cards
+                    or record['id'] in self.seen_ids):
+                errors.append((line, '与文件中前面的客户重复（ID、手机号或身份证）'))
+                continue
+
+            matches = {by_phone.get(record['phone']), by_id_card.get(record['id_card'])} - {None}
+            if record['id'] is not None:
+                if matches - {record['id']}:
+                    errors.append((line, '手机号或身份证已被其他客户使用'))
+                    continue
+                exists = record['id'] in existing_ids
+            elif len(matches) > 1:
+                errors.append((line, '手机号与身份证分别属于不同的已有客户'))
+                continue
+            elif matches:
+                record['id'] = matches.pop()
+                exists = True
+            else:
+                exists = False
+
+            self.seen_phones.add(record['phone'])
+            self.seen_id_cards.add(record['id_card'])
+            if record['id'] is not None:
+                self.seen_ids.add(record['id'])
+            resolved.append((line, record, exists))
+
+        if self.bloom is not None:
+            # 本次导入的客户也加入过滤器；超出容量后误判率上升，丢弃并在之后按新的表大小重建
+            self.bloom.add_many([f"phone:{record['phone']}" for _, record, _ in resolved]
+                                + [f"id_card:{record['id_card']}" for _, record, _ in resolved])
+            if self.bloom.count > self.bloom.capacity:
+                self.bloom = None
+                self.table_rows = self.db.execute_query("SELECT COUNT(*) as count FROM customers")[0]['count']
+                self.looked_up = 0
+        return resolved, errors
+
+    def params(self, record):
+        return (record['id'], record['name'], record['phone'], record['id_card'], record['created_at'])
+
+
+class _RoomLoader(_Loader):
+    """房间：房间号、房型必填，按房间号更新；新房间状态为空闲，已有房间保留当前状态"""
+
+    UPSERT_SQL = """
+        INSERT INTO rooms (room_number, room_type, has_window, has_breakfast, capacity, area, price, description, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, '空闲')
+        ON CONFLICT(room_number) DO UPDATE SET
+            room_type = excluded.room_type,
+            has_window = excluded.has_window,
+            has_breakfast = COALESCE(excluded.has_breakfast, rooms.has_breakfast),
+            capacity = excluded.capacity,
+            area = excluded.area,
+            price = excluded.price,
+            description = excluded.description
+    """
+
+    def __init__(self, db, update_existing: bool):
+        super().__init__(db, update_existing)
+        self.seen = set()
+
+    def validate(self, row: dict) -> Dict[str, Any]:
+        record = {'room_number': _text(row, 'room_number'), 'room_type': _text(row, 'room_type')}
+        if not record['room_number'] or not record['room_type']:
+            raise ValueError('房间号和房型是必填项')
+        record['has_window'] = _number(row, 'has_window', int, 0)
+        record['has_breakfast'] = _number(row, 'has_breakfast', int, None)
+        record['capacity'] = _number(row, 'capacity', int, 1)
+        record['area'] = _number(row, 'area', int, 23)
+        record['price'] = _number(row, 'price', float, 0.0)
+        record['description'] = _text(row, 'description')
+        return record
+
+    def resolve(self, records):
+        numbers = list({record['room_number'] for _, record in records})
+        existing = {row['room_number'] for row in self.db.execute_query(
+            f"SELECT room_number FROM rooms WHERE room_number IN ({_placeholders(numbers)})", tuple(numbers)
+        ) or []}
+
+        resolved, errors = [], []
+        for line, record in records:
+            if record['room_number'] in self.seen:
+                errors.append((line, f'房间号 {record["room_number"]} 与文件中前面的行重复'))
+                continue
+            self.seen.add(record['room_number'])
+            resolved.append((line, record, record['room_number'] in existing))
+        return resolved, errors
+
+    def params(self, record):
+        return (record['room_number'], record['room_type'], record['has_window'], record['has_breakfast'],
+                record['capacity'], record['area'], record['price'], record['description'])
+
+
+class _EmployeeLoader(_Loader):
+    """
+    员工：姓名、性别必填，用户名唯一
+    未提供工号时按入职年份 + 三位序号分配，与 Employee.create_employee 相同
+    """
+
+    UPSERT_SQL = """
+        INSERT INTO employees (employee_id, employee_name, gender, phone, email, department_id,
+                               position_name, hire_date, status, salary, username, password_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(employee_id) DO UPDATE SET
+            employee_name = excluded.employee_name,
+            gender = excluded.gender,
+            phone = COALESCE(excluded.phone, employees.phone),
+            email = COALESCE(excluded.email, employees.email),
+            department_id = COALESCE(excluded.department_id, employees.department_id),
+            position_name = COALESCE(excluded.position_name, employees.position_name),
+            hire_date = COALESCE(excluded.hire_date, employees.hire_date),
+            status = COALESCE(excluded.status, employees.status),
+            salary = COALESCE(excluded.salary, employees.salary),
+            username = COALESCE(excluded.username, employees.username),
+            password_hash = COALESCE(excluded.password_hash, employees.password_hash)
+    """
+    OPTIONAL_FIELDS = ('phone', 'email', 'department_id', 'position_name', 'username')
+
+    def __init__(self, db, update_existing: bool):
+        super().__init__(db, update_existing)
+        self.seen_ids = set()
+        self.seen_usernames = set()
+        # 年份 -> 已分配的最大序号
+        self.serials: Dict[str, int] = {}
+
+    def validate(self, row: dict) -> Dict[str, Any]:
+        record = {'employee_name': _text(row, 'employee_name'), 'gender': _text(row, 'gender')}
+        if not record['employee_name'] or not record['gender']:
+            raise ValueError('姓名和性别是必填项')
+        if record['gender'] not in ('男', '女'):
+            raise ValueError('性别必须是"男"或"女"')
+
+        record['employee_id'] = _text(row, 'employee_id') or None
+        for field in self.OPTIONAL_FIELDS:
+            record[field] = _text(row, field) or None
+
+        try:
+            record['salary'] = _number(row, 'salary', float, None)
+        except ValueError:
+            record['salary'] = 0.00
+
+        password = _text(row, 'password')
+        record['password_hash'] = (hashlib.sha256(password.encode()).hexdigest()
+                                   if record['username'] and password else None)
+
+        # 入职日期与状态留空时，新员工取默认值，已有员工保持不变（见 resolve）
+        record['hire_date'] = _date(self.db, row, 'hire_date', '入职日期')
+        record['status'] = _text(row, 'status') or None
+        if record['status'] not in (None, '在职', '离职'):
+            raise ValueError('状态必须是"在职"或"离职"')
+        return record
+
+    def _next_id(self, year: str) -> str:
+        if year not in self.serials:
+            result = self.db.execute_query(
+                "SELECT MAX(employee_id) as max_id FROM employees WHERE employee_id LIKE ?", (f"{year}%",)
+            )
+            max_id = result[0]['max_id'] if result else None
+            self.serials[year] = int(max_id[-3:]) if max_id else 0
+        while True:
+            self.serials[year] += 1
+            employee_id = f"{year}{str(self.serials[year]).zfill(3)}"
+            if employee_id not in self.seen_ids:
+                return employee_id
+
+    def resolve(self, records):
+        ids = list({record['employee_id'] for _, record in records if record['employee_id']})
+        usernames = list({record['username'] for _, record in records if record['username']})
+        existing_ids = set()
+        if ids:
+            existing_ids = {row['employee_id'] for row in self.db.execute_query(
+                f"SELECT employee_id FROM employees WHERE employee_id IN ({_placeholders(ids)})", tuple(ids)
+            ) or []}
+        username_owners = {}
+        if usernames:
+            username_owners = {row['username']: row['employee_id'] for row in self.db.execute_query(
+                f"SELECT employee_id, username FROM employees WHERE username IN ({_placeholders(usernames)})",
+                tuple(usernames)
+            ) or []}
+
+        resolved, errors = [], []
+        for line, record in records:
+            employee_id, username = record['employee_id'], record['username']
+            if employee_id and employee_id in self.seen_ids:
+                errors.append((line, f'工号 {employee_id} 与文件中前面的行重复'))
+                continue
+            if username and (username in self.seen_usernames
+                             or username_owners.get(username, employee_id) != employee_id):
+                errors.append((line, '用户名已存在'))
+                continue
+
+            exists = employee_id in existing_ids
+            if not exists:
+                record['hire_date'] = record['hire_date'] or datetime.now().strftime('%Y-%m-%d')
+                record['status'] = record['status'] or '在职'
+            if not employee_id:
+                record['employee_id'] = self._next_id(record['hire_date'][:4])
+            self.seen_ids.add(record['employee_id'])
+            if username:
+                self.seen_usernames.add(username)
+            resolved.append((line, record, exists))
+        return resolved, errors
+
+    def params(self, record):
+        return (record['employee_id'], record['employee_name'], record['gender'], record['phone'],
+                record['email'], record['department_id'], record['position_name'], record['hire_date'],
+                record['status'], record['salary'], record['username'], record['password_hash'])
+
+
+class _OrderLoader(_Loader):
+    """
+    订单：客户、房间、入住和退房日期必填，客户与房间必须存在
+    未取消、未完成的订单不能与同一房间的其他有效订单重叠（与 Orders.check_room_availability 相同）；
+    导入的是既有订单，不要求房间当前空闲，也不修改房间状态
+    """
+
+    UPSERT_SQL = """
+        INSERT INTO orders (order_id, customer_id, room_number, employee_id, check_in_date, check_out_date,
+                            days, order_status, payment_status, total_amount, paid_amount, special_requests,
+                            created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, datetime('now')), datetime('now'))
+        ON CONFLICT(order_id) DO UPDATE SET
+            customer_id = excluded.customer_id,
+            room_number = excluded.room_number,
+            employee_id = excluded.employee_id,
+            check_in_date = excluded.check_in_date,
+            check_out_date = excluded.check_out_date,
+            days = excluded.days,
+            order_status = excluded.order_status,
+            payment_status = excluded.payment_status,
+            total_amount = excluded.total_amount,
+            paid_amount = excluded.paid_amount,
+            special_requests = excluded.special_requests,
+            updated_at = datetime('now')
+    """
+    REQUIRED_FIELDS = ('customer_id', 'room_number', 'check_in_date', 'check_out_date')
+    ORDER_STATUSES = ('预定中', '已入住', '已完成', '已取消', '异常')
+    PAYMENT_STATUSES = ('未支付', '已支付', '已退款')
+    # 不占用房间的订单状态
+    RELEASED_STATUSES = ('已取消', '已完成')
+
+    def __init__(self, db, update_existing: bool):
+        super().__init__(db, update_existing)
+        self.seen_ids = set()
+        # 日期前缀 -> 已分配的最大序号
+        self.serials: Dict[str, int] = {}
+        # 房间 -> 文件中已接受的占用区间 [(入住日序号, 退房日序号, 订单号)]
+        self.booked: Dict[str, list] = {}
+
+    def validate(self, row: dict) -> Dict[str, Any]:
+        for field in self.REQUIRED_FIELDS:
+            if not _text(row, field):
+                raise ValueError(f'缺少必要字段: {field}')
+
+        record = {
+            'order_id': _text(row, 'order_id') or None,
+            'customer_id': _number(row, 'customer_id', int, None),
+            'room_number': _text(row, 'room_number'),
+            'employee_id': _text(row, 'employee_id') or None,
+            'check_in_date': _date(self.db, row, 'check_in_date', '入住日期'),
+            'check_out_date': _date(self.db, row, 'check_out_date', '退房日期'),
+            'order_status': _text(row, 'order_status') or '预定中',
+            'payment_status': _text(row, 'payment_status') or '未支付',
+            'total_amount': _number(row, 'total_amount', float, 0.0),
+            'paid_amount': _number(row, 'paid_amount', float, 0.0),
+            'special_requests': _text(row, 'special_requests'),
+        }
+        if record['order_status'] not in self.ORDER_STATUSES:
+            raise ValueError(f'无效的订单状态: {record["order_status"]}')
+        if record['payment_status'] not in self.PAYMENT_STATUSES:
+            raise ValueError(f'无效的支付状态: {record["payment_status"]}')
+
+        created_at = _text(row, 'created_at')
+        record['created_at'] = self.db.normalize_date_text(created_at) if created_at else None
+        if created_at and record['created_at'] is None:
+            raise ValueError(f'创建时间格式无效: {created_at}')
+
+        record['check_in_day'] = self.db.day_number(record['check_in_date'])
+        record['check_out_day'] = self.db.day_number(record['check_out_date'])
+        days = record['check_out_day'] - record['check_in_day']
+        record['days'] = days if days > 0 else 1
+        return record
+
+    def _next_id(self, record: dict) -> str:
+        """按订单创建日期生成订单号（YYMMDD + 三位序号），与 Orders.generate_order_id 规则相同"""
+        created = record['created_at'] or datetime.now().strftime('%Y-%m-%d')
+        prefix = datetime.strptime(created[:10], '%Y-%m-%d').strftime('%y%m%d')
+        if prefix not in self.serials:
+            result = self.db.execute_query(
+                "SELECT MAX(order_id) as max_id FROM orders WHERE order_id LIKE ?", (f"{prefix}%",)
+            )
+            max_id = result[0]['max_id'] if result else None
+            try:
+                self.serials[prefix] = int(max_id[-3:]) if max_id else 0
+            except ValueError:
+                self.serials[prefix] = 0
+        while True:
+            self.serials[prefix] += 1
+            if self.serials[prefix] > 999:
+                raise ValueError(f'{created[:10]} 的订单号已用尽，请在文件中提供 order_id')
+            order_id = f"{prefix}{str(self.serials[prefix]).zfill(3)}"
+            if order_id not in self.seen_ids:
+                return order_id
+
+    def _conflict(self, record: dict, db_bookings: Dict[str, list]) -> Optional[str]:
+        """返回与该订单重叠的有效订单号，没有冲突时返回 None"""
+        start, end = record['check_in_day'], record['check_out_day']
+        for booked_start, booked_end, order_id in (db_bookings.get(record['room_number'], [])
+                                                   + self.booked.get(record['room_number'], [])):
+            if order_id != record['order_id'] and booked_start < end and booked_end > start:
+                return order_id
+        return None
+
+    def resolve(self, records):
+        customer_ids = list({record['customer_id'] for _, record in records})
+        room_numbers = list({record['room_number'] for _, record in records})
+        order_ids = list({record['order_id'] for _, record in records if record['order_id']})
+
+        customers = {row['id'] for row in self.db.execute_query(
+            f"SELECT id FROM customers WHERE id IN ({_placeholders(customer_ids)})", tuple(customer_ids)
+        ) or []}
+        prices = {row['room_number']: float(row['price'] or 0) for row in self.db.execute_query(
+            f"SELECT room_number, price FROM rooms WHERE room_number IN ({_placeholders(room_numbers)})",
+            tuple(room_numbers)
+        ) or []}
+        existing_ids = set()
+        if order_ids:
+            existing_ids = {row['order_id'] for row in self.db.execute_query(
+                f"SELECT order_id FROM orders WHERE order_id IN ({_placeholders(order_ids)})", tuple(order_ids)
+            ) or []}
+
+        # 一次查出本块涉及房间在日期跨度内的有效订单，逐行在内存中判断重叠
+        active = [record for _, record in records if record['order_status'] not in self.RELEASED_STATUSES]
+        db_bookings: Dict[str, list] = {}
+        if active:
+            rooms = list({record['room_number'] for record in active})
+            for row in self.db.execute_query(f"""
+                SELECT order_id, room_number, check_in_day, check_out_day
+                FROM orders
+                WHERE room_number IN ({_placeholders(rooms)})
+                AND order_status NOT IN ('已取消', '已完成')
+                AND check_out_day > ?
+                AND check_in_day < ?
+            """, tuple(rooms) + (min(r['check_in_day'] for r in active),
+                                  max(r['check_out_day'] for r in active))) or []:
+                db_bookings.setdefault(row['room_number'], []).append(
+                    (row['check_in_day'], row['check_out_day'], row['order_id']))
+
+        resolved, errors = [], []
+        for line, record in records:
+            if record['order_id'] and record['order_id'] in self.seen_ids:
+                errors.append((line, f'订单号 {record["order_id"]} 与文件中前面的行重复'))
+                continue
+            if record['customer_id'] not in customers:
+                errors.append((line, f'客户 {record["customer_id"]} 不存在'))
+                continue
+            if record['room_number'] not in prices:
+                errors.append((line, f'房间 {record["room_number"]} 不存在'))
+                continue
+
+            blocking = record['order_status'] not in self.RELEASED_STATUSES
+            if blocking:
+                conflict = self._conflict(record, db_bookings)
+                if conflict:
+                    errors.append((line, f'房间 {record["room_number"]} 在 {record["check_in_date"]} 至 '
+                                         f'{record["check_out_date"]} 已被订单 {conflict} 占用'))
+                    continue
+
+            exists = record['order_id'] in existing_ids
+            if not record['order_id']:
+                try:
+                    record['order_id'] = self._next_id(record)
+                except ValueError as e:
+                    errors.append((line, str(e)))
+                    continue
+
+            # 未填写金额时按房价 × 天数计算
+            price = prices[record['room_number']]
+            if record['total_amount'] <= 0 and price > 0:
+                record['total_amount'] = price * record['days']
+
+            self.seen_ids.add(record['order_id'])
+            if blocking:
+                self.booked.setdefault(record['room_number'], []).append(
+                    (record['check_in_day'], record['check_out_day'], record['order_id']))
+            resolved.append((line, record, exists))
+        return resolved, errors
+
+    def params(self, record):
+        return (record['order_id'], record['customer_id'], record['room_number'], record['employee_id'],
+                record['check_in_date'], record['check_out_date'], record['days'], record['order_status'],
+                record['payment_status'], record['total_amount'], record['paid_amount'],
+                record['special_requests'], record['created_at'])
+
+
+class Importer:
+    """
+    批量导入：流式读取 CSV 或 NDJSON，按块校验、去重，再用 executemany 按唯一键插入或更新
+    每处理完一块产出一次进度事件，调用方（命令行或上传接口）边处理边把事件返回给用户
+    """
+
+    LOADERS = {
+        'customers': _CustomerLoader,
+        'rooms': _RoomLoader,
+        'employees': _EmployeeLoader,
+        'orders': _OrderLoader,
+    }
+    FORMATS = ('csv', 'ndjson')
+    CHUNK_SIZE = 1000
+    MAX_CHUNK_SIZE = 5000
+    # 最多逐条返回的错误数，超出部分只计数
+    MAX_REPORTED_ERRORS = 1000
+
+    def __init__(self, db):
+        self.db = db
+
+    @classmethod
+    def detect_format(cls, filename: str = '', fmt: str = None) -> Optional[str]:
+        """根据显式指定的格式或文件扩展名判断格式"""
+        fmt = (fmt or '').strip().lower()
+        if not fmt:
+            extension = (filename or '').rsplit('.', 1)[-1].lower()
+            fmt = 'ndjson' if extension in ('ndjson', 'jsonl', 'json') else extension
+        if fmt == 'jsonl':
+            fmt = 'ndjson'
+        return fmt if fmt in cls.FORMATS else None
+
+    @staticmethod
+    def read_rows(stream, fmt: str) -> Iterator[Tuple[int, Optional[dict]]]:
+        """逐行产出 (行号, 字段字典)；NDJSON 中无法解析的行产出 None"""
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_no, row if isinstance(row, dict) else None
+
+    def run(self, entity: str, stream, fmt: str = 'csv', chunk_size: int = None,
+            update_existing: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        执行导入，产出事件字典
+
+        Args:
+            entity: customers / rooms / employees / orders
+            stream: 文本流（CSV 需以 newline='' 打开）
+            fmt: csv / ndjson
+            chunk_size: 每块行数，默认 1000，最多 5000
+            update_existing: 唯一键已存在时更新（默认）还是跳过
+
+        事件：
+            {'event': 'error', 'line': 行号, 'message': 错误信息}
+            {'event': 'progress', 'processed', 'inserted', 'updated', 'skipped', 'failed'}
+            {'event': 'done', 'success', 'message', ...同 progress 的计数, 'elapsed'}
+        """
+        loader_class = self.LOADERS.get(entity)
+        if loader_class is None:
+            yield {'event': 'done', 'success': False, 'message': f'不支持的导入类型: {entity}'}
+            return
+        if fmt not in self.FORMATS:
+            yield {'event': 'done', 'success': False, 'message': f'不支持的文件格式: {fmt}'}
+            return
+
+        chunk_size = max(1, min(int(chunk_size or self.CHUNK_SIZE), self.MAX_CHUNK_SIZE))
+        loader = loader_class(self.db, update_existing)
+        totals = {'processed': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+        started = time.time()
+
+        def finish(success: bool, message: str) -> Dict[str, Any]:
+            return {'event': 'done', 'success': success, 'message': message, **totals,
+                    'elapsed': round(time.time() - started, 3)}
+
+        chunk = []
+        rows = self.read_rows(stream, fmt)
+        while True:
+            try:
+                for line, row in rows:
+                    chunk.append((line, row))
+                    if len(chunk) >= chunk_size:
+                        break
+            except (UnicodeDecodeError, csv.Error) as e:
+                yield finish(False, f'读取文件失败（已导入的块保留）: {e}')
+                return
+            if not chunk:
+                break
+
+            try:
+                result = loader.load(chunk)
+            except Exception as e:
+                # 当前块整体回滚，之前已提交的块保留
+                yield finish(False, f'第 {chunk[0][0]}-{chunk[-1][0]} 行写入失败（之前的块已导入）: {e}')
+                return
+
+            for line, message in result['errors']:
+                if totals['failed'] < self.MAX_REPORTED_ERRORS:
+                    yield {'event': 'error', 'line': line, 'message': message}
+                totals['failed'] += 1
+            totals['processed'] += len(chunk)
+            for key in ('inserted', 'updated', 'skipped'):
+                totals[key] += result[key]
+            yield {'event': 'progress', **totals}
+            chunk = []
+
+        message = (f"导入完成：新增 {totals['inserted']} 条，更新 {totals['updated']} 条，"
+                   f"跳过 {totals['skipped']} 条，失败 {totals['failed']} 条")
+        if totals['failed'] > self.MAX_REPORTED_ERRORS:
+            message += f"（仅列出前 {self.MAX_REPORTED_ERRORS} 条错误）"
+        yield finish(True, message)
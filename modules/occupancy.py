@@ -0,0 +1,160 @@
+from datetime import date
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+
+class Occupancy:
+    """
+    多日入住率计算引擎
+    一次性把有效订单加载为 NumPy 数组（房间下标、入住日、退房日），
+    再用差分数组对任意日期区间做向量化扫描
+    """
+
+    ACTIVE_STATUSES = ('预定中', '已入住')
+    MAX_RANGE_DAYS = 3 * 366
+
+    def __init__(self, db):
+        self.db = db
+
+    def _load_rooms(self) -> Tuple[Dict[str, int], np.ndarray, list]:
+        """加载房间目录，返回 (房号->下标, 房间->房型下标数组, 房型名称列表)"""
+        rows = self.db.execute_query(
+            "SELECT room_number, room_type FROM rooms ORDER BY room_number"
+        ) or []
+
+        type_names = []
+        type_index = {}
+        room_index = {}
+        room_types = np.empty(len(rows), dtype=np.int32)
+
+        for i, row in enumerate(rows):
+            room_type = row['room_type']
+            if room_type not in type_index:
+                type_index[room_type] = len(type_names)
+                type_names.append(room_type)
+            room_index[row['room_number']] = i
+            room_types[i] = type_index[room_type]
+
+        return room_index, room_types, type_names
+
+    def _load_bookings(self, room_index: Dict[str, int], first: int, last: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """加载与统计区间重叠的有效订单，返回 (房间下标, 入住日序号, 退房日序号) 三个数组"""
+        sql = """
+              SELECT room_number, check_in_day, check_out_day
+              FROM orders
+              WHERE check_in_day <= ?
+                AND check_out_day > ?
+                AND check_out_day > check_in_day
+                AND order_status IN (?, ?)
+              """
+        rows = self.db.execute_query(sql, (last, first) + self.ACTIVE_STATUSES) or []
+
+        rooms, starts, ends = [], [], []
+        for row in rows:
+            idx = room_index.get(row['room_number'])
+            if idx is None:
+                continue
+            rooms.append(idx)
+            starts.append(row['check_in_day'])
+            ends.append(row['check_out_day'])
+
+        return (np.asarray(rooms, dtype=np.int64),
+                np.asarray(starts, dtype=np.int64),
+                np.asarray(ends, dtype=np.int64))
+
+    @staticmethod
+    def _merge_intervals(rooms: np.ndarray, starts: np.ndarray, ends: np.ndarray, span: int):
+        """
+        合并同一房间内重叠的区间，保证按房间去重计数（等价于 COUNT DISTINCT room_number）
+        区间已裁剪到 [0, span)，按 (房间, 入住日) 排序后用分组累计最大值判断是否与前一段相连
+        """
+        order = np.lexsort((starts, rooms))
+        rooms, starts, ends = rooms[order], starts[order], ends[order]
+
+        # 房间下标作为高位，使累计最大值不会跨房间传递
+        offset = rooms * (span + 1)
+        running_end = np.maximum.accumulate(ends + offset) - offset
+
+        new_group = np.ones(len(rooms), dtype=bool)
+        new_group[1:] = (rooms[1:] != rooms[:-1]) | (starts[1:] > running_end[:-1])
+        group_ids = np.cumsum(new_group) - 1
+
+        group_rooms = rooms[new_group]
+        group_starts = starts[new_group]
+        group_ends = np.zeros(len(group_rooms), dtype=np.int64)
+        np.maximum.at(group_ends, group_ids, ends)
+        return group_rooms, group_starts, group_ends
+
+    def get_occupancy(self, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+        """
+        计算日期区间内每日的入住房间数、入住率以及按房型的分布
+
+        Args:
+            start_date: 开始日期 (YYYY-MM-DD)，默认今天
+            end_date: 结束日期 (YYYY-MM-DD，包含)，默认开始日期后第 29 天
+        """
+        try:
+            try:
+                first = self.db.day_number(start_date or date.today())
+                last = self.db.day_number(end_date) if end_date else first + 29
+            except ValueError:
+                return {'success': False, 'message': '日期格式应为 YYYY-MM-DD', 'data': {}}
+
+            if last < first:
+                return {'success': False, 'message': '结束日期不能早于开始日期', 'data': {}}
+            span = last - first + 1
+            if span > self.MAX_RANGE_DAYS:
+                return {'success': False, 'message': f'日期区间不能超过{self.MAX_RANGE_DAYS}天', 'data': {}}
+
+            room_index, room_types, type_names = self._load_rooms()
+            total = len(room_index)
+            rooms, starts, ends = self._load_bookings(room_index, first, last)
+
+            # 裁剪到统计区间，退房当天不计入住
+            starts = np.clip(starts - first, 0, span)
+            ends = np.clip(ends - first, 0, span)
+            keep = ends > starts
+            rooms, starts, ends = rooms[keep], starts[keep], ends[keep]
+
+            # 按房型的差分数组：入住日 +1，退房日 -1，沿日期累加得到每日在住房间数
+            diff = np.zeros((len(type_names), span + 1), dtype=np.int64)
+            if len(rooms):
+                rooms, starts, ends = self._merge_intervals(rooms, starts, ends, span)
+                types = room_types[rooms]
+                np.add.at(diff, (types, starts), 1)
+                np.add.at(diff, (types, ends), -1)
+            by_type = np.cumsum(diff, axis=1)[:, :span]
+
+            occupied = by_type.sum(axis=0)
+            rates = np.round(occupied / total * 100, 2) if total else np.zeros(span)
+            type_totals = np.bincount(room_types, minlength=len(type_names))
+
+            dates = [self.db.day_to_date(first + i) for i in range(span)]
+
+            return {
+                'success': True,
+                'data': {
+                    'start': dates[0],
+                    'end': dates[-1],
+                    'total': total,
+                    'dates': dates,
+                    'occupied': occupied.tolist(),
+                    'occupancy_rate': rates.tolist(),
+                    'by_type': [
+                        {
+                            'room_type': name,
+                            'total': int(type_totals[i]),
+                            'occupied': by_type[i].tolist()
+                        }
+                        for i, name in enumerate(type_names)
+                    ]
+                },
+                'message': f'入住率统计完成 ({dates[0]} 至 {dates[-1]})'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'入住率统计失败: {str(e)}',
+                'data': {}
+            }
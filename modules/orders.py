@@ -1,8 +1,37 @@
 from datetime import datetime
 
+from modules.stats import StatsEngine
+
 class Orders:
-    def __init__(self, db):
+    # 需要归一化的日期字段及其名称
+    DATE_FIELDS = {'check_in_date': '入住日期', 'check_out_date': '退房日期'}
+
+    def __init__(self, db, rooms=None, stats: StatsEngine = None):
         self.db = db
+        self.stats = stats or StatsEngine(db)
+        # 房间查询优先读 Rooms 的内存目录快照，未提供时查询数据库
+        self.rooms = rooms
+
+    def _get_room(self, room_number):
+        if self.rooms is not None:
+            return self.rooms.get_room(room_number)
+        result = self.db.execute_query("SELECT * FROM rooms WHERE room_number = ?", (room_number,))
+        return result[0] if result else None
+
+    def _normalize_order_dates(self, data: dict):
+        """
+        把入住/退房日期统一为 YYYY-MM-DD，与 check_in_day/check_out_day 生成列的解析方式一致
+        返回 (归一化后的数据副本, 错误信息)，无法解析的日期返回错误
+        """
+        data = dict(data)
+        for field, label in self.DATE_FIELDS.items():
+            if data.get(field) is None:
+                continue
+            normalized = self.db.normalize_date_text(data[field])
+            if normalized is None:
+                return data, f'{label}格式无效: {data[field]}'
+            data[field] = normalized[:10]
+        return data, None
 
     def generate_order_id(self):
         date_part = datetime.now().strftime('%y%m%d')
@@ -38,8 +67,11 @@ class Orders:
             # 2. 提取数据
             customer_id = input_data.get('customer_id')
             room_number = input_data.get('room_number')
-            check_in_date = input_data.get('check_in_date')
-            check_out_date = input_data.get('check_out_date')
+            dates, error = self._normalize_order_dates(input_data)
+            if error:
+                return {'success': False, 'message': error}
+            check_in_date = dates['check_in_date']
+            check_out_date = dates['check_out_date']
             employee_id = input_data.get('employee_id')
             order_status = input_data.get('order_status', '预定中')
             payment_status = input_data.get('payment_status', '未支付')
@@ -48,7 +80,6 @@ class Orders:
             special_requests = input_data.get('special_requests', '')
             
             # 3. 计算入住天数
-            from datetime import datetime
             try:
                 check_in = datetime.strptime(check_in_date, '%Y-%m-%d')
                 check_out = datetime.strptime(check_out_date, '%Y-%m-%d')
@@ -59,13 +90,11 @@ class Orders:
                 days = 1
             
             # 4. 检查房间
-            room_sql = "SELECT room_number, room_type, status, price FROM rooms WHERE room_number = ?"
-            room_result = self.db.execute_query(room_sql, (room_number,))
-            
-            if not room_result:
+            room_data = self._get_room(room_number)
+
+            if not room_data:
                 return {'success': False, 'message': f'房间 {room_number} 不存在'}
-            
-            room_data = room_result[0]
+
             room_status = room_data.get('status', '未知')
             room_price = float(room_data.get('price', 0) or 0)
             
@@ -149,6 +178,13 @@ class Orders:
                         'message': f'订单状态必须是: {", ".join(valid_statuses)}'
                     }
 
+            update_data, error = self._normalize_order_dates(update_data)
+            if error:
+                return {
+                    'success': False,
+                    'message': error
+                }
+
             if self._db_update_order(order_id, update_data):
                 return {
                     'success': True,
@@ -259,10 +295,10 @@ class Orders:
                        LEFT JOIN customers c ON o.customer_id = c.id
                        LEFT JOIN rooms r ON o.room_number = r.room_number
                        LEFT JOIN employees e ON o.employee_id = e.employee_id
-              WHERE DATE (o.created_at) = DATE (?)
+              WHERE o.created_day = ?
               ORDER BY o.created_at DESC
               '''
-        orders = self.db.execute_query(sql, (date,))
+        orders = self.db.execute_query(sql, (self.db.day_number(date),))
         return {
             'success': True,
             'data': orders or [],
@@ -287,7 +323,7 @@ class Orders:
                        LEFT JOIN rooms r ON o.room_number = r.room_number
                        LEFT JOIN employees e ON o.employee_id = e.employee_id
               WHERE o.customer_id = ?
-              ORDER BY o.check_in_date DESC
+              ORDER BY o.check_in_day DESC
               '''
         orders = self.db.execute_query(sql, (customer_id,))
         return {
@@ -312,11 +348,11 @@ class Orders:
         where_clause = "WHERE o.room_number = ?"
 
         if start_date:
-            where_clause += " AND o.check_in_date >= ?"
-            params.append(start_date)
+            where_clause += " AND o.check_in_day >= ?"
+            params.append(self.db.day_number(start_date))
         if end_date:
-            where_clause += " AND o.check_out_date <= ?"
-            params.append(end_date)
+            where_clause += " AND o.check_out_day <= ?"
+            params.append(self.db.day_number(end_date))
 
         sql = f'''
             SELECT o.*, 
@@ -326,7 +362,7 @@ class Orders:
             LEFT JOIN customers c ON o.customer_id = c.id
             LEFT JOIN employees e ON o.employee_id = e.employee_id
             {where_clause}
-            ORDER BY o.check_in_date DESC
+            ORDER BY o.check_in_day DESC
         '''
         orders = self.db.execute_query(sql, tuple(params))
         return {
@@ -355,7 +391,7 @@ class Orders:
                        LEFT JOIN rooms r ON o.room_number = r.room_number
                        LEFT JOIN employees e ON o.employee_id = e.employee_id
               WHERE o.order_status = ?
-              ORDER BY o.check_in_date
+              ORDER BY o.check_in_day
               '''
         orders = self.db.execute_query(sql, (status,))
         return {
@@ -367,58 +403,13 @@ class Orders:
     def get_order_statistics(self) -> dict:
         """
         获取订单统计信息
+        由统计引擎一次扫描订单表得到状态/支付状态分布，今日统计与近 7 天趋势走 created_day 索引
 
         Returns:
             dict: 包含订单统计数据的字典
         """
-        total_res = self.db.execute_query("SELECT COUNT(*) as total FROM orders")
-        total = total_res[0]['total'] if total_res else 0
-
-        status_sql = '''
-                     SELECT order_status, COUNT(*) as count
-                     FROM orders
-                     GROUP BY order_status
-                     '''
-        by_status = self.db.execute_query(status_sql) or []
-
-        payment_sql = '''
-                      SELECT payment_status, COUNT(*) as count
-                      FROM orders
-                      GROUP BY payment_status
-                      '''
-        by_payment = self.db.execute_query(payment_sql) or []
-
         today = datetime.now().strftime('%Y-%m-%d')
-        today_sql = '''
-                    SELECT COUNT(*)                                                 as today_total, \
-                           SUM(CASE WHEN order_status = '预定中' THEN 1 ELSE 0 END) as today_reserved, \
-                           SUM(CASE WHEN order_status = '已入住' THEN 1 ELSE 0 END) as today_checked_in, \
-                           SUM(CASE WHEN order_status = '已完成' THEN 1 ELSE 0 END) as today_completed, \
-                           SUM(total_amount)                                        as today_total_amount, \
-                           SUM(paid_amount)                                         as today_paid_amount
-                    FROM orders
-                    WHERE DATE (created_at) = DATE (?)
-                    '''
-        today_stats_result = self.db.execute_query(today_sql, (today,))
-        today_stats = today_stats_result[0] if today_stats_result else {}
-
-        trend_sql = '''
-                    SELECT
-                        DATE (created_at) as date, COUNT (*) as count, SUM (total_amount) as total_amount
-                    FROM orders
-                    WHERE created_at >= DATE ('now', '-7 days')
-                    GROUP BY DATE (created_at)
-                    ORDER BY date
-                    '''
-        trend_data = self.db.execute_query(trend_sql) or []
-
-        return {
-            'total': total,
-            'by_status': by_status,
-            'by_payment': by_payment,
-            'today_stats': today_stats,
-            'trend_data': trend_data
-        }
+        return self.stats.compute(self.stats.orders, today)['order_stats']
 
     def check_room_availability(
         self,
@@ -430,17 +421,16 @@ class Orders:
    
         try:
             # 1. 检查房间是否存在
-            room_sql = "SELECT status FROM rooms WHERE room_number = ?"
-            room_result = self.db.execute_query(room_sql, (room_number,))
+            room = self._get_room(room_number)
 
-            if not room_result:
+            if not room:
                 return {
                     'success': False,
                     'message': '房间不存在',
                     'available': False
                 }
 
-            room_status = room_result[0]['status'] if isinstance(room_result[0], dict) else room_result[0][0]
+            room_status = room['status']
             if room_status != '空闲':
                 return {
                     'success': True,
@@ -453,7 +443,7 @@ class Orders:
             # 重叠条件：新订单的入住日期 < 现有订单的退房日期 且 新订单的退房日期 > 现有订单的入住日期
             
             # 构建基本参数列表
-            params = [room_number, check_in, check_out]
+            params = [room_number, self.db.day_number(check_in), self.db.day_number(check_out)]
             exclude_clause = ""
             if exclude_order_id:
                 exclude_clause = "AND order_id != ?"
@@ -465,8 +455,8 @@ class Orders:
                 FROM orders 
                 WHERE room_number = ? 
                 AND order_status NOT IN ('已取消', '已完成')
-                AND check_out_date > ?  -- 现有订单的退房日期 > 新订单的入住日期
-                AND check_in_date < ?   -- 现有订单的入住日期 < 新订单的退房日期
+                AND check_out_day > ?  -- 现有订单的退房日期 > 新订单的入住日期
+                AND check_in_day < ?   -- 现有订单的入住日期 < 新订单的退房日期
                 {exclude_clause}
             '''
 
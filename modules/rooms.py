@@ -1,16 +1,200 @@
 # modules/rooms.py
 import sqlite3
 import random
+import threading
+import time
+from types import MappingProxyType
+from typing import Optional
+
+
+def room_floor(room_number: str) -> str:
+    """楼层：房号去掉末两位（'305' -> '3'，'1203' -> '12'），非数字房号没有楼层"""
+    room_number = str(room_number or '')
+    return room_number[:-2] if len(room_number) >= 3 and room_number.isdigit() else ''
+
+
+class RoomCatalog:
+    """
+    房间目录的不可变快照：按房号、房型、楼层、状态索引的只读视图
+    房间数据变化时整体换成新快照，持有旧快照的读者不受影响
+    """
+
+    def __init__(self, rows, version: int):
+        self.version = version
+        self.rooms = tuple(MappingProxyType(dict(row)) for row in rows)
+        self.by_number = MappingProxyType({room['room_number']: room for room in self.rooms})
+        by_type, by_floor, by_status = {}, {}, {}
+        for room in self.rooms:
+            by_type.setdefault(room['room_type'], []).append(room)
+            by_floor.setdefault(room_floor(room['room_number']), []).append(room)
+            by_status.setdefault(room['status'], []).append(room)
+        self.by_type = MappingProxyType({key: tuple(rooms) for key, rooms in by_type.items()})
+        self.by_floor = MappingProxyType({key: tuple(rooms) for key, rooms in by_floor.items()})
+        self.by_status = MappingProxyType({key: tuple(rooms) for key, rooms in by_status.items()})
+
+    def get(self, room_number):
+        return self.by_number.get(room_number)
 
 
 class Rooms:
+    # 检查其他进程是否修改过房间表（data_versions 版本号）的最短间隔（秒）
+    VERSION_CHECK_SECONDS = 1.0
+    # 状态操作：操作 -> (目标状态, 要求的当前状态，None 表示不限)
+    TRANSITIONS = {
+        'reserve': ('已预订', '空闲'),
+        'checkin': ('已入住', None),
+        'checkout': ('空闲', None),
+        'cancel': ('空闲', None),
+    }
+    # 批量状态变更一次最多处理的房间数
+    MAX_BATCH = 500
+    SEARCH_LIMIT = 50
+    MAX_SEARCH_LIMIT = 500
+    # 范围筛选：参数名 -> (字段, 类型, 是否为下限)
+    RANGE_FILTERS = {
+        'min_capacity': ('capacity', int, True),
+        'max_capacity': ('capacity', int, False),
+        'min_area': ('area', int, True),
+        'max_area': ('area', int, False),
+        'min_price': ('price', float, True),
+        'max_price': ('price', float, False),
+    }
+
     def __init__(self, db):
         self.db = db
+        self._catalog: Optional[RoomCatalog] = None
+        self._catalog_checked = 0.0
+        self._catalog_lock = threading.Lock()
         # 1. 确保表存在，表格在database.py中声明
         # 2. 检查旧表结构，如果缺少新字段则自动添加 (数据库迁移)
         self.check_and_update_schema()
         # 3. 如果是完全的新库，才生成演示数据
         self.init_sample_data()
+        db.add_write_listener(self._on_write)
+
+    def _on_write(self, table):
+        # 本进程写入房间表后立即作废快照，下次读取时重新加载
+        if table is None or table == 'rooms':
+            with self._catalog_lock:
+                self._catalog = None
+
+    def catalog(self) -> RoomCatalog:
+        """
+        当前房间目录快照
+        本进程的房间写入会立即作废快照；其他进程的写入通过 data_versions 中的版本号发现，
+        版本号至多每 VERSION_CHECK_SECONDS 秒检查一次，其余读取都是内存访问
+        """
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() - self._catalog_checked < self.VERSION_CHECK_SECONDS:
+            return catalog
+
+        with self._catalog_lock:
+            catalog = self._catalog
+            if catalog is not None and time.monotonic() - self._catalog_checked < self.VERSION_CHECK_SECONDS:
+                return catalog
+            version = self.db.execute_query("SELECT version FROM data_versions WHERE name = 'rooms'")
+            version = version[0]['version'] if version else 0
+            if catalog is None or catalog.version != version:
+                with self.db.read_transaction() as conn:
+                    version = conn.execute("SELECT version FROM data_versions WHERE name = 'rooms'").fetchone()
+                    rows = conn.execute("SELECT * FROM rooms ORDER BY room_number ASC").fetchall()
+                catalog = RoomCatalog(rows, version[0] if version else 0)
+                self._catalog = catalog
+            self._catalog_checked = time.monotonic()
+            return catalog
+
+    def get_room(self, room_number) -> Optional[dict]:
+        """按房号取房间（快照中的副本），不存在时返回 None"""
+        room = self.catalog().get(room_number)
+        return dict(room) if room is not None else None
+
+    def search_rooms(self, filters: dict) -> dict:
+        """
+        按条件筛选房间，结果按房号排序并分页
+
+        Args:
+            filters: room_type、status、floor 精确匹配；has_window、has_breakfast 取 0 / 1；
+                     min_/max_capacity、min_/max_area、min_/max_price 为闭区间；keyword 为房号片段；
+                     check_in、check_out 同时给出时只保留该时段内没有有效订单的房间；
+                     after 为上一页最后一个房号，limit 为每页条数（默认 50，最多 500）
+
+        房型、楼层、状态先在目录快照的对应索引中取候选房间（取最小的一组），其余条件在内存中过滤；
+        日期条件用一次查询取出与该时段重叠的有效订单所占的房间
+        """
+        filters = filters or {}
+        try:
+            limit = max(1, min(int(filters.get('limit') or self.SEARCH_LIMIT), self.MAX_SEARCH_LIMIT))
+            catalog = self.catalog()
+
+            candidates, checks = catalog.rooms, []
+            for key, index, getter in (
+                ('room_type', catalog.by_type, lambda room: room['room_type']),
+                ('floor', catalog.by_floor, lambda room: room_floor(room['room_number'])),
+                ('status', catalog.by_status, lambda room: room['status']),
+            ):
+                value = str(filters.get(key) or '').strip()
+                if value:
+                    rooms = index.get(value, ())
+                    if len(rooms) < len(candidates):
+                        candidates = rooms
+                    checks.append(lambda room, getter=getter, value=value: getter(room) == value)
+            for key in ('has_window', 'has_breakfast'):
+                value = filters.get(key)
+                if value not in (None, ''):
+                    flag = int(value) == 1
+                    checks.append(lambda room, key=key, flag=flag: bool(room[key]) == flag)
+            for key, (field, cast, is_min) in self.RANGE_FILTERS.items():
+                value = filters.get(key)
+                if value not in (None, ''):
+                    bound = cast(value)
+                    if is_min:
+                        checks.append(lambda room, field=field, bound=bound: (room[field] or 0) >= bound)
+                    else:
+                        checks.append(lambda room, field=field, bound=bound: (room[field] or 0) <= bound)
+            keyword = str(filters.get('keyword') or '').strip()
+            if keyword:
+                checks.append(lambda room: keyword in room['room_number'])
+
+            check_in, check_out = filters.get('check_in'), filters.get('check_out')
+            if check_in or check_out:
+                if not (check_in and check_out):
+                    return {'success': False, 'message': '请同时提供入住和退房日期', 'data': []}
+                start, end = self.db.day_number(check_in), self.db.day_number(check_out)
+                if end <= start:
+                    return {'success': False, 'message': '退房日期必须晚于入住日期', 'data': []}
+                # 条件与部分索引 idx_orders_active_stay 的 WHERE 一致，才能用上该索引
+                busy = {row['room_number'] for row in self.db.execute_query('''
+                    SELECT room_number FROM orders
+                    WHERE order_status NOT IN ('已取消', '已完成')
+                      AND check_out_day > ?
+                      AND check_in_day < ?
+                ''', (start, end)) or []}
+                checks.append(lambda room: room['room_number'] not in busy)
+
+            matched = [room for room in candidates if all(check(room) for check in checks)]
+            total = len(matched)
+            # 快照按房号排序，键集分页从游标之后开始
+            after = str(filters.get('after') or '')
+            if after:
+                matched = [room for room in matched if room['room_number'] > after]
+
+            rows = [dict(room) for room in matched[:limit]]
+            has_more = len(matched) > limit
+            return {
+                'success': True,
+                'data': rows,
+                'paging': {
+                    'limit': limit,
+                    'total': total,
+                    'has_more': has_more,
+                    'next_after': rows[-1]['room_number'] if has_more else None
+                },
+                'message': f'找到{total}间房间'
+            }
+        except (TypeError, ValueError):
+            return {'success': False, 'message': '筛选参数无效', 'data': []}
+        except Exception as e:
+            return {'success': False, 'message': f'筛选房间失败: {str(e)}', 'data': []}
 
     def check_and_update_schema(self):
         """自动检测并升级数据库表结构，添加面积和人数列"""
@@ -40,6 +224,7 @@ class Rooms:
             result = self.db.execute_query(check_sql)
             if result and result[0]['count'] == 0:
                 print("正在初始化演示客房数据...")
+                rows = []
                 for floor in range(1, 6):  # 1-5层
                     for i in range(1, 21):  # 每层20个
                         room_num = f"{floor}{str(i).zfill(2)}"  # 三位数房号
@@ -64,19 +249,20 @@ class Rooms:
 
                         status = '空闲'  # 默认空闲
 
-                        sql = '''INSERT INTO rooms (room_number, room_type, has_window, capacity, area, price, status) 
-                                 VALUES (?, ?, ?, ?, ?, ?, ?)'''
-                        self.db.execute_update(sql, (room_num, r_type, has_win, capacity, area, price, status))
+                        rows.append((room_num, r_type, has_win, capacity, area, price, status))
+
+                # 一个事务写入全部房间
+                sql = '''INSERT INTO rooms (room_number, room_type, has_window, capacity, area, price, status) 
+                         VALUES (?, ?, ?, ?, ?, ?, ?)'''
+                self.db.execute_many(sql, rows)
                 print("房间数据生成完毕。")
         except Exception as e:
             print(f"生成房间数据失败: {e}")
 
     def get_all_rooms(self):
         try:
-            # 按房号排序
-            sql = "SELECT * FROM rooms ORDER BY room_number ASC"
-            data = self.db.execute_query(sql)
-            return {'success': True, 'data': data if data else []}
+            # 快照已按房号排序
+            return {'success': True, 'data': [dict(room) for room in self.catalog().rooms]}
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
@@ -121,35 +307,105 @@ class Rooms:
 
     def delete_room(self, room_number):
         try:
-            check = self.db.execute_query("SELECT status FROM rooms WHERE room_number=?", (room_number,))
-            if check and check[0]['status'] != '空闲':
+            room = self.get_room(room_number)
+            if room and room['status'] != '空闲':
                 return {'success': False, 'message': '只能删除空闲状态的房间'}
 
-            self.db.execute_update("DELETE FROM rooms WHERE room_number=?", (room_number,))
+            # 带状态条件删除，快照过期（房间刚被其他进程占用）时不会误删
+            deleted = self.db.execute_update("DELETE FROM rooms WHERE room_number=? AND status='空闲'", (room_number,))
+            if room and not deleted:
+                return {'success': False, 'message': '只能删除空闲状态的房间'}
             return {'success': True, 'message': '房间已删除'}
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
     def update_status(self, room_number, action):
         try:
-            room = self.db.execute_query("SELECT status FROM rooms WHERE room_number=?", (room_number,))
+            room = self.get_room(room_number)
             if not room: return {'success': False, 'message': '房间不存在'}
 
-            current_status = room[0]['status']
-            new_status = current_status
+            current_status = room['status']
+            new_status, required = self.TRANSITIONS.get(action, (current_status, None))
+            if required is not None and current_status != required:
+                return {'success': False, 'message': '房间非空闲'}
 
-            if action == 'reserve':
-                if current_status != '空闲': return {'success': False, 'message': '房间非空闲'}
-                new_status = '已预订'
-            elif action == 'checkin':
-                new_status = '已入住'
-            elif action == 'checkout':
-                new_status = '空闲'
-            elif action == 'cancel':
-                new_status = '空闲'
-
-            self.db.execute_update("UPDATE rooms SET status=? WHERE room_number=?", (new_status, room_number))
+            # 以快照中的状态为条件更新，状态已被其他进程改变时不覆盖
+            updated = self.db.execute_update("UPDATE rooms SET status=? WHERE room_number=? AND status=?",
+                                             (new_status, room_number, current_status))
+            if not updated:
+                return {'success': False, 'message': '房间状态已变化，请刷新后重试'}
             return {'success': True, 'message': f'状态已更新为：{new_status}'}
 
         except Exception as e:
-            return {'success': False, 'message': str(e)}
\ No newline at end of file
+            return {'success': False, 'message': str(e)}
+
+    def update_status_batch(self, transitions) -> dict:
+        """
+        批量变更房间状态，全部在一个事务内完成
+
+        Args:
+            transitions: [{'room_number': '101', 'action': 'checkout'}, ...]，操作同 update_status
+
+        先用一次查询取出涉及房间的当前状态，再用一条 UPDATE ... FROM 只更新满足条件的房间，
+        返回每个房间的结果；不满足条件的房间不影响其他房间
+        """
+        if not isinstance(transitions, list) or not transitions:
+            return {'success': False, 'message': '请提供要变更的房间', 'data': []}
+        if len(transitions) > self.MAX_BATCH:
+            return {'success': False, 'message': f'一次最多变更{self.MAX_BATCH}个房间', 'data': []}
+
+        results, requests = [], {}
+        for item in transitions:
+            item = item if isinstance(item, dict) else {}
+            room_number = str(item.get('room_number') or '').strip()
+            action = item.get('action')
+            result = {'room_number': room_number, 'action': action, 'success': False}
+            results.append(result)
+            if not room_number:
+                result['message'] = '缺少房间号'
+            elif action not in self.TRANSITIONS:
+                result['message'] = f'不支持的操作: {action}'
+            elif room_number in requests:
+                result['message'] = '同一房间在本批次中重复'
+            else:
+                requests[room_number] = result
+
+        try:
+            if requests:
+                numbers = list(requests)
+                values = ', '.join(['(?, ?, ?)'] * len(numbers))
+                params = []
+                for number in numbers:
+                    params.extend((number,) + self.TRANSITIONS[requests[number]['action']])
+
+                with self.db.write_transaction('rooms') as conn:
+                    current = dict(conn.execute(
+                        f"SELECT room_number, status FROM rooms WHERE room_number IN ({', '.join('?' * len(numbers))})",
+                        numbers
+                    ).fetchall())
+                    updated = dict(conn.execute(f"""
+                        WITH req(room_number, new_status, required) AS (VALUES {values})
+                        UPDATE rooms SET status = req.new_status
+                        FROM req
+                        WHERE rooms.room_number = req.room_number
+                          AND (req.required IS NULL OR rooms.status = req.required)
+                        RETURNING rooms.room_number, rooms.status
+                    """, params).fetchall())
+
+                for number, result in requests.items():
+                    if number in updated:
+                        result.update(success=True, status=updated[number],
+                                      message=f'状态已更新为：{updated[number]}')
+                    elif number not in current:
+                        result['message'] = '房间不存在'
+                    else:
+                        result.update(status=current[number], message='房间非空闲')
+        except Exception as e:
+            return {'success': False, 'message': f'批量变更失败: {str(e)}', 'data': results}
+
+        succeeded = sum(1 for result in results if result['success'])
+        return {
+            'success': succeeded > 0,
+            'data': results,
+            'message': f'成功{succeeded}间，失败{len(results) - succeeded}间'
+        }
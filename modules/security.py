@@ -1,46 +1,203 @@
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
 import json
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+# 哈希清单的分块大小（字节）
+CHUNK_SIZE = 1 << 20
+
+
+def merkle_root(digests: List[bytes]) -> bytes:
+    """
+    按层两两合并摘要得到默克尔根：父节点 = SHA-256(0x01 + 左 + 右)，奇数个时最后一个直接进入上一层
+    没有摘要（空文件）时为空串的 SHA-256
+    """
+    if not digests:
+        return hashlib.sha256(b'').digest()
+    level = list(digests)
+    while len(level) > 1:
+        paired = [hashlib.sha256(b'\x01' + level[i] + level[i + 1]).digest()
+                  for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def hash_file(filepath: str, chunk_size: int = CHUNK_SIZE) -> Dict:
+    """
+    流式读取文件，每块的摘要为 SHA-256(0x00 + 块内容)，返回大小、各块摘要和文件的默克尔根
+    内存占用只有一个块，SHA-256 计算时释放 GIL，多个文件可以在线程池中并行计算
+    """
+    chunks, size = [], 0
+    with open(filepath, 'rb') as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            size += len(block)
+            chunks.append(hashlib.sha256(b'\x00' + block).digest())
+    return {
+        'size': size,
+        'chunks': [digest.hex() for digest in chunks],
+        'root': merkle_root(chunks).hex()
+    }
+
+
+def manifest_root(files: Dict[str, Dict]) -> str:
+    """清单的默克尔根：按路径排序，每个文件的叶子为 SHA-256(0x02 + 路径 + 0x00 + 文件根)"""
+    leaves = [hashlib.sha256(b'\x02' + path.encode('utf-8') + b'\x00' + bytes.fromhex(files[path]['root'])).digest()
+              for path in sorted(files)]
+    return merkle_root(leaves).hex()
+
 
 class Security:
-    def __init__(self, config_file: str = "config/hashes.json"):
+    """
+    关键文件完整性校验
+    哈希清单记录每个文件的分块摘要和默克尔根，全部文件的根再汇总为清单根；
+    文件的计算结果按 (路径, mtime_ns, 大小) 缓存，只重新计算发生变化的文件，并指出变化的块。
+    后台线程按固定间隔校验，请求只读取最近一次的结论，不产生磁盘读取
+    """
+
+    # 后台校验的默认间隔（秒）
+    CHECK_INTERVAL = 60.0
+    # 并行计算摘要的线程数上限
+    MAX_WORKERS = 4
+
+    def __init__(self, config_file: str = "config/hashes.json", check_interval: float = None):
         self.config_file = config_file
+        self.check_interval = check_interval or self.CHECK_INTERVAL
+        # 路径 -> ((mtime_ns, 大小), 计算结果, 分块大小)
+        self._hash_cache = {}
+        # (哈希清单签名, 清单)
+        self._manifest = (None, None)
+        # 最近一次校验结论 (是否完整, 被篡改/缺失的文件列表)
+        self._verdict = None
+        # 被篡改文件的明细：路径 -> {'changed_chunks': [...], 'size': ..., 'expected_size': ...}
+        self.details = {}
+        self._lock = threading.Lock()
+        self._thread = None
 
-    def _calculate_file_hash(self, filepath: str) -> str:
-        try:
-            with open(filepath, 'rb') as f:
-                return hashlib.sha256(f.read()).hexdigest()
-        except Exception:
-            raise
+    @staticmethod
+    def _signature(filepath: str):
+        stat = os.stat(filepath)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_manifest(self) -> Dict:
+        """读取哈希清单，清单文件未变化时沿用上次的解析结果；清单根与文件条目不一致时视为损坏"""
+        signature = self._signature(self.config_file)
+        if self._manifest[0] != signature:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if 'files' not in manifest:
+                raise ValueError('哈希清单格式过旧，请重新运行 scripts/hash_generator.py')
+            if manifest_root(manifest['files']) != manifest.get('root'):
+                raise ValueError('哈希清单已损坏')
+            self._manifest = (signature, manifest)
+        return self._manifest[1]
+
+    def _changed_files(self, paths: List[str], chunk_size: int) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        重新计算 mtime 或大小变化过的文件，未变化的直接取缓存
+        返回 (路径 -> 计算结果, 缺失或无法读取的文件)
+        """
+        results, missing, pending = {}, [], []
+        for path in paths:
+            try:
+                signature = self._signature(path)
+            except OSError:
+                self._hash_cache.pop(path, None)
+                missing.append(path)
+                continue
+            cached = self._hash_cache.get(path)
+            if cached is not None and cached[0] == signature and cached[2] == chunk_size:
+                results[path] = cached[1]
+            else:
+                pending.append((path, signature))
+
+        if pending:
+            workers = min(self.MAX_WORKERS, len(pending))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='integrity') as executor:
+                futures = [(path, signature, executor.submit(hash_file, path, chunk_size))
+                           for path, signature in pending]
+                for path, signature, future in futures:
+                    try:
+                        results[path] = future.result()
+                    except OSError:
+                        missing.append(path)
+                        continue
+                    self._hash_cache[path] = (signature, results[path], chunk_size)
+        return results, missing
 
     def verify_integrity(self):
         """
-        验证所有文件的完整性
+        验证所有文件的完整性（同步执行，未变化的文件只做一次 stat）
 
         Returns:
             Tuple[bool, List[str]]:
             - 是否所有文件都完整 (True/False)
             - 被篡改/缺失的文件路径列表
         """
-        try:
-            # 加载预期哈希值
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+        with self._lock:
+            details = {}
+            try:
+                manifest = self._load_manifest()
+                expected = manifest['files']
+                chunk_size = manifest.get('metadata', {}).get('chunk_size', CHUNK_SIZE)
+
+                results, missing = self._changed_files(list(expected), chunk_size)
+                missing = set(missing)
+                corrupted_files = []
+                for path, entry in expected.items():
+                    if path in missing:
+                        corrupted_files.append(path)
+                        details[path] = {'missing': True}
+                        continue
+                    current = results[path]
+                    if current['root'] == entry['root']:
+                        continue
+                    # 逐块比较，指出变化的块
+                    old_chunks, new_chunks = entry['chunks'], current['chunks']
+                    changed = [i for i in range(max(len(old_chunks), len(new_chunks)))
+                               if i >= len(old_chunks) or i >= len(new_chunks) or old_chunks[i] != new_chunks[i]]
+                    corrupted_files.append(path)
+                    details[path] = {'changed_chunks': changed, 'size': current['size'],
+                                     'expected_size': entry['size']}
+
+                verdict = (len(corrupted_files) == 0, corrupted_files)
 
-            expected_hashes = config_data.get("file_hashes", {})
-            corrupted_files = []
+            except ValueError as e:
+                verdict = (False, [str(e)])
+            except Exception:
+                verdict = (False, ["无法加载哈希配置文件"])
 
-            # 验证每个文件的哈希值
-            for filepath, expected_hash in expected_hashes.items():
-                try:
-                    current_hash = self._calculate_file_hash(filepath)
-                    if current_hash != expected_hash:
-                        corrupted_files.append(filepath)
+            self.details = details
+            self._verdict = verdict
+            return verdict
 
-                except Exception:
-                    corrupted_files.append(filepath)
+    def cached_verdict(self):
+        """
+        最近一次校验的结论，供请求路径使用
+        首次调用时同步校验一次并启动后台校验线程，之后只返回后台线程更新的结论
+        """
+        verdict = self._verdict
+        if verdict is None:
+            verdict = self.verify_integrity()
+        self._ensure_checker()
+        return verdict
 
-            all_valid = len(corrupted_files) == 0
-            return all_valid, corrupted_files
+    def _ensure_checker(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='integrity-check', daemon=True)
+                    self._thread.start()
 
-        except Exception:
-            return False, ["无法加载哈希配置文件"]
\ No newline at end of file
+    def _run(self):
+        """后台校验循环"""
+        while True:
+            time.sleep(self.check_interval)
+            self.verify_integrity()
@@ -0,0 +1,285 @@
+from datetime import datetime, timezone
+from typing import Dict, Any
+
+
+class StatsEngine:
+    """
+    统计引擎：员工、订单、客户、房间各表的计数由 Analytics、Employee、Orders 和仪表板推送共用
+    每张表的计数在一次条件聚合中完成，整张表只扫描一次；
+    按日期窗口的明细走 created_day 索引范围，入住数走有效订单住期部分索引
+    """
+
+    # 与订单表 CHECK 约束一致的状态取值
+    ORDER_STATUSES = ('预定中', '已入住', '已完成', '已取消', '异常')
+    PAYMENT_STATUSES = ('未支付', '已支付', '已退款')
+    # 趋势统计的天数（不含当天）
+    TREND_DAYS = 7
+    # 按 created_day 分组的单日订单统计列
+    DAY_COLUMNS = """
+        DATE(created_day * 86400, 'unixepoch') as date,
+        created_day as day,
+        COUNT(*) as orders,
+        COUNT(CASE WHEN order_status = '预定中' THEN 1 END) as reserved,
+        COUNT(CASE WHEN order_status = '已入住' THEN 1 END) as checked_in,
+        COUNT(CASE WHEN order_status = '已完成' THEN 1 END) as completed,
+        SUM(total_amount) as total_amount,
+        SUM(paid_amount) as paid_amount
+    """
+    EMPTY_DAY = {'orders': 0, 'reserved': 0, 'checked_in': 0, 'completed': 0,
+                 'total_amount': None, 'paid_amount': None}
+
+    def __init__(self, db):
+        self.db = db
+
+    def compute(self, block, *args):
+        """在单独的读事务中计算一个统计块，供没有现成连接的调用方使用"""
+        with self.db.read_transaction() as conn:
+            return block(conn, *args)
+
+    def utc_day(self, offset: int = 0) -> int:
+        """UTC 当天（与 SQLite 的 DATE('now') 一致）加偏移天数后的日序号"""
+        return self.db.day_number(datetime.now(timezone.utc).date()) + offset
+
+    def employees(self, conn) -> Dict[str, Any]:
+        """员工统计：按部门一次条件聚合得到各部门的总数/在职/离职，合计即全体员工的计数"""
+        counts_sql = """
+            SELECT department_id,
+                   COUNT(*) as total,
+                   COUNT(CASE WHEN status = '在职' THEN 1 END) as active,
+                   COUNT(CASE WHEN status = '离职' THEN 1 END) as terminated
+            FROM employees
+            GROUP BY department_id
+        """
+        counts = self.db.fetch_all(conn, counts_sql)
+        active_by_dept = {row['department_id']: row['active'] for row in counts}
+
+        departments = self.db.fetch_all(
+            conn, "SELECT department_id, department_name FROM departments ORDER BY department_id"
+        )
+        by_dept = sorted(
+            ({'department_name': dept['department_name'], 'count': active_by_dept.get(dept['department_id'], 0)}
+             for dept in departments),
+            key=lambda item: item['count'], reverse=True
+        )
+
+        total = sum(row['total'] for row in counts)
+        active = sum(row['active'] for row in counts)
+        active_rate = (active / total * 100) if total > 0 else 0
+        return {
+            'total': total,
+            'active': active,
+            'terminated': sum(row['terminated'] for row in counts),
+            'active_rate': round(active_rate, 2),
+            'by_department': by_dept
+        }
+
+    def orders(self, conn, stat_date: str = None) -> Dict[str, Any]:
+        """
+        订单统计：订单状态/支付状态分布来自一次条件聚合，
+        今日统计、近 7 天趋势和统计日收入来自 created_day 索引上的按日分组
+        stat_date 为空时不取统计日，revenue 为 None（历史日期的收入由日结快照提供）
+        """
+        columns = [f"COUNT(CASE WHEN order_status = '{status}' THEN 1 END)" for status in self.ORDER_STATUSES]
+        columns += [f"COUNT(CASE WHEN payment_status = '{status}' THEN 1 END)" for status in self.PAYMENT_STATUSES]
+        counts = conn.execute(f"SELECT COUNT(*), {', '.join(columns)} FROM orders").fetchone()
+        total = counts[0]
+        status_counts = dict(zip(self.ORDER_STATUSES, counts[1:1 + len(self.ORDER_STATUSES)]))
+        payment_counts = dict(zip(self.PAYMENT_STATUSES, counts[1 + len(self.ORDER_STATUSES):]))
+
+        daily_sql = f"""
+            SELECT {self.DAY_COLUMNS} FROM orders
+            WHERE created_day >= :trend_day
+            GROUP BY created_day
+        """
+        if stat_date:
+            # 统计日早于趋势窗口时单独取这一天；两段各自是索引范围，写成一个 OR 条件会退化为扫描整个索引
+            daily_sql = f"""
+                SELECT {self.DAY_COLUMNS} FROM orders
+                WHERE created_day = :stat_day AND created_day < :trend_day
+                GROUP BY created_day
+                UNION ALL
+                {daily_sql}
+            """
+        daily_sql += " ORDER BY day"
+        trend_day, week_day = self.utc_day(-self.TREND_DAYS), self.utc_day(-self.TREND_DAYS + 1)
+        stat_day = self.db.day_number(stat_date) if stat_date else None
+        daily = self.db.fetch_all(conn, daily_sql, {'stat_day': stat_day, 'trend_day': trend_day})
+        by_day = {row['date']: row for row in daily}
+
+        today = datetime.now().strftime('%Y-%m-%d')
+        today_row = by_day.get(today, self.EMPTY_DAY)
+
+        today_stats = {
+            'today_total': today_row['orders'],
+            'today_reserved': today_row['reserved'],
+            'today_checked_in': today_row['checked_in'],
+            'today_completed': today_row['completed'],
+            'today_total_amount': today_row['total_amount'],
+            'today_paid_amount': today_row['paid_amount']
+        }
+        revenue = None
+        if stat_date:
+            revenue = self._revenue(by_day.get(stat_date.replace('/', '-'), self.EMPTY_DAY))
+
+        payment_rate = 0
+        if (today_stats['today_total_amount'] or 0) > 0:
+            payment_rate = ((today_stats['today_paid_amount'] or 0) /
+                            today_stats['today_total_amount'] * 100)
+
+        return {
+            'order_stats': {
+                'total': total,
+                'by_status': [{'order_status': k, 'count': v} for k, v in sorted(status_counts.items()) if v],
+                'by_payment': [{'payment_status': k, 'count': v} for k, v in sorted(payment_counts.items()) if v],
+                'today_stats': today_stats,
+                'trend_data': [
+                    {'date': row['date'], 'count': row['orders'], 'total_amount': row['total_amount']}
+                    for row in daily if row['day'] >= trend_day
+                ],
+                'payment_rate': round(payment_rate, 2)
+            },
+            'revenue': revenue,
+            'week_trend': [
+                {'date': row['date'], 'orders': row['orders'], 'revenue': row['total_amount']}
+                for row in daily if row['day'] >= week_day
+            ]
+        }
+
+    @staticmethod
+    def _revenue(row) -> Dict[str, Any]:
+        return {
+            'total_orders': row['orders'],
+            'reserved': row['reserved'],
+            'checked_in': row['checked_in'],
+            'completed': row['completed'],
+            'total_amount': row['total_amount'],
+            'paid_amount': row['paid_amount']
+        }
+
+    def day(self, conn, stat_date: str) -> Dict[str, Any]:
+        """
+        只与统计日有关的指标：当日创建订单的收入统计与当日入住数，供日结快照使用
+        两者都走索引范围，不扫描订单表；入住率依赖房间总数，由读取方按当前房间数计算
+        """
+        stat_day = self.db.day_number(stat_date)
+        rows = self.db.fetch_all(
+            conn, f"SELECT {self.DAY_COLUMNS} FROM orders WHERE created_day = ? GROUP BY created_day", (stat_day,)
+        )
+        return {
+            'revenue': self._revenue(rows[0] if rows else self.EMPTY_DAY),
+            'occupied': self.occupied_rooms(conn, stat_day)
+        }
+
+    def customers(self, conn) -> Dict[str, Any]:
+        """客户统计：总数只数一遍索引，今日新增与近 7 天趋势取自 created_day 索引范围，消费排行读汇总表"""
+        total = conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+        today_day = self.db.day_number(datetime.now().strftime('%Y-%m-%d'))
+        trend_day = self.utc_day(-self.TREND_DAYS)
+        daily_sql = """
+            SELECT DATE(created_day * 86400, 'unixepoch') as date, created_day as day, COUNT(*) as count
+            FROM customers
+            WHERE created_day >= ?
+            GROUP BY created_day
+            ORDER BY created_day
+        """
+        daily = self.db.fetch_all(conn, daily_sql, (min(today_day, trend_day),))
+
+        # 消费排行读触发器维护的 customer_stats，沿 total_spent 索引取前 10 名
+        top_sql = """
+            SELECT c.id,
+                   c.name,
+                   s.order_count,
+                   s.total_spent
+            FROM customer_stats s
+                     JOIN customers c ON c.id = s.customer_id
+            ORDER BY s.total_spent DESC LIMIT 10
+        """
+        top_customers = self.db.fetch_all(conn, top_sql)
+
+        return {
+            'total': total,
+            'today_new': sum(row['count'] for row in daily if row['day'] == today_day),
+            'trend_data': [{'date': row['date'], 'count': row['count']} for row in daily if row['day'] >= trend_day],
+            'top_customers': top_customers
+        }
+
+    def rooms(self, conn, stat_date: str = None) -> Dict[str, Any]:
+        """
+        房间统计：状态/房型/价格区间来自一次交叉分组，入住数走有效订单住期索引
+        stat_date 为空时不计算入住数，occupied 与 occupancy_rate 为 None
+        """
+        group_sql = """
+            SELECT status,
+                   room_type,
+                   CASE
+                       WHEN price < 200 THEN '经济型 (<200)'
+                       WHEN price BETWEEN 200 AND 400 THEN '舒适型 (200-400)'
+                       WHEN price > 400 THEN '豪华型 (>400)'
+                   END as price_range,
+                   COUNT(*) as count,
+                   SUM(price) as price_sum,
+                   COUNT(price) as price_count,
+                   SUM(area) as area_sum,
+                   COUNT(area) as area_count
+            FROM rooms
+            GROUP BY status, room_type, price_range
+        """
+        by_status, by_type, by_price, total = {}, {}, {}, 0
+        for row in self.db.fetch_all(conn, group_sql):
+            total += row['count']
+            for bucket, key in ((by_status, row['status']), (by_type, row['room_type'])):
+                acc = bucket.setdefault(key, {'count': 0, 'price_sum': 0, 'price_count': 0,
+                                              'area_sum': 0, 'area_count': 0})
+                acc['count'] += row['count']
+                acc['price_sum'] += row['price_sum'] or 0
+                acc['price_count'] += row['price_count']
+                acc['area_sum'] += row['area_sum'] or 0
+                acc['area_count'] += row['area_count']
+            by_price[row['price_range']] = by_price.get(row['price_range'], 0) + row['count']
+
+        def _avg(acc, field):
+            return round(acc[f'{field}_sum'] / acc[f'{field}_count'], 2) if acc[f'{field}_count'] else None
+
+        status_stats = [{'status': k, 'count': v['count'], 'avg_price': _avg(v, 'price')}
+                        for k, v in by_status.items()]
+        type_stats = sorted(
+            ({'room_type': k, 'count': v['count'], 'avg_price': _avg(v, 'price'), 'avg_area': _avg(v, 'area')}
+             for k, v in by_type.items()),
+            key=lambda item: item['count'], reverse=True
+        )
+        price_stats = [{'price_range': k, 'count': by_price[k]}
+                       for k in sorted(by_price, key=lambda k: (k is not None, k or ''))]
+
+        occupied = occupancy_rate = None
+        if stat_date:
+            occupied = self.occupied_rooms(conn, self.db.day_number(stat_date))
+            occupancy_rate = self.occupancy_rate(occupied, total)
+
+        return {
+            'total': total,
+            'occupied': occupied,
+            'occupancy_rate': occupancy_rate,
+            'status_stats': status_stats,
+            'type_stats': type_stats,
+            'price_stats': price_stats
+        }
+
+    @staticmethod
+    def occupancy_rate(occupied: int, total: int) -> float:
+        return round(occupied / total * 100, 2) if total > 0 else 0
+
+    def occupied_rooms(self, conn, day: int) -> int:
+        """
+        某日有预定中或已入住订单的房间数
+        带上与 idx_orders_active_stay 相同的 NOT IN 条件，只在退房日晚于该日的有效订单中查找
+        """
+        sql = """
+            SELECT COUNT(DISTINCT room_number) as occupied
+            FROM orders
+            WHERE order_status NOT IN ('已取消', '已完成')
+            AND order_status IN ('预定中', '已入住')
+            AND check_out_day > ?
+            AND check_in_day <= ?
+        """
+        return self.db.fetch_all(conn, sql, (day, day))[0]['occupied']
@@ -0,0 +1,191 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Dict, Any, Optional
+
+from modules.stats import StatsEngine
+
+
+class DashboardStream:
+    """
+    仪表板实时指标推送（Server-Sent Events）
+    一个后台生产者线程在数据写入后重新计算指标，只把变化的字段作为增量推送给所有订阅者，
+    打开多少个页面都只计算一次
+    """
+
+    # 触发重新计算的表
+    WATCHED_TABLES = {'orders', 'rooms'}
+    # 写入后的合并等待时间（秒），连续写入只计算一次
+    DEBOUNCE_SECONDS = 0.2
+    # 检查其他进程写入（PRAGMA data_version）的间隔（秒）
+    POLL_SECONDS = 2.0
+    # 订阅者空闲时发送心跳的间隔（秒）
+    HEARTBEAT_SECONDS = 15.0
+    # 每个订阅者最多积压的事件数，超过后改为推送完整快照
+    QUEUE_SIZE = 50
+
+    def __init__(self, db, stats: StatsEngine = None):
+        self.db = db
+        self.stats = stats or StatsEngine(db)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._state: Optional[Dict[str, Any]] = None
+        self._version = 0
+        self._thread = None
+        db.add_write_listener(self._on_write)
+
+    def _on_write(self, table: Optional[str]):
+        if table is None or table in self.WATCHED_TABLES:
+            self._dirty.set()
+
+    def subscribe(self) -> queue.Queue:
+        """注册订阅者，返回其事件队列；首个事件为当前完整快照"""
+        subscriber = queue.Queue(maxsize=self.QUEUE_SIZE)
+        with self._lock:
+            if self._state is None:
+                self._state = self._collect()
+                self._version += 1
+            subscriber.put(self._snapshot_event(self._state))
+            self._subscribers.add(subscriber)
+            self._ensure_producer()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def events(self):
+        """SSE 响应生成器，客户端断开时自动退订"""
+        subscriber = self.subscribe()
+        try:
+            yield f"retry: {int(self.POLL_SECONDS * 1000)}\n\n"
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": ping\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _ensure_producer(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='dashboard-stream', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """生产者循环：等待写入通知或定期检查其他进程的写入，计算增量并广播"""
+        watcher = sqlite3.connect(self.db.db_path, check_same_thread=False)
+        try:
+            data_version = watcher.execute("PRAGMA data_version").fetchone()[0]
+            while True:
+                notified = self._dirty.wait(timeout=self.POLL_SECONDS)
+                current = watcher.execute("PRAGMA data_version").fetchone()[0]
+                if not notified and current == data_version and not self._day_changed():
+                    continue
+                data_version = current
+
+                time.sleep(self.DEBOUNCE_SECONDS)
+                self._dirty.clear()
+
+                with self._lock:
+                    if not self._subscribers:
+                        # 无人订阅时不计算，下一个订阅者会拿到新快照
+                        self._state = None
+                        continue
+                try:
+                    state = self._collect()
+                except Exception as e:
+                    print(f"实时指标计算失败: {e}")
+                    continue
+                self._publish(state)
+        finally:
+            watcher.close()
+
+    def _day_changed(self) -> bool:
+        """跨过零点后即使没有写入也需要重新计算今日指标"""
+        state = self._state
+        return state is not None and state['metrics']['stat_date'] != date.today().strftime('%Y-%m-%d')
+
+    def _publish(self, state: Dict[str, Any]):
+        with self._lock:
+            delta = self._diff(self._state or {}, state)
+            self._state = state
+            if not delta:
+                return
+            self._version += 1
+            event = self._event('delta', delta)
+            snapshot = None
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    # 消费过慢的订阅者丢弃积压，直接补发完整快照
+                    if snapshot is None:
+                        snapshot = self._snapshot_event(state)
+                    self._drain(subscriber)
+                    subscriber.put_nowait(snapshot)
+
+    @staticmethod
+    def _drain(subscriber: queue.Queue):
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+
+    @staticmethod
+    def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+        """只保留变化的指标；房间状态只包含状态变化的房间，删除的房间状态为 None"""
+        delta = {k: v for k, v in new['metrics'].items() if old.get('metrics', {}).get(k) != v}
+        old_rooms = old.get('rooms', {})
+        rooms = {number: status for number, status in new['rooms'].items() if old_rooms.get(number) != status}
+        rooms.update({number: None for number in old_rooms if number not in new['rooms']})
+        if rooms:
+            delta['room_board'] = rooms
+        return delta
+
+    def _snapshot_event(self, state: Dict[str, Any]) -> str:
+        """完整快照与增量使用相同的字段结构"""
+        return self._event('snapshot', dict(state['metrics'], room_board=state['rooms']))
+
+    def _event(self, name: str, data: Dict[str, Any]) -> str:
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str)
+        return f"id: {self._version}\nevent: {name}\ndata: {payload}\n\n"
+
+    def _collect(self) -> Dict[str, Any]:
+        """在一个读事务内计算实时指标：入住率、今日订单与收入、房间状态"""
+        today = self.db.day_number(date.today())
+        with self.db.read_transaction() as conn:
+            rooms = {row['room_number']: row['status']
+                     for row in self.db.fetch_all(conn, "SELECT room_number, status FROM rooms")}
+            occupied = self.stats.occupied_rooms(conn, today)
+            orders = self.db.fetch_all(conn, """
+                SELECT COUNT(*) as orders,
+                       COALESCE(SUM(total_amount), 0) as revenue,
+                       COALESCE(SUM(paid_amount), 0) as paid
+                FROM orders
+                WHERE created_day = ?
+            """, (today,))[0]
+
+        status_counts = {}
+        for status in rooms.values():
+            status_counts[status] = status_counts.get(status, 0) + 1
+        total = len(rooms)
+
+        return {
+            'metrics': {
+                'stat_date': self.db.day_to_date(today),
+                'rooms': total,
+                'occupied_rooms': occupied,
+                'occupancy_rate': round(occupied / total * 100, 2) if total else 0,
+                'today_orders': orders['orders'],
+                'today_revenue': orders['revenue'],
+                'today_paid': orders['paid'],
+                'room_status': status_counts
+            },
+            'rooms': rooms
+        }
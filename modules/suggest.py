@@ -0,0 +1,321 @@
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, List
+
+# GB2312 一级汉字按拼音排序，用各声母首字的区位码划分即可得到拼音首字母（二级汉字按部首排序，不支持）
+GB2312_INITIALS = [
+    (0xB0A1, 'a'), (0xB0C5, 'b'), (0xB2C1, 'c'), (0xB4EE, 'd'), (0xB6EA, 'e'),
+    (0xB7A2, 'f'), (0xB8C1, 'g'), (0xB9FE, 'h'), (0xBBF7, 'j'), (0xBFA6, 'k'),
+    (0xC0AC, 'l'), (0xC2E8, 'm'), (0xC4C3, 'n'), (0xC5B6, 'o'), (0xC5BE, 'p'),
+    (0xC6DA, 'q'), (0xC8BB, 'r'), (0xC8F6, 's'), (0xCBFA, 't'), (0xCDDA, 'w'),
+    (0xCEF4, 'x'), (0xD1B9, 'y'), (0xD4D1, 'z'),
+]
+GB2312_LEVEL1_END = 0xD7F9
+GB2312_CODES = [code for code, _ in GB2312_INITIALS]
+
+
+def pinyin_initials(text: str) -> str:
+    """
+    汉字转拼音首字母，如 '张三' -> 'zs'
+    字母和数字原样保留（小写），无法识别的字符跳过
+    """
+    result = []
+    for char in text or '':
+        if char.isascii():
+            if char.isalnum():
+                result.append(char.lower())
+            continue
+        try:
+            encoded = char.encode('gb2312')
+        except UnicodeEncodeError:
+            continue
+        if len(encoded) != 2:
+            continue
+        code = (encoded[0] << 8) | encoded[1]
+        if GB2312_CODES[0] <= code <= GB2312_LEVEL1_END:
+            index = bisect_left(GB2312_CODES, code + 1) - 1
+            result.append(GB2312_INITIALS[index][1])
+    return ''.join(result)
+
+
+class PrefixIndex:
+    """
+    前缀索引：按键排序的 (键, 记录ID) 数组
+    作用与前缀树相同——同一前缀的所有键在数组中连续，二分定位后顺序扫描即可，
+    但内存只有两个列表，百万级记录也能常驻；少量增删二分定位后原地插入、删除
+    """
+
+    def __init__(self, keys: List[str], ids: list):
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        self.ids = [ids[i] for i in order]
+
+    def search(self, prefix: str, limit: int) -> list:
+        """返回键以 prefix 开头的前 limit 个不重复记录 ID，按键的字典序"""
+        found, seen = [], set()
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(found) < limit and self.keys[i].startswith(prefix):
+            record_id = self.ids[i]
+            if record_id not in seen:
+                seen.add(record_id)
+                found.append(record_id)
+            i += 1
+        return found
+
+    def add(self, key: str, record_id):
+        """插入 (键, 记录ID)，已存在时忽略"""
+        start = bisect_left(self.keys, key)
+        end = bisect_right(self.keys, key, start)
+        if record_id not in self.ids[start:end]:
+            self.keys.insert(end, key)
+            self.ids.insert(end, record_id)
+
+    def remove(self, key: str, record_id):
+        """删除 (键, 记录ID)，不存在时忽略"""
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.ids[i] == record_id:
+                del self.keys[i]
+                del self.ids[i]
+                return
+            i += 1
+
+
+class Suggest:
+    """
+    客户、房间、员工选择框的前缀联想
+    每类实体一个内存前缀索引，由后台线程在启动时建立一次，之后按 change_log 增量更新：
+    只取回日志中变化的记录，按旧值删去旧键、按当前值插入新键。本进程写入后立即唤醒后台线程，
+    其他进程的写入按固定间隔轮询发现；查询只做二分查找，再按主键取回至多 limit 条记录
+    """
+
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+    # 收到写入通知后的合并等待时间（秒），连续写入合并为一次增量更新
+    APPLY_DELAY = 0.2
+    # 轮询变更日志的间隔（秒），用于发现其他进程的写入
+    POLL_INTERVAL = 5.0
+    # 一次变化的记录超过此数量时整体重建，不再逐条增删
+    REBUILD_THRESHOLD = 2000
+    # 变更日志保留的条数，落后更多的进程读不到完整日志，整体重建
+    LOG_RETAIN = 10000
+    # 查询等待启动时建立索引的最长时间（秒）
+    BUILD_WAIT = 5.0
+    # 按主键取回变化记录时每条语句的参数个数
+    FETCH_BATCH = 500
+
+    # 实体定义：表名、主键、建立索引的字段（name 字段额外索引拼音首字母）、取回记录的 SQL、排序
+    # 索引字段与 database.CHANGE_LOG_TABLES 一致，触发器按这些字段记录旧值
+    KINDS = {
+        'customers': {
+            'table': 'customers',
+            'key': 'id',
+            'fields': ['name', 'phone'],
+            'pinyin': 'name',
+            'select': "SELECT id, name, phone FROM customers",
+            'order': 'id',
+        },
+        'rooms': {
+            'table': 'rooms',
+            'key': 'room_number',
+            'fields': ['room_number', 'room_type'],
+            'pinyin': 'room_type',
+            'select': "SELECT room_number, room_type, price, status FROM rooms",
+            'order': 'room_number',
+        },
+        'employees': {
+            'table': 'employees',
+            'key': 'employee_id',
+            'fields': ['employee_id', 'employee_name'],
+            'pinyin': 'employee_name',
+            'select': "SELECT employee_id, employee_name, status FROM employees",
+            'order': 'employee_id',
+        },
+    }
+
+    def __init__(self, db):
+        self.db = db
+        self._indexes: Dict[str, PrefixIndex] = {}
+        # 表名 -> 实体
+        self._table_kinds = {spec['table']: kind for kind, spec in self.KINDS.items()}
+        # 已应用到索引的变更日志序号，只由后台线程读写
+        self._applied = 0
+        # 保护索引：后台线程增删或替换索引、查询线程二分查找时持有
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        db.add_write_listener(self._on_write)
+        self._thread = threading.Thread(target=self._run, name='suggest-index', daemon=True)
+        self._thread.start()
+
+    def _on_write(self, table: str):
+        if table is None or table in self._table_kinds:
+            self._wake.set()
+
+    def _run(self):
+        """后台线程：先建立全部索引，之后每次被写入通知唤醒或到达轮询间隔时应用新增的变更日志"""
+        while True:
+            try:
+                if self._ready.is_set():
+                    self._apply_changes()
+                else:
+                    self._rebuild_all()
+                    self._ready.set()
+            except Exception as e:
+                print(f"联想索引更新失败: {e}")
+            if self._wake.wait(self.POLL_INTERVAL):
+                time.sleep(self.APPLY_DELAY)
+            self._wake.clear()
+
+    def _rebuild_all(self):
+        with self.db.read_transaction() as conn:
+            applied = conn.execute("SELECT IFNULL(MAX(seq), 0) FROM change_log").fetchone()[0]
+            indexes = {kind: self._build(conn, kind) for kind in self.KINDS}
+        with self._lock:
+            self._indexes.update(indexes)
+        self._applied = applied
+        self._prune_log()
+
+    def _apply_changes(self):
+        """读取上次应用之后的变更日志，在同一读事务内取回变化记录的当前值，再更新索引"""
+        with self.db.read_transaction() as conn:
+            oldest, latest = conn.execute("SELECT MIN(seq), MAX(seq) FROM change_log").fetchone()
+            if latest is None or latest <= self._applied:
+                return
+            if oldest > self._applied + 1:
+                # 尚未应用的日志已被清理，无法增量更新
+                rebuild, changes = set(self.KINDS), {}
+            else:
+                rebuild, changes = self._read_changes(conn, latest)
+            indexes = {kind: self._build(conn, kind) for kind in rebuild}
+            deltas = {kind: self._deltas(conn, kind, records) for kind, records in changes.items()}
+
+        with self._lock:
+            self._indexes.update(indexes)
+            for kind, (removed, added) in deltas.items():
+                index = self._indexes[kind]
+                for key, record_id in removed:
+                    index.remove(key, record_id)
+                for key, record_id in added:
+                    index.add(key, record_id)
+        self._applied = latest
+        self._prune_log()
+
+    def _read_changes(self, conn, latest: int):
+        """
+        按实体汇总 (上次序号, latest] 内的变更日志
+        返回 (需要整体重建的实体, 实体 -> {主键: [旧值 JSON, ...]})
+        """
+        rebuild, changes = set(), {}
+        for name, record_key, old_values in conn.execute(
+            "SELECT name, record_key, old_values FROM change_log WHERE seq > ? AND seq <= ? ORDER BY seq",
+            (self._applied, latest)
+        ):
+            kind = self._table_kinds.get(name)
+            if kind is None or kind in rebuild:
+                continue
+            if record_key is None:
+                # 批量装载后整张表都已变化
+                rebuild.add(kind)
+                changes.pop(kind, None)
+                continue
+            old_list = changes.setdefault(kind, {}).setdefault(record_key, [])
+            if old_values is not None:
+                old_list.append(old_values)
+
+        for kind in [kind for kind, records in changes.items() if len(records) > self.REBUILD_THRESHOLD]:
+            rebuild.add(kind)
+            del changes[kind]
+        return rebuild, changes
+
+    def _deltas(self, conn, kind: str, records: dict):
+        """
+        计算一个实体的增删：每条旧值生成的键都删去（不在索引中的删除会被忽略），
+        记录的当前值生成的键都插入（已存在的插入会被忽略），已删除的记录取不回当前值
+        """
+        spec = self.KINDS[kind]
+        removed = []
+        for record_key, old_list in records.items():
+            for old_values in old_list:
+                old_row = dict(zip(spec['fields'], json.loads(old_values)))
+                removed.extend((key, record_key) for key in self._row_keys(spec, old_row))
+
+        added = []
+        columns = ', '.join([spec['key']] + spec['fields'])
+        record_keys = list(records)
+        for start in range(0, len(record_keys), self.FETCH_BATCH):
+            batch = record_keys[start:start + self.FETCH_BATCH]
+            placeholders = ', '.join('?' * len(batch))
+            for row in conn.execute(
+                f"SELECT {columns} FROM {spec['table']} WHERE {spec['key']} IN ({placeholders})", batch
+            ):
+                added.extend((key, row[spec['key']]) for key in self._row_keys(spec, row))
+        return removed, added
+
+    def _prune_log(self):
+        """清理早于本进程已应用序号 LOG_RETAIN 条以前的日志，其他进程落后更多时会整体重建"""
+        if self._applied <= self.LOG_RETAIN:
+            return
+        with self.db.write_transaction() as conn:
+            conn.execute("DELETE FROM change_log WHERE seq <= ?", (self._applied - self.LOG_RETAIN,))
+
+    @staticmethod
+    def _row_keys(spec: Dict[str, Any], row) -> set:
+        """一条记录的索引键：各索引字段的小写值和拼音首字母"""
+        row_keys = {str(row[field]).strip().lower() for field in spec['fields'] if row[field] not in (None, '')}
+        row_keys.add(pinyin_initials(row[spec['pinyin']]))
+        row_keys.discard('')
+        return row_keys
+
+    def _build(self, conn, kind: str) -> PrefixIndex:
+        spec = self.KINDS[kind]
+        columns = ', '.join([spec['key']] + spec['fields'])
+        keys, ids = [], []
+        # 逐行读取游标，不把整张表物化为字典列表
+        for row in conn.execute(f"SELECT {columns} FROM {spec['table']}"):
+            row_keys = self._row_keys(spec, row)
+            keys.extend(row_keys)
+            ids.extend([row[spec['key']]] * len(row_keys))
+        return PrefixIndex(keys, ids)
+
+    def suggest(self, kind: str, query: str = '', limit: int = None) -> Dict[str, Any]:
+        """
+        按前缀联想
+
+        Args:
+            kind: customers / rooms / employees
+            query: 前缀，可以是姓名、拼音首字母、手机号、房号、房型、工号等
+            limit: 返回条数，默认 10，最多 50
+        """
+        spec = self.KINDS.get(kind)
+        if spec is None:
+            return {'success': False, 'message': f'不支持的联想类型: {kind}', 'data': []}
+
+        try:
+            limit = max(1, min(int(limit or self.DEFAULT_LIMIT), self.MAX_LIMIT))
+            query = (query or '').strip().lower()
+
+            if query:
+                if not self._ready.wait(self.BUILD_WAIT):
+                    return {'success': False, 'message': '联想索引正在建立，请稍后重试', 'data': []}
+                with self._lock:
+                    ids = self._indexes[kind].search(query, limit)
+                if not ids:
+                    return {'success': True, 'data': [], 'message': '无匹配结果'}
+                placeholders = ', '.join('?' * len(ids))
+                rows = self.db.execute_query(
+                    f"{spec['select']} WHERE {spec['key']} IN ({placeholders})", tuple(ids)
+                ) or []
+                # 保持索引给出的顺序；已删除但尚未应用到索引的记录自然被过滤
+                by_id = {row[spec['key']]: row for row in rows}
+                rows = [by_id[record_id] for record_id in ids if record_id in by_id]
+            else:
+                rows = self.db.execute_query(
+                    f"{spec['select']} ORDER BY {spec['order']} LIMIT ?", (limit,)
+                ) or []
+
+            return {'success': True, 'data': rows, 'message': f'找到{len(rows)}条结果'}
+        except Exception as e:
+            return {'success': False, 'message': f'联想查询失败: {str(e)}', 'data': []}
@@ -0,0 +1,259 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl：不加文件锁，只依赖单行追加写入的原子性
+    fcntl = None
+
+
+class LoginThrottle:
+    """
+    登录限流：按用户名和客户端 IP 各一个令牌桶，连续失败后指数退避
+    令牌桶和连续失败次数只在进程内存中；失败次数达到阈值后的封禁追加写入一个小的日志文件，
+    多个工作进程共享，一个进程封禁的用户名或 IP 在其他进程中同样被拒绝。
+    各进程定期只读取日志新增的部分；日志超过 COMPACT_BYTES 时只保留未到期的封禁重写一次，
+    追加、读取和重写都在文件锁（fcntl.flock）内进行。
+    被拒绝的请求在查询数据库、读取配置之前就返回
+    """
+
+    # 各类键的限制：令牌桶容量、每秒补充的令牌数、连续失败多少次后开始退避
+    LIMITS = {
+        'user': {'capacity': 5, 'refill': 1 / 60, 'backoff_after': 3},
+        'ip': {'capacity': 20, 'refill': 1 / 6, 'backoff_after': 10},
+    }
+    # 退避时长从 BACKOFF_BASE 秒起每多失败一次翻倍，最长 BACKOFF_MAX 秒
+    BACKOFF_BASE = 2.0
+    BACKOFF_MAX = 900.0
+    # 最后一次失败（或封禁到期）超过该时长（秒）后，失败次数重新计算
+    FAILURE_WINDOW = 3600
+    # 检查封禁日志是否有其他进程追加的最短间隔（秒）
+    SYNC_SECONDS = 1.0
+    # 内存中最多保留的令牌桶数和失败计数数，超出时先清理
+    MAX_BUCKETS = 10000
+    # 封禁日志超过该大小（字节）时只保留未到期的封禁重写
+    COMPACT_BYTES = 64 * 1024
+
+    def __init__(self, state_file: str = "config/login_throttle.ndjson"):
+        self.state_file = state_file
+        self.lock_file = f"{state_file}.lock"
+        self._lock = threading.Lock()
+        # 键 -> [剩余令牌, 更新时间]
+        self._buckets: Dict[str, List[float]] = {}
+        # 键 -> [连续失败次数, 最后失败时间]，只在本进程内
+        self._failures: Dict[str, List[float]] = {}
+        # 键 -> [封禁时的失败次数, 解封时间]，与封禁日志一致
+        self._bans: Dict[str, List[float]] = {}
+        # 已读到的封禁日志：(inode, 大小, 修改时间) 签名、首行和字节偏移
+        # inode 可能在重写后被复用，首行不同同样说明文件已被重写
+        self._signature = None
+        self._head = b''
+        self._offset = 0
+        self._synced_at = 0.0
+
+    @staticmethod
+    def _keys(username: str, ip: str) -> List[Tuple[str, str]]:
+        return [('user', f"user:{username or ''}"), ('ip', f"ip:{ip or ''}")]
+
+    def check(self, username: str, ip: str) -> float:
+        """
+        判断能否尝试登录：允许时从两个令牌桶各取一个令牌并返回 0，
+        否则返回需要等待的秒数（不取令牌）
+        """
+        now = time.time()
+        with self._lock:
+            self._sync(now)
+            keys = self._keys(username, ip)
+
+            wait = 0.0
+            for _, key in keys:
+                ban = self._bans.get(key)
+                if ban and ban[1] > now:
+                    wait = max(wait, ban[1] - now)
+            if wait > 0:
+                return wait
+
+            buckets = []
+            for kind, key in keys:
+                limit = self.LIMITS[kind]
+                bucket = self._bucket(key, limit, now)
+                if bucket[0] < 1:
+                    wait = max(wait, (1 - bucket[0]) / limit['refill'])
+                buckets.append(bucket)
+            if wait > 0:
+                return wait
+
+            for bucket in buckets:
+                bucket[0] -= 1
+            return 0.0
+
+    def record_failure(self, username: str, ip: str) -> None:
+        """
+        登录失败：在内存中累计两个键的连续失败次数，达到阈值后按失败次数指数退避，
+        只有产生封禁时才写入日志；其他进程的封禁带有当时的失败次数，退避在各进程间接续
+        """
+        now = time.time()
+        with self._lock:
+            if len(self._failures) >= self.MAX_BUCKETS:
+                self._prune_failures(now)
+            records = []
+            for kind, key in self._keys(username, ip):
+                failures = 0
+                count = self._failures.get(key)
+                if count and count[1] > now - self.FAILURE_WINDOW:
+                    failures = count[0]
+                ban = self._bans.get(key)
+                if ban and ban[1] > now - self.FAILURE_WINDOW:
+                    failures = max(failures, ban[0])
+                failures += 1
+                self._failures[key] = [failures, now]
+
+                over = failures - self.LIMITS[kind]['backoff_after']
+                if over >= 0:
+                    until = now + min(self.BACKOFF_BASE * 2 ** over, self.BACKOFF_MAX)
+                    self._bans[key] = [failures, until]
+                    records.append({'key': key, 'until': until, 'failures': failures})
+            if records:
+                self._append(records)
+
+    def record_success(self, username: str, ip: str) -> None:
+        """登录成功：清除该用户名的失败记录并回满其令牌桶；IP 的记录保留，避免用一个有效账号洗掉 IP 的退避"""
+        key = self._keys(username, ip)[0][1]
+        with self._lock:
+            self._buckets.pop(key, None)
+            self._failures.pop(key, None)
+            if self._bans.pop(key, None) is not None:
+                # 追加一条解除记录，其他进程读到后同样清除
+                self._append([{'key': key, 'until': 0}])
+
+    def _bucket(self, key: str, limit: dict, now: float) -> List[float]:
+        """取出键的令牌桶并按经过的时间补充令牌"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_BUCKETS:
+                self._prune_buckets(now)
+            bucket = self._buckets[key] = [float(limit['capacity']), now]
+        else:
+            bucket[0] = min(limit['capacity'], bucket[0] + (now - bucket[1]) * limit['refill'])
+            bucket[1] = now
+        return bucket
+
+    def _prune_buckets(self, now: float) -> None:
+        """清理到现在已回满的令牌桶；仍然超出上限时丢弃最久未用的一半"""
+        for key, (tokens, updated) in list(self._buckets.items()):
+            limit = self.LIMITS[key.split(':', 1)[0]]
+            if tokens + (now - updated) * limit['refill'] >= limit['capacity']:
+                del self._buckets[key]
+        if len(self._buckets) >= self.MAX_BUCKETS:
+            oldest = sorted(self._buckets, key=lambda key: self._buckets[key][1])
+            for key in oldest[:len(oldest) // 2]:
+                del self._buckets[key]
+
+    def _prune_failures(self, now: float) -> None:
+        """清理最后失败早于 FAILURE_WINDOW 的失败计数；仍然超出上限时丢弃最久未失败的一半"""
+        for key, (_, failed_at) in list(self._failures.items()):
+            if failed_at <= now - self.FAILURE_WINDOW:
+                del self._failures[key]
+        if len(self._failures) >= self.MAX_BUCKETS:
+            oldest = sorted(self._failures, key=lambda key: self._failures[key][1])
+            for key in oldest[:len(oldest) // 2]:
+                del self._failures[key]
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True):
+        """锁住封禁日志旁的锁文件；日志重写时会被替换，锁加在单独的文件上"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync(self, now: float) -> None:
+        """封禁日志有新内容或被重写过时读入，最多每 SYNC_SECONDS 秒检查一次"""
+        if now - self._synced_at < self.SYNC_SECONDS:
+            return
+        self._synced_at = now
+        try:
+            stat = os.stat(self.state_file)
+        except FileNotFoundError:
+            self._bans, self._signature = {}, None
+            return
+        except OSError:
+            return
+        if (stat.st_ino, stat.st_size, stat.st_mtime_ns) == self._signature:
+            return
+        try:
+            with self._file_lock(exclusive=False):
+                self._read_log()
+        except OSError as e:
+            print(f"读取登录限流状态失败: {e}")
+
+    def _read_log(self) -> None:
+        """从上次读到的位置读取封禁日志（调用方持有文件锁）；文件被重写过时从头读取，只处理完整的行"""
+        try:
+            f = open(self.state_file, 'rb')
+        except FileNotFoundError:
+            self._bans, self._signature = {}, None
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            head = f.readline()
+            offset = self._offset
+            if (self._signature is None or self._signature[0] != stat.st_ino
+                    or head != self._head or stat.st_size < offset):
+                self._bans, self._head, offset = {}, head, 0
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+                key, until = record['key'], float(record['until'])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if until > 0:
+                self._bans[key] = [int(record.get('failures', 0)), until]
+            else:
+                self._bans.pop(key, None)
+        self._signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        self._offset = offset + end
+
+    def _append(self, records: List[dict]) -> None:
+        """在文件锁内把记录追加到封禁日志，日志过大时顺带重写"""
+        lines = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                        for record in records)
+        directory = os.path.dirname(self.state_file)
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._file_lock():
+                with open(self.state_file, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+                    size = f.tell()
+                if size > self.COMPACT_BYTES:
+                    self._compact()
+        except OSError as e:
+            print(f"写入登录限流状态失败: {e}")
+
+    def _compact(self) -> None:
+        """只保留未到期的封禁重写日志（调用方持有排他锁）：先读入其他进程追加的记录，再写临时文件替换"""
+        self._read_log()
+        now = time.time()
+        self._bans = {key: ban for key, ban in self._bans.items() if ban[1] > now}
+        temp_path = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for key, (failures, until) in self._bans.items():
+                f.write(json.dumps({'key': key, 'until': until, 'failures': failures},
+                                   ensure_ascii=False, separators=(',', ':')) + '\n')
+        os.replace(temp_path, self.state_file)
+        self._signature = None
+        self._read_log()
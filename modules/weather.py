@@ -1,26 +1,28 @@
-import configparser
 import gzip
 import io
 import json
-import os
 import urllib.request
 import urllib.parse
 import urllib.error
 
+from modules.config import Config
+
 class Weather:
-    def __init__(self, config_file: str = "config/weather_api.cfg"):
+    def __init__(self, config_file: str = "config/weather_api.cfg", config: Config = None):
         self.config_file = config_file
-        self.api_host, self.api_key = self._read_weather_config(config_file)
+        # API 主机名与密钥读自 Config 缓存的快照，配置文件修改后自动生效
+        self.config = config or Config()
 
-    def _read_weather_config(self, config_file: str) -> tuple:
-        config = configparser.ConfigParser()
-        config.read(config_file, encoding='utf-8')
+    def _api_config(self):
+        return self.config.snapshot(self.config_file).get('weather_api', {})
 
-        api_section = config['weather_api']
-        api_host = api_section['api_host']
-        api_key = api_section['api_key']
+    @property
+    def api_host(self) -> str:
+        return self._api_config().get('api_host', '')
 
-        return api_host, api_key
+    @property
+    def api_key(self) -> str:
+        return self._api_config().get('api_key', '')
 
     def _make_api_request(self, url: str) -> dict | None:
         try:
@@ -159,15 +161,13 @@ class Weather:
             dict: 包含api_host和api_key的配置字典
         """
         try:
-            config = configparser.ConfigParser()
-            config.read(self.config_file, encoding='utf-8')
-
-            if 'weather_api' not in config:
+            snapshot = self.config.snapshot(self.config_file)
+            if 'weather_api' not in snapshot:
                 return {}
 
             return {
-                'api_host': config['weather_api'].get('api_host', ''),
-                'api_key': config['weather_api'].get('api_key', '')
+                'api_host': snapshot['weather_api'].get('api_host', ''),
+                'api_key': snapshot['weather_api'].get('api_key', '')
             }
 
         except Exception as e:
@@ -186,24 +186,10 @@ class Weather:
             bool: 配置更新成功返回 True，失败返回 False
         """
         try:
-            config = configparser.ConfigParser()
-            config.read(self.config_file, encoding='utf-8')
-
-            if 'weather_api' not in config:
-                config['weather_api'] = {}
-
-            config['weather_api']['api_host'] = api_host
-            config['weather_api']['api_key'] = api_key
-
-            # 确保配置目录存在
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-
-            with open(self.config_file, 'w', encoding='utf-8') as configfile:
-                config.write(configfile)
-
-            # 更新当前实例的配置
-            self.api_host = api_host
-            self.api_key = api_key
+            # 保留文件中的其他节，只替换 weather_api
+            sections = dict(self.config.snapshot(self.config_file))
+            sections['weather_api'] = dict(sections.get('weather_api', {}), api_host=api_host, api_key=api_key)
+            self.config.save(self.config_file, sections)
 
             return True
         except Exception as e:
@@ -0,0 +1,25 @@
+"""
+日结任务：保存指定日期（默认昨天）的收入与入住数快照
+可由计划任务每天凌晨执行，例如 cron: 5 0 * * * python scripts/close_day.py
+"""
+
+from pathlib import Path
+import sys
+
+current_dir = Path(__file__).parent
+project_root = current_dir.parent
+sys.path.insert(0, str(project_root))
+
+from modules.analytics import Analytics
+from modules.database import Database
+
+db_path = str(project_root / "hotel.db")
+
+def main():
+    stat_date = sys.argv[1] if len(sys.argv) > 1 else None
+    analytics = Analytics(Database(db_path))
+    result = analytics.close_day(stat_date)
+    print(result['message'])
+
+if __name__ == "__main__":
+    main()
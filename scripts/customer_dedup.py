@@ -0,0 +1,54 @@
+"""
+查找并合并重复客户
+按归一化手机号、身份证号、姓名 + 出生日期分块，共享任一键的客户视为同一簇；
+--merge 只合并手机号或身份证号相同的客户，每组保留 ID 最小（最早建档）的客户，订单改挂到其名下；
+只因姓名与出生日期相同而归入的客户标记为需人工确认，不自动合并
+
+用法示例：
+    python scripts/customer_dedup.py            # 只列出重复簇
+    python scripts/customer_dedup.py --merge    # 合并手机号或身份证号相同的客户
+"""
+
+import argparse
+from pathlib import Path
+import sys
+
+current_dir = Path(__file__).parent
+project_root = current_dir.parent
+sys.path.insert(0, str(project_root))
+
+from modules.database import Database
+from modules.dedup import CustomerDedup
+
+db_path = str(project_root / "hotel.db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查找并合并重复客户')
+    parser.add_argument('--db', default=db_path, help='数据库文件路径')
+    parser.add_argument('--limit', type=int, default=20, help='列出的重复簇数量')
+    parser.add_argument('--merge', action='store_true', help='合并手机号或身份证号相同的客户')
+    args = parser.parse_args()
+
+    dedup = CustomerDedup(Database(args.db))
+    result = dedup.find_duplicates(args.limit)
+    if not result['success']:
+        print(result['message'])
+        sys.exit(1)
+
+    for cluster in result['data']:
+        review = '' if cluster['confirmed'] else '，需人工确认'
+        print(f"保留 {cluster['keep_id']}（{'、'.join(cluster['reasons'])}{review}）")
+        for customer in cluster['customers']:
+            print(f"  {customer['id']:>8}  {customer['name']}  {customer['phone']}  "
+                  f"{customer['id_card']}  订单 {customer['orders']}")
+    print(result['message'])
+
+    if args.merge and result['total']:
+        result = dedup.merge_all()
+        print(result['message'])
+        sys.exit(0 if result['success'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+仪表板汇总性能对比
+旧路径：基线版本仪表板汇总执行的语句（原样保留在本脚本中），每条语句单独建立连接
+新路径：Analytics.get_dashboard_summary，用条件聚合完成
+        串行 —— 各统计块依次执行；并行 —— 各统计块在线程池中使用独立读连接并行执行
+"""
+
+import argparse
+import contextlib
+from datetime import datetime
+import io
+import os
+from pathlib import Path
+import statistics
+import sys
+import threading
+import time
+
+current_dir = Path(__file__).parent
+project_root = current_dir.parent
+sys.path.insert(0, str(project_root))
+
+from modules.analytics import Analytics
+from modules.database import Database
+
+db_path = str(project_root / "hotel.db")
+
+
+class CountingDatabase(Database):
+    """统计连接数与执行语句数的数据库封装"""
+
+    def __init__(self, path: str):
+        self.connections = 0
+        self.statements = 0
+        self._lock = threading.Lock()
+        super().__init__(path)
+
+    def _get_connection(self):
+        conn = super()._get_connection()
+        with self._lock:
+            self.connections += 1
+        conn.set_trace_callback(self._trace)
+        return conn
+
+    def _trace(self, statement: str):
+        if statement.lstrip().upper().startswith('SELECT'):
+            with self._lock:
+                self.statements += 1
+
+    def reset(self):
+        self.connections = 0
+        self.statements = 0
+
+
+# 改造前（基线版本）仪表板汇总执行的语句，原样保留，不随 Analytics 的后续修改而变化
+LEGACY_EMPLOYEE = {
+    'total': "SELECT COUNT(*) as total FROM employees",
+    'active': "SELECT COUNT(*) as active FROM employees WHERE status = '在职'",
+    'terminated': "SELECT COUNT(*) as terminated FROM employees WHERE status = '离职'",
+    'by_department': '''
+                       SELECT d.department_name, COUNT(e.employee_id) as count
+                       FROM departments d
+                           LEFT JOIN employees e
+                       ON d.department_id = e.department_id AND e.status = '在职'
+                       GROUP BY d.department_id
+                       ORDER BY count DESC
+                       ''',
+}
+LEGACY_ORDERS = {
+    'total': "SELECT COUNT(*) as total FROM orders",
+    'by_status': '''
+                         SELECT order_status, COUNT(*) as count
+                         FROM orders
+                         GROUP BY order_status
+                         ''',
+    'by_payment': '''
+                          SELECT payment_status, COUNT(*) as count
+                          FROM orders
+                          GROUP BY payment_status
+                          ''',
+    'today_stats': '''
+                        SELECT COUNT(*)                                                 as today_total, \
+                               SUM(CASE WHEN order_status = '预定中' THEN 1 ELSE 0 END) as today_reserved, \
+                               SUM(CASE WHEN order_status = '已入住' THEN 1 ELSE 0 END) as today_checked_in, \
+                               SUM(CASE WHEN order_status = '已完成' THEN 1 ELSE 0 END) as today_completed, \
+                               SUM(total_amount)                                        as today_total_amount, \
+                               SUM(paid_amount)                                         as today_paid_amount
+                        FROM orders
+                        WHERE DATE (created_at) = DATE (?)
+                        ''',
+    'trend_data': '''
+                        SELECT
+                            DATE (created_at) as date, COUNT (*) as count, SUM (total_amount) as total_amount
+                        FROM orders
+                        WHERE created_at >= DATE ('now', '-7 days')
+                        GROUP BY DATE (created_at)
+                        ORDER BY date
+                        ''',
+}
+LEGACY_CUSTOMERS = {
+    'total': "SELECT COUNT(*) as total FROM customers",
+    'today_new': """
+                        SELECT COUNT(*) as today_new
+                        FROM customers
+                        WHERE DATE (created_at) = DATE (?) \
+                        """,
+    'trend_data': """
+                        SELECT
+                            DATE (created_at) as date, COUNT (*) as count
+                        FROM customers
+                        WHERE created_at >= DATE ('now', '-7 days')
+                        GROUP BY DATE (created_at)
+                        ORDER BY date
+                        """,
+    'top_customers': """
+                        SELECT c.id, \
+                               c.name, \
+                               COUNT(o.order_id)   as order_count, \
+                               SUM(o.total_amount) as total_spent
+                        FROM customers c
+                                 LEFT JOIN orders o ON c.id = o.customer_id
+                        GROUP BY c.id
+                        HAVING order_count > 0
+                        ORDER BY total_spent DESC LIMIT 10
+                        """,
+}
+LEGACY_ROOMS = {
+    'status_stats': """
+                        SELECT status, \
+                                COUNT(*) as count,
+                            ROUND(AVG(price), 2) as avg_price
+                        FROM rooms
+                        GROUP BY status \
+                        """,
+    'type_stats': """
+                    SELECT room_type, \
+                            COUNT(*) as count,
+                        ROUND(AVG(price), 2) as avg_price,
+                        ROUND(AVG(area), 2) as avg_area
+                    FROM rooms
+                    GROUP BY room_type
+                    ORDER BY count DESC \
+                    """,
+    'price_stats': """
+                        SELECT CASE \
+                                WHEN price < 200 THEN '经济型 (<200)' \
+                                WHEN price BETWEEN 200 AND 400 THEN '舒适型 (200-400)' \
+                                WHEN price > 400 THEN '豪华型 (>400)' \
+                                END as price_range, \
+                            COUNT(*) as count
+                        FROM rooms
+                        GROUP BY price_range
+                        ORDER BY price_range \
+                        """,
+    'total': "SELECT COUNT(*) as total FROM rooms",
+    # 基线在每次房间统计中都执行的调试查询
+    'debug': """
+                    SELECT 
+                        order_id,
+                        room_number,
+                        check_in_date,
+                        check_out_date,
+                        order_status,
+                        DATE(check_in_date) as check_in_date_parsed,
+                        DATE(check_out_date) as check_out_date_parsed
+                    FROM orders
+                    WHERE order_status IN ('预定中', '已入住')
+                    """,
+    'test_date': """
+                        SELECT DATE(?) as test_date_parsed,
+                                DATE('now') as current_date
+                        """,
+    'detailed_occupied': """
+                                SELECT 
+                                    o.order_id,
+                                    o.room_number,
+                                    o.check_in_date,
+                                    o.check_out_date,
+                                    o.order_status,
+                                    DATE(o.check_in_date) as ci_parsed,
+                                    DATE(o.check_out_date) as co_parsed,
+                                    DATE(?) as stat_date_parsed,
+                                    CASE 
+                                        WHEN DATE(?) >= DATE(o.check_in_date) 
+                                            AND DATE(?) < DATE(o.check_out_date)
+                                        THEN 1 
+                                        ELSE 0 
+                                    END as is_occupied
+                                FROM orders o
+                                WHERE o.order_status IN ('预定中', '已入住')
+                                ORDER BY o.order_id
+                                """,
+    'occupied': """
+                        SELECT COUNT(DISTINCT room_number) as occupied_count
+                        FROM orders
+                        WHERE order_status IN ('预定中', '已入住')
+                        AND DATE(?) >= DATE(check_in_date)
+                        AND DATE(?) < DATE(check_out_date)
+                        """,
+    # 入住数为 0 时基线额外执行的备选查询
+    'alt_a': """
+                        SELECT COUNT(DISTINCT room_number) as occupied_count
+                        FROM orders
+                        WHERE order_status IN ('预定中', '已入住')
+                        AND ? >= check_in_date
+                        AND ? < check_out_date
+                        """,
+    'alt_b': """
+                        SELECT COUNT(DISTINCT room_number) as occupied_count
+                        FROM orders
+                        WHERE order_status IN ('预定中', '已入住')
+                        AND DATE(check_in_date) = DATE(?)
+                        """,
+    'alt_today': """
+                        SELECT room_number, check_in_date, check_out_date, order_status
+                        FROM orders
+                        WHERE DATE(check_in_date) <= DATE('now')
+                        AND DATE(check_out_date) >= DATE('now')
+                        AND order_status IN ('预定中', '已入住')
+                        """,
+}
+LEGACY_REVENUE = """
+                SELECT
+                    COUNT(*) as total_orders,
+                    SUM(CASE WHEN order_status = '预定中' THEN 1 ELSE 0 END) as reserved,
+                    SUM(CASE WHEN order_status = '已入住' THEN 1 ELSE 0 END) as checked_in,
+                    SUM(CASE WHEN order_status = '已完成' THEN 1 ELSE 0 END) as completed,
+                    SUM(total_amount) as total_amount,
+                    SUM(paid_amount) as paid_amount
+                FROM orders
+                WHERE DATE(REPLACE(created_at, '/', '-')) = DATE(REPLACE(?, '/', '-'))
+            """
+LEGACY_WEEK_TREND = """
+                SELECT
+                    DATE(REPLACE(created_at, '/', '-')) as date,
+                    COUNT(*) as orders,
+                    SUM(total_amount) as revenue
+                FROM orders
+                WHERE DATE(REPLACE(created_at, '/', '-')) >= DATE('now', '-6 days')
+                GROUP BY DATE(REPLACE(created_at, '/', '-'))
+                ORDER BY date
+            """
+
+
+def legacy_dashboard_summary(db: Database, stat_date: str) -> dict:
+    """基线的仪表板汇总路径：按原顺序逐条执行上面的语句，每条语句单独建立连接"""
+    def first(sql, params=None, column=None):
+        rows = db.execute_query(sql, params) if params else db.execute_query(sql)
+        return (rows[0][column] if column else rows[0]) if rows else 0
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    stat_day = stat_date.replace('/', '-')
+
+    employees = first(LEGACY_EMPLOYEE['total'], column='total')
+    active = first(LEGACY_EMPLOYEE['active'], column='active')
+    first(LEGACY_EMPLOYEE['terminated'])
+    db.execute_query(LEGACY_EMPLOYEE['by_department'])
+
+    total_orders = first(LEGACY_ORDERS['total'], column='total')
+    db.execute_query(LEGACY_ORDERS['by_status'])
+    db.execute_query(LEGACY_ORDERS['by_payment'])
+    db.execute_query(LEGACY_ORDERS['today_stats'], (today,))
+    db.execute_query(LEGACY_ORDERS['trend_data'])
+
+    customers = first(LEGACY_CUSTOMERS['total'], column='total')
+    db.execute_query(LEGACY_CUSTOMERS['today_new'], (today,))
+    db.execute_query(LEGACY_CUSTOMERS['trend_data'])
+    db.execute_query(LEGACY_CUSTOMERS['top_customers'])
+
+    db.execute_query(LEGACY_ROOMS['status_stats'])
+    db.execute_query(LEGACY_ROOMS['type_stats'])
+    db.execute_query(LEGACY_ROOMS['price_stats'])
+    rooms = first(LEGACY_ROOMS['total'], column='total')
+    db.execute_query(LEGACY_ROOMS['debug'])
+    db.execute_query(LEGACY_ROOMS['test_date'], (stat_day,))
+    db.execute_query(LEGACY_ROOMS['detailed_occupied'], (stat_day, stat_day, stat_day))
+    occupied = first(LEGACY_ROOMS['occupied'], (stat_day, stat_day), column='occupied_count')
+    if occupied == 0:
+        db.execute_query(LEGACY_ROOMS['alt_a'], (stat_day, stat_day))
+        db.execute_query(LEGACY_ROOMS['alt_b'], (stat_day,))
+        db.execute_query(LEGACY_ROOMS['alt_today'])
+
+    revenue = first(LEGACY_REVENUE, (stat_date,))
+    week_trend = db.execute_query(LEGACY_WEEK_TREND) or []
+
+    return {
+        'summary': {
+            'employees': employees,
+            'active_employees': active,
+            'customers': customers,
+            'rooms': rooms,
+            'occupied_rooms': occupied,
+            'occupancy_rate': round(occupied / rooms * 100, 2) if rooms > 0 else 0,
+            'total_orders': total_orders,
+            'revenue': revenue
+        },
+        'week_trend': week_trend
+    }
+
+
+def run(label: str, db: CountingDatabase, func, iterations: int) -> dict:
+    timings = []
+    db.reset()
+    result = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        # 旧路径中的调试输出不计入对比
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    report = {
+        'label': label,
+        'mean_ms': statistics.mean(timings),
+        'median_ms': statistics.median(timings),
+        'statements': db.statements / iterations,
+        'connections': db.connections / iterations,
+        'result': result
+    }
+    print(f"{label:<8} 平均 {report['mean_ms']:8.2f} ms  中位数 {report['median_ms']:8.2f} ms  "
+          f"语句 {report['statements']:5.1f}  连接 {report['connections']:5.1f}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='仪表板汇总性能对比')
+    parser.add_argument('--db', default=db_path, help='数据库文件路径')
+    parser.add_argument('--iterations', type=int, default=20, help='每条路径的执行次数')
+    parser.add_argument('--stat-date', default=None, help='统计日期 (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"数据库文件 {args.db} 不存在")
+        return
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = CountingDatabase(args.db)
+    analytics = Analytics(db)
+    serial = Analytics(db, max_workers=1)
+    stat_date = args.stat_date or time.strftime('%Y-%m-%d')
+
+    old = run('旧路径', db, lambda: legacy_dashboard_summary(db, stat_date), args.iterations)
+    run('串行', db, lambda: serial.get_dashboard_summary(stat_date)['data'], args.iterations)
+    new = run('并行', db, lambda: analytics.get_dashboard_summary(stat_date)['data'], args.iterations)
+
+    keys = ['employees', 'active_employees', 'customers', 'rooms', 'occupied_rooms', 'total_orders']
+    mismatched = [k for k in keys if old['result']['summary'][k] != new['result']['summary'][k]]
+    if mismatched:
+        print(f"结果不一致: {', '.join(mismatched)}")
+    else:
+        print(f"结果一致，加速比 {old['mean_ms'] / new['mean_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+生成可复现的模拟数据：部门、员工、客户、房间、订单
+相同的随机种子、参数和 --today 总是生成完全相同的数据。
+订单按房间时间线生成：同一房间的住期互不重叠，入住晚数、空房间隔、提前预订天数按经验分布抽样；
+订单状态、支付状态和当前房态由住期相对“今天”的位置决定。
+全部数据经 Database.bulk_load 写入：装载期间去掉索引和触发器，按块提交，结束后一次性重建
+
+用法示例：
+    python scripts/data_generator.py --db /tmp/hotel_big.db --orders 10000000
+    python scripts/data_generator.py --orders 20000 --seed 7 --replace
+"""
+
+import argparse
+from datetime import date
+import hashlib
+import math
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+
+current_dir = Path(__file__).parent
+project_root = current_dir.parent
+sys.path.insert(0, str(project_root))
+
+from modules.database import Database
+
+db_path = str(project_root / "hotel.db")
+
+DEPARTMENTS = [
+    ('D001', '前厅部', '前台接待服务', ['前厅经理', '前台接待', '礼宾员']),
+    ('D002', '客房部', '客房清洁服务', ['客房经理', '客房服务员', '楼层主管']),
+    ('D003', '餐饮部', '餐厅餐饮服务', ['餐饮经理', '服务员', '厨师']),
+    ('D004', '财务部', '财务资金管理', ['财务经理', '会计', '出纳']),
+    ('D005', '人事部', '负责员工招聘', ['人事经理', '人事专员', '招聘专员']),
+]
+
+# 房型：(名称, 价格, 面积, 人数, 占比)
+ROOM_TYPES = [
+    ('单人房', 180, 23, 1, 0.35),
+    ('双人房', 280, 40, 2, 0.40),
+    ('豪华大床房', 450, 50, 3, 0.20),
+    ('豪华套房', 880, 80, 4, 0.05),
+]
+ROOMS_PER_FLOOR = 40
+# 员工入职日期的范围：今天之前 HIRE_SPAN_DAYS 天到 30 天；部门在最早的入职日之前设立
+HIRE_SPAN_DAYS = 365 * 10
+
+# 入住晚数分布：1 晚、2 晚为主，长住少见
+NIGHTS = np.arange(1, 15)
+NIGHTS_P = np.array([38, 26, 13, 7, 5, 3, 3, 1, 1, 1, 0.5, 0.5, 0.5, 0.5])
+NIGHTS_P = NIGHTS_P / NIGHTS_P.sum()
+MEAN_NIGHTS = float((NIGHTS * NIGHTS_P).sum())
+# 平均提前预订天数
+MEAN_LEAD_DAYS = 7
+MAX_LEAD_DAYS = 90
+# 时间线末端超出今天的天数（未来的预订）
+FUTURE_DAYS = 30
+CANCEL_RATE = 0.04
+# 客户、订单每批生成的行数
+CUSTOMER_BATCH = 100000
+ORDER_BATCH = 100000
+
+SURNAMES = list('王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦')
+GIVEN = list('伟芳娜秀敏静丽强磊军洋勇艳杰娟涛明超兰霞平刚桂英华玉萍红鹏辉建国志文宇浩然子轩欣怡梓涵一诺博雅思远晨曦雨婷佳琪俊峰海燕')
+PHONE_PREFIXES = ['130', '135', '138', '139', '150', '152', '158', '170', '177', '180', '186', '188', '199']
+REGIONS = ['110101', '120101', '310101', '320102', '330106', '340102', '350102', '370102',
+           '420102', '430102', '440106', '440305', '500103', '510104', '610103', '210102']
+SPECIAL_REQUESTS = ['高楼层', '安静房间', '加床', '延迟退房', '无烟房', '需要婴儿床']
+# 身份证出生日期范围：1950-01-01 起 20000 天
+BIRTH_START = date(1950, 1, 1).toordinal()
+BIRTH_DAYS = 20000
+ID_WEIGHTS = (7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2)
+ID_CHECK = '10X98765432'
+# 与 10^9、身份证编号空间互素的乘数，把序号打散成不重复的号码
+PERMUTE = 387420489
+
+
+def permute(index: np.ndarray, modulus: int) -> np.ndarray:
+    """序号到 [0, modulus) 的一一映射，保证手机号、身份证号不重复"""
+    return (index.astype(object) * PERMUTE + 12345) % modulus
+
+
+def day_strings(first: int, last: int) -> list:
+    """日序号 first..last 对应的 YYYY-MM-DD 文本，按 day - first 取用"""
+    return [Database.day_to_date(day) for day in range(first, last + 1)]
+
+
+def time_strings(rng, count: int) -> list:
+    """8:00 到 23:00 之间的随机时刻"""
+    minutes = rng.integers(8 * 60, 23 * 60, size=count)
+    seconds = rng.integers(0, 60, size=count)
+    return [f' {m // 60:02d}:{m % 60:02d}:{s:02d}' for m, s in zip(minutes.tolist(), seconds.tolist())]
+
+
+def generate_departments(today: int):
+    """部门：创建、更新时间固定为入职日期范围的起点，不取装载时的当前时间"""
+    founded = Database.day_to_date(today - HIRE_SPAN_DAYS) + ' 08:00:00'
+    return [(dept_id, name, description, founded, founded) for dept_id, name, description, _ in DEPARTMENTS]
+
+
+def generate_employees(rng, count: int, today: int):
+    """
+    员工：工号为入职年份 + 当年三位序号，管理者各部门一名，其余随机分到各部门
+    创建时间为入职日 09:00，离职员工的更新时间为离职日 18:00，其余与创建时间相同
+    """
+    hire_days = np.sort(rng.integers(today - HIRE_SPAN_DAYS, today - 30, size=count))
+    rows, serials = [], {}
+    for i, hire_day in enumerate(hire_days.tolist()):
+        hire_date = Database.day_to_date(hire_day)
+        year = hire_date[:4]
+        serials[year] = serials.get(year, 0) + 1
+        if serials[year] > 999:
+            raise ValueError(f'{year} 年入职员工超过 999 人，工号不够用')
+        employee_id = f'{year}{serials[year]:03d}'
+
+        dept_index = i if i < len(DEPARTMENTS) else int(rng.integers(len(DEPARTMENTS)))
+        dept_id, dept_name, _, positions = DEPARTMENTS[dept_index]
+        is_manager = i < len(DEPARTMENTS)
+        position = positions[0] if is_manager else positions[1 + int(rng.integers(len(positions) - 1))]
+        status = '在职' if is_manager or rng.random() < 0.9 else '离职'
+        termination_date = None
+        if status == '离职':
+            termination_date = Database.day_to_date(min(hire_day + int(rng.integers(30, 366)), today - 1))
+        salary = round(float(rng.uniform(15000, 25000) if is_manager else rng.uniform(4000, 12000)), 2)
+        password = hashlib.sha256(rng.bytes(8)).hexdigest()[:8]
+        created_at = f'{hire_date} 09:00:00'
+        updated_at = f'{termination_date} 18:00:00' if termination_date else created_at
+
+        rows.append((
+            employee_id,
+            f"{dept_name[:2]}{'经理' if is_manager else '员工'}{i + 1:03d}",
+            '男' if rng.random() < 0.5 else '女',
+            PHONE_PREFIXES[int(rng.integers(len(PHONE_PREFIXES)))] + f'{int(rng.integers(10 ** 8)):08d}',
+            f'user{employee_id}@hotel.com',
+            dept_id, position, hire_date, termination_date, status, salary,
+            f'user{employee_id}', hashlib.sha256(password.encode()).hexdigest(),
+            created_at, updated_at
+        ))
+    return rows
+
+
+def generate_rooms(rng, count: int):
+    """房间：每层 ROOMS_PER_FLOOR 间，房号为楼层 + 两位序号；房态稍后按订单更新"""
+    weights = np.array([t[4] for t in ROOM_TYPES])
+    types = rng.choice(len(ROOM_TYPES), size=count, p=weights / weights.sum()).tolist()
+    has_window = (rng.random(count) < 0.7).astype(int).tolist()
+    has_breakfast = (rng.random(count) < 0.5).astype(int).tolist()
+    rows = []
+    for i in range(count):
+        floor, index = divmod(i, ROOMS_PER_FLOOR)
+        name, price, area, capacity, _ = ROOM_TYPES[types[i]]
+        rows.append((f'{floor + 1}{index + 1:02d}', name, has_window[i], has_breakfast[i],
+                     capacity, area, float(price), '空闲'))
+    return rows
+
+
+def generate_customers(rng, count: int, first_day: int, today: int):
+    """
+    客户：ID 即建档顺序，建档日期递增；手机号、身份证号由序号打散得到，互不重复
+    返回 (行生成器, 各客户建档日序号数组)
+    """
+    created_days = np.sort(rng.integers(first_day, today, size=count))
+    created_days[0] = first_day
+
+    def rows():
+        days = day_strings(first_day, today)
+        births = [date.fromordinal(BIRTH_START + day).strftime('%Y%m%d') for day in range(BIRTH_DAYS)]
+        weights = np.array(ID_WEIGHTS)
+        for start in range(0, count, CUSTOMER_BATCH):
+            size = min(CUSTOMER_BATCH, count - start)
+            index = np.arange(start, start + size)
+            surnames = rng.integers(len(SURNAMES), size=size).tolist()
+            given = rng.integers(len(GIVEN), size=(size, 2)).tolist()
+            two_chars = (rng.random(size) < 0.6).tolist()
+            prefixes = rng.integers(len(PHONE_PREFIXES), size=size).tolist()
+            phones = permute(index, 10 ** 8).tolist()
+            times = time_strings(rng, size)
+
+            # 身份证：地区码 + 出生日期 + 三位顺序码 + 校验位，(地区, 出生日期, 顺序码) 由序号打散得到
+            bodies = []
+            for code in permute(index, 1000 * BIRTH_DAYS * len(REGIONS)).tolist():
+                rest = code // 1000
+                bodies.append(f'{REGIONS[rest // BIRTH_DAYS]}{births[rest % BIRTH_DAYS]}{code % 1000:03d}')
+            digits = np.frombuffer(''.join(bodies).encode(), dtype=np.uint8).reshape(size, 17) - ord('0')
+            checks = ((digits @ weights) % 11).tolist()
+
+            for offset in range(size):
+                name = SURNAMES[surnames[offset]] + GIVEN[given[offset][0]]
+                if two_chars[offset]:
+                    name += GIVEN[given[offset][1]]
+                yield (
+                    start + offset + 1, name,
+                    PHONE_PREFIXES[prefixes[offset]] + f'{phones[offset]:08d}',
+                    bodies[offset] + ID_CHECK[checks[offset]],
+                    days[int(created_days[start + offset]) - first_day] + times[offset]
+                )
+
+    return rows(), created_days
+
+
+def ensure_room_columns(db):
+    """面积、人数列由 Rooms.check_and_update_schema 添加；这里不实例化 Rooms（空表时会写入演示房间），直接补齐"""
+    existing = {row['name'] for row in db.execute_query("SELECT name FROM pragma_table_info('rooms')")}
+    for column, default in (('area', 23), ('capacity', 2)):
+        if column not in existing:
+            db.execute_update(f"ALTER TABLE rooms ADD COLUMN {column} INTEGER DEFAULT {default}")
+
+
+def order_layout(orders: int, rooms: int, occupancy: float, today: int):
+    """
+    每间房的订单数与最早的订单日期估计
+    时间线平均长度由订单数和入住率决定；各房间时间线的末端对齐到今天之后 FUTURE_DAYS 天以内，
+    起点随抽样长度不同而前后错开（相当于各房间陆续开业）
+    """
+    per_room = np.full(rooms, orders // rooms, dtype=np.int64)
+    per_room[:orders % rooms] += 1
+    mean_gap = MEAN_NIGHTS * (1 - occupancy) / occupancy
+    span = int(math.ceil(orders / rooms * (MEAN_NIGHTS + mean_gap)))
+    # 留出 25% 余量覆盖时间线长度的波动
+    return per_room, mean_gap, today + FUTURE_DAYS - int(span * 1.25) - MAX_LEAD_DAYS
+
+
+def generate_orders(rng, room_rows, per_room, mean_gap, customer_days, employee_ids, today, room_status):
+    """
+    生成订单行，同时把当前房态写入 room_status（房号 -> 状态）
+    先为所有房间抽样出紧凑的住期数组，再按创建时间排序分批输出：订单号和 rowid 都随创建时间递增，
+    主键索引只在末尾追加。订单号为创建日期 YYMMDD + 当日序号；订单都创建于今天之前，当天系统新建的订单号不会与之重复
+    """
+    total = int(per_room.sum())
+    gap_p = 1 / (mean_gap + 1)
+
+    # 每间房的时间线：间隔 + 入住晚数依次累加，再整体平移使末次退房落在今天之后 FUTURE_DAYS 天以内
+    nights = rng.choice(NIGHTS, size=total, p=NIGHTS_P).astype(np.int32)
+    cumulative = np.cumsum(nights + rng.geometric(gap_p, size=total) - 1)
+    last = np.cumsum(per_room) - 1
+    end = today + rng.integers(1, FUTURE_DAYS + 1, size=len(room_rows))
+    check_out = (np.repeat(end - cumulative[last], per_room) + cumulative).astype(np.int32)
+    del cumulative
+
+    lead = np.minimum(rng.geometric(1 / (MEAN_LEAD_DAYS + 1), size=total) - 1, MAX_LEAD_DAYS)
+    created = (check_out - nights - lead).astype(np.int32)
+    del lead
+    # 未来的预订都在今天之前创建
+    late = np.flatnonzero(created > today - 1)
+    created[late] = today - 1 - rng.integers(0, MEAN_LEAD_DAYS * 2, size=len(late))
+
+    order = np.argsort(created, kind='stable')
+    created, nights, check_out = created[order], nights[order], check_out[order]
+    rooms = np.repeat(np.arange(len(room_rows), dtype=np.int32), per_room)[order]
+    del order
+    # 当日序号：排序后同一天的订单连续排列
+    serials = (np.arange(total) - np.searchsorted(created, created, side='left') + 1).astype(np.int32)
+
+    employees = np.array(employee_ids, dtype=object)
+    days = day_strings(int(created[0]), int(check_out.max()))
+    first_day = int(created[0])
+
+    for batch_start in range(0, total, ORDER_BATCH):
+        batch = slice(batch_start, min(batch_start + ORDER_BATCH, total))
+        size = batch.stop - batch.start
+        batch_created = created[batch]
+
+        # 客户：一半是最近建档的新客户，一半从已建档的客户中随机抽取（回头客）
+        known = np.maximum(np.searchsorted(customer_days, batch_created, side='right'), 1)
+        u = rng.random(size)
+        recent = known - 1 - np.floor(u * np.minimum(known, 200)).astype(np.int64)
+        loyal = np.floor(known * u).astype(np.int64)
+        customer_ids = np.where(rng.random(size) < 0.5, recent, loyal) + 1
+
+        cancelled = rng.random(size) < CANCEL_RATE
+        paid_roll = rng.random(size)
+        employee_pick = employees[rng.integers(len(employees), size=size)]
+        requests = np.where(rng.random(size) < 0.05, rng.integers(len(SPECIAL_REQUESTS), size=size), -1)
+        times = time_strings(rng, size)
+        batch_out = check_out[batch]
+
+        columns = zip(rooms[batch].tolist(), nights[batch].tolist(), (batch_out - nights[batch]).tolist(),
+                      batch_out.tolist(), batch_created.tolist(), serials[batch].tolist(), customer_ids.tolist(),
+                      cancelled.tolist(), paid_roll.tolist(), employee_pick.tolist(), requests.tolist(), times)
+        for (room, night, day_in, day_out, day_created, serial, customer_id, is_cancelled,
+             roll, employee_id, request, moment) in columns:
+            room_number, price = room_rows[room][0], room_rows[room][6]
+            amount = price * night
+            if is_cancelled:
+                status, payment, paid = '已取消', '已退款' if roll < 0.5 else '未支付', 0.0
+            elif day_out <= today:
+                status, payment, paid = '已完成', '已支付', amount
+            elif day_in <= today:
+                status = '已入住'
+                payment, paid = ('已支付', amount) if roll < 0.8 else ('未支付', 0.0)
+                room_status[room_number] = '已入住'
+            else:
+                status = '预定中'
+                payment, paid = ('已支付', amount) if roll < 0.3 else ('未支付', 0.0)
+                # 明天到店的预订：房间当前未入住时显示为已预订
+                if day_in == today + 1 and room_status.get(room_number) != '已入住':
+                    room_status[room_number] = '已预订'
+
+            created_date = days[day_created - first_day]
+            created_at = created_date + moment
+            yield (
+                f'{created_date[2:4]}{created_date[5:7]}{created_date[8:10]}{serial:03d}',
+                customer_id, room_number, employee_id,
+                days[day_in - first_day], days[day_out - first_day], night,
+                amount, paid, payment, status,
+                SPECIAL_REQUESTS[request] if request >= 0 else None,
+                created_at, created_at
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成可复现的模拟数据')
+    parser.add_argument('--db', default=db_path, help='数据库文件路径，不存在时新建')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--orders', type=int, default=100000, help='订单数')
+    parser.add_argument('--customers', type=int, default=None, help='客户数，默认为订单数的四分之一')
+    parser.add_argument('--rooms', type=int, default=None, help='房间数，默认按 --years 和 --occupancy 推算')
+    parser.add_argument('--employees', type=int, default=50, help='员工数')
+    parser.add_argument('--years', type=float, default=3, help='推算房间数时订单覆盖的年数')
+    parser.add_argument('--occupancy', type=float, default=0.7, help='平均入住率（0~1）')
+    parser.add_argument('--today', default=None, help='以哪一天为“今天”，默认当天；固定后结果完全可复现')
+    parser.add_argument('--replace', action='store_true', help='先清空部门、员工、客户、房间、订单表')
+    args = parser.parse_args()
+
+    if not 0 < args.occupancy < 1:
+        parser.error('--occupancy 必须在 0 和 1 之间')
+    if args.orders < 1 or args.employees < len(DEPARTMENTS):
+        parser.error(f'--orders 至少为 1，--employees 至少为 {len(DEPARTMENTS)}')
+
+    today = Database.day_number(args.today or date.today())
+    customers = args.customers or max(args.orders // 4, 100)
+    rooms = args.rooms or max(int(math.ceil(args.orders * MEAN_NIGHTS / (args.years * 365 * args.occupancy))), 20)
+    per_room, mean_gap, first_day = order_layout(args.orders, rooms, args.occupancy, today)
+
+    db = Database(args.db)
+    ensure_room_columns(db)
+    tables = ('departments', 'employees', 'rooms', 'customers', 'orders')
+    existing = sum(db.execute_query(f"SELECT COUNT(*) as count FROM {table}")[0]['count'] for table in tables)
+    if existing and not args.replace:
+        print(f"数据库中已有 {existing} 条记录，加 --replace 清空后重新生成")
+        sys.exit(1)
+
+    print(f"生成 {args.orders} 条订单、{customers} 位客户、{rooms} 间房间、{args.employees} 名员工")
+    seeds = np.random.SeedSequence(args.seed).spawn(4)
+    started = time.perf_counter()
+
+    with db.bulk_load(*tables) as conn:
+        if args.replace:
+            for table in reversed(tables):
+                conn.execute(f"DELETE FROM {table}")
+            conn.commit()
+
+        db.bulk_insert(conn, '''
+            INSERT INTO departments (department_id, department_name, description, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', generate_departments(today))
+        employee_rows = generate_employees(np.random.default_rng(seeds[0]), args.employees, today)
+        db.bulk_insert(conn, '''
+            INSERT INTO employees (employee_id, employee_name, gender, phone, email, department_id, position_name,
+                                   hire_date, termination_date, status, salary, username, password_hash,
+                                   created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', employee_rows)
+        front_desk = [row[0] for row in employee_rows if row[5] == 'D001' and row[9] == '在职']
+
+        room_rows = generate_rooms(np.random.default_rng(seeds[1]), rooms)
+        customer_rows, customer_days = generate_customers(
+            np.random.default_rng(seeds[2]), customers, first_day, today)
+        count = db.bulk_insert(conn, "INSERT INTO customers (id, name, phone, id_card, created_at) VALUES (?, ?, ?, ?, ?)",
+                               customer_rows)
+        print(f"客户 {count} 位，用时 {time.perf_counter() - started:.1f} 秒")
+
+        room_status = {}
+        count = db.bulk_insert(conn, '''
+            INSERT INTO orders (order_id, customer_id, room_number, employee_id, check_in_date, check_out_date, days,
+                                total_amount, paid_amount, payment_status, order_status, special_requests, created_at,
+                                updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', generate_orders(np.random.default_rng(seeds[3]), room_rows, per_room, mean_gap, customer_days,
+                             front_desk or [row[0] for row in employee_rows], today, room_status))
+        print(f"订单 {count} 条，用时 {time.perf_counter() - started:.1f} 秒")
+
+        db.bulk_insert(conn, '''
+            INSERT INTO rooms (room_number, room_type, has_window, has_breakfast, capacity, area, price, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (row[:7] + (room_status.get(row[0], row[7]),) for row in room_rows))
+        print("正在重建索引和汇总数据...")
+
+    print(f"完成，总用时 {time.perf_counter() - started:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,123 @@
 """
-计算关键文件哈希值
+计算关键文件哈希清单
 每次更改关键文件后都应重新运行此脚本，否则程序无法通过文件完整性验证
+关键文件自动发现（app.py、modules、static、templates），多线程流式分块计算，
+每个文件记录分块摘要与默克尔根，全部文件再汇总为清单根
 """
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
 from datetime import datetime
-import hashlib
+import io
 import json
+import os
 from pathlib import Path
+import sys
 
-BASE_DIR = Path(__file__).resolve().parent.parent  
-FILES = [
-    "app.py",
+current_dir = Path(__file__).parent
+project_root = current_dir.parent
+sys.path.insert(0, str(project_root))
+
+from modules.security import CHUNK_SIZE, hash_file, manifest_root
 
-    "modules/analytics.py",
-    "modules/auth.py",
-    "modules/config.py",
-    "modules/database.py",
-    "modules/departments.py",
-    "modules/employee.py",
-    "modules/orders.py",
-    "modules/weather.py",
-
-    "static/css/login.css",
-    "static/css/style.css",
-    "static/css/theme.css",
-
-    "static/js/analytics.js",
-    "static/js/common.js",
-    "static/js/customers.js",
-    "static/js/employees.js",
-    "static/js/login.js",
-    "static/js/rooms.js",
-
-    "templates/analytics.html",
-    "templates/base.html",
-    "templates/customers.html",
-    "templates/dashboard.html",
-    "templates/employees.html",
-    "templates/login.html",
-    "templates/orders.html",
-    "templates/rooms.html",
-    "templates/security.html",
-    "templates/theme.html",
-    "templates/weather.html"
+BASE_DIR = project_root.resolve()
+# 需要校验的文件（相对项目根目录的 glob 模式）
+PATTERNS = [
+    "app.py",
+    "modules/*.py",
+    "static/**/*",
+    "templates/**/*.html",
 ]
+EXCLUDED_PARTS = {"__pycache__"}
+
 
-def calculate_file_hash(filepath):
-    full_path = BASE_DIR / filepath
-    with open(full_path, 'rb') as f:
-        return hashlib.sha256(f.read()).hexdigest()
+def discover_files():
+    """按 PATTERNS 找出所有关键文件，返回排序后的相对路径（正斜杠）"""
+    files = set()
+    for pattern in PATTERNS:
+        for path in BASE_DIR.glob(pattern):
+            if path.is_file() and not EXCLUDED_PARTS.intersection(path.parts):
+                files.add(path.relative_to(BASE_DIR).as_posix())
+    return sorted(files)
 
-def generate_hashes():
+
+def generate_hashes(files, chunk_size, workers):
+    """并行计算各文件的分块摘要，读取失败的文件跳过"""
     hashes = {}
-    for filepath in FILES:
-        try:
-            hashes[filepath] = calculate_file_hash(filepath)
-            print(filepath)
-        except Exception as e:
-            print(f"{filepath} - {e}")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(filepath, executor.submit(hash_file, str(BASE_DIR / filepath), chunk_size))
+                   for filepath in files]
+        for filepath, future in futures:
+            try:
+                hashes[filepath] = future.result()
+                print(filepath)
+            except Exception as e:
+                print(f"{filepath} - {e}")
     return hashes
 
-def save_hashes_json(hashes):
-    config_dir = BASE_DIR / "config"
-    config_dir.mkdir(exist_ok=True)
 
-    output_file = config_dir / "hashes.json"
+def save_hashes_json(hashes, chunk_size, output_file):
+    output_file.parent.mkdir(exist_ok=True)
     json_content = {
         "metadata": {
             "generated_at": datetime.now().isoformat(),
-            "file_count": len(hashes)
+            "file_count": len(hashes),
+            "algorithm": "sha256-merkle",
+            "chunk_size": chunk_size
         },
-        "file_hashes": hashes
+        "root": manifest_root(hashes),
+        "files": hashes
     }
 
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(json_content, f, indent=2, ensure_ascii=False)
 
+
+def check_hashes(hashes, output_file):
+    """与现有清单比较，列出新增、删除和内容变化的文件；清单与当前文件一致时返回 True"""
+    try:
+        with open(output_file, "r", encoding="utf-8") as f:
+            recorded = json.load(f).get("files", {})
+    except (OSError, ValueError):
+        recorded = {}
+    stale = sorted(
+        [f"新增 {path}" for path in hashes.keys() - recorded.keys()]
+        + [f"删除 {path}" for path in recorded.keys() - hashes.keys()]
+        + [f"变化 {path}" for path in hashes.keys() & recorded.keys()
+           if hashes[path]["root"] != recorded[path].get("root")]
+    )
+    for line in stale:
+        print(line)
+    return not stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description='计算关键文件哈希清单')
+    parser.add_argument('--output', default=str(project_root / "config" / "hashes.json"), help='清单输出路径')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='分块大小（字节）')
+    parser.add_argument('--workers', type=int, default=min(8, os.cpu_count() or 1), help='并行线程数')
+    parser.add_argument('--check', action='store_true', help='只检查清单是否与当前文件一致，不一致时返回 1')
+    args = parser.parse_args()
+
+    if args.chunk_size <= 0 or args.workers <= 0:
+        print("分块大小和线程数必须为正数")
+        return 1
+
+    if args.check:
+        with contextlib.redirect_stdout(io.StringIO()):
+            hashes = generate_hashes(discover_files(), args.chunk_size, args.workers)
+        if check_hashes(hashes, Path(args.output)):
+            print("哈希清单与当前文件一致")
+            return 0
+        print("哈希清单已过期，请重新运行 scripts/hash_generator.py")
+        return 1
+
+    hashes = generate_hashes(discover_files(), args.chunk_size, args.workers)
+    save_hashes_json(hashes, args.chunk_size, Path(args.output))
+    print(f"共 {len(hashes)} 个文件，清单根 {manifest_root(hashes)}")
+    return 0
+
+
 if __name__ == "__main__":
-    hashes = generate_hashes()
-    save_hashes_json(hashes)
+    sys.exit(main())
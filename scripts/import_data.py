@@ -0,0 +1,69 @@
+"""
+批量导入客户、房间、员工、订单
+支持 CSV（首行为字段名）和 NDJSON（每行一个 JSON 对象），字段名与数据库列名一致
+
+用法示例：
+    python scripts/import_data.py customers customers.csv
+    python scripts/import_data.py orders orders.ndjson --skip-existing --report errors.ndjson
+"""
+
+import argparse
+import json
+from pathlib import Path
+import sys
+
+current_dir = Path(__file__).parent
+project_root = current_dir.parent
+sys.path.insert(0, str(project_root))
+
+from modules.database import Database
+from modules.importer import Importer
+
+db_path = str(project_root / "hotel.db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量导入数据')
+    parser.add_argument('entity', choices=sorted(Importer.LOADERS), help='导入类型')
+    parser.add_argument('file', help='CSV 或 NDJSON 文件路径')
+    parser.add_argument('--format', default=None, help='文件格式 csv / ndjson，默认按扩展名判断')
+    parser.add_argument('--encoding', default='utf-8-sig', help='文件编码，Excel 导出的 CSV 可能需要 gbk')
+    parser.add_argument('--db', default=db_path, help='数据库文件路径')
+    parser.add_argument('--chunk-size', type=int, default=Importer.CHUNK_SIZE, help='每块行数')
+    parser.add_argument('--skip-existing', action='store_true', help='唯一键已存在时跳过而不是更新')
+    parser.add_argument('--report', default=None, help='把全部事件（含错误）写入 NDJSON 文件')
+    args = parser.parse_args()
+
+    fmt = Importer.detect_format(args.file, args.format)
+    if fmt is None:
+        print("无法判断文件格式，请用 --format 指定 csv 或 ndjson")
+        sys.exit(1)
+
+    importer = Importer(Database(args.db))
+    report = open(args.report, 'w', encoding='utf-8') if args.report else None
+    result = {}
+    try:
+        with open(args.file, 'r', encoding=args.encoding, newline='') as stream:
+            for event in importer.run(args.entity, stream, fmt, args.chunk_size,
+                                      update_existing=not args.skip_existing):
+                if report:
+                    report.write(json.dumps(event, ensure_ascii=False) + '\n')
+                if event['event'] == 'error':
+                    print(f"  第 {event['line']} 行: {event['message']}")
+                elif event['event'] == 'progress':
+                    print(f"已处理 {event['processed']} 行：新增 {event['inserted']}，更新 {event['updated']}，"
+                          f"跳过 {event['skipped']}，失败 {event['failed']}")
+                else:
+                    result = event
+    finally:
+        if report:
+            report.close()
+
+    print(result.get('message', ''))
+    if 'elapsed' in result:
+        print(f"耗时 {result['elapsed']:.2f} 秒")
+    sys.exit(0 if result.get('success') else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+统计引擎扫描次数与耗时对比
+旧路径：基线版本中员工、订单模块和仪表板各自执行的计数查询（原样保留，按状态分别 COUNT、按 DATE() 取日期窗口等）
+新路径：StatsEngine，每张表一次条件聚合，日期窗口与入住数走索引范围
+每条语句用 EXPLAIN QUERY PLAN 判断是否整表扫描（SCAN），按表汇总每次请求的扫描次数
+"""
+
+import argparse
+import contextlib
+import io
+import os
+from pathlib import Path
+import re
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+
+current_dir = Path(__file__).parent
+project_root = current_dir.parent
+sys.path.insert(0, str(project_root))
+
+from modules.analytics import Analytics
+from modules.database import Database
+from modules.employee import Employee
+from modules.orders import Orders
+from modules.stats import StatsEngine
+from dashboard_benchmark import legacy_dashboard_summary
+
+db_path = str(project_root / "hotel.db")
+
+TABLES = {'employees', 'departments', 'orders', 'customers', 'customer_stats', 'rooms'}
+
+# 改用统计引擎之前（基线版本）各调用方执行的语句，原样保留：(语句, 参数名)
+# 员工统计取自 Employee.get_employee_statistics（文件中后一个同名定义生效），订单统计取自 Orders.get_order_statistics；
+# 仪表板使用 dashboard_benchmark.py 中保留的基线仪表板语句
+LEGACY_EMPLOYEE = [
+    ("SELECT COUNT(*) as total FROM employees", ()),
+    ("SELECT COUNT(*) as active FROM employees WHERE status = '在职'", ()),
+    ("SELECT COUNT(*) as terminated FROM employees WHERE status = '离职'", ()),
+    ('''
+                    SELECT d.department_name, COUNT(e.employee_id) as count
+                    FROM departments d
+                        LEFT JOIN employees e 
+                    ON d.department_id = e.department_id AND e.status = '在职'
+                    GROUP BY d.department_id
+                    ORDER BY count DESC
+                    ''', ()),
+]
+LEGACY_ORDERS = [
+    ("SELECT COUNT(*) as total FROM orders", ()),
+    ('''
+                     SELECT order_status, COUNT(*) as count
+                     FROM orders
+                     GROUP BY order_status
+                     ''', ()),
+    ('''
+                      SELECT payment_status, COUNT(*) as count
+                      FROM orders
+                      GROUP BY payment_status
+                      ''', ()),
+    ('''
+                    SELECT COUNT(*)                                                 as today_total, \
+                           SUM(CASE WHEN order_status = '预定中' THEN 1 ELSE 0 END) as today_reserved, \
+                           SUM(CASE WHEN order_status = '已入住' THEN 1 ELSE 0 END) as today_checked_in, \
+                           SUM(CASE WHEN order_status = '已完成' THEN 1 ELSE 0 END) as today_completed, \
+                           SUM(total_amount)                                        as today_total_amount, \
+                           SUM(paid_amount)                                         as today_paid_amount
+                    FROM orders
+                    WHERE DATE (created_at) = DATE (?)
+                    ''', ('today',)),
+    ('''
+                    SELECT
+                        DATE (created_at) as date, COUNT (*) as count, SUM (total_amount) as total_amount
+                    FROM orders
+                    WHERE created_at >= DATE ('now', '-7 days')
+                    GROUP BY DATE (created_at)
+                    ORDER BY date
+                    ''', ()),
+]
+
+
+class TracingDatabase(Database):
+    """记录执行过的查询语句（参数已展开）的数据库封装"""
+
+    def __init__(self, path: str):
+        self.statements = []
+        self._lock = threading.Lock()
+        super().__init__(path)
+
+    def _get_connection(self):
+        conn = super()._get_connection()
+        conn.set_trace_callback(self._trace)
+        return conn
+
+    def _trace(self, statement: str):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            with self._lock:
+                self.statements.append(statement)
+
+
+class ScanCounter:
+    """用 EXPLAIN QUERY PLAN 统计语句对各表的整表扫描次数，同一语句只分析一次"""
+
+    ALIAS_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self._plans = {}
+
+    def scans(self, sql: str) -> dict:
+        if sql not in self._plans:
+            aliases = {}
+            for table, alias in self.ALIAS_PATTERN.findall(sql):
+                aliases[table] = table
+                if alias:
+                    aliases[alias] = table
+            counts = {}
+            for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+                match = re.match(r'SCAN (\w+)', row[3])
+                table = aliases.get(match.group(1)) if match else None
+                if table in TABLES:
+                    counts[table] = counts.get(table, 0) + 1
+            self._plans[sql] = counts
+        return self._plans[sql]
+
+    def total(self, statements: list) -> dict:
+        counts = {}
+        for sql in statements:
+            for table, count in self.scans(sql).items():
+                counts[table] = counts.get(table, 0) + count
+        return counts
+
+
+def run(label: str, db: TracingDatabase, counter: ScanCounter, func, iterations: int) -> dict:
+    timings = []
+    for _ in range(iterations):
+        db.statements = []
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    scans = counter.total(db.statements)
+    report = {'label': label, 'mean_ms': statistics.mean(timings), 'scans': scans}
+    scan_text = ' '.join(f"{table}×{count}" for table, count in sorted(scans.items())) or '-'
+    print(f"{label:<10} 平均 {report['mean_ms']:9.2f} ms  语句 {len(db.statements):3d}  整表扫描 {scan_text}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='统计引擎扫描次数与耗时对比')
+    parser.add_argument('--db', default=db_path, help='数据库文件路径')
+    parser.add_argument('--iterations', type=int, default=5, help='每条路径的执行次数')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"数据库文件 {args.db} 不存在")
+        return 1
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = TracingDatabase(args.db)
+    counter = ScanCounter(args.db)
+    engine = StatsEngine(db)
+    employee = Employee(db, stats=engine)
+    orders = Orders(db, stats=engine)
+    analytics = Analytics(db, max_workers=1, stats=engine)
+
+    today = time.strftime('%Y-%m-%d')
+    params = {'today': today}
+
+    def legacy(statements):
+        return lambda: [db.execute_query(sql, tuple(params[name] for name in names) or None)
+                        for sql, names in statements]
+
+    failed = []
+    for name, old_path, new_path in (
+        ('员工统计', legacy(LEGACY_EMPLOYEE), employee.get_employee_statistics),
+        ('订单统计', legacy(LEGACY_ORDERS), orders.get_order_statistics),
+        ('仪表板', lambda: legacy_dashboard_summary(db, today), lambda: analytics.get_dashboard_summary(today)),
+    ):
+        old = run(f'{name}-旧', db, counter, old_path, args.iterations)
+        new = run(f'{name}-新', db, counter, new_path, args.iterations)
+        failed += [f'{name}: {table}×{count}' for table, count in new['scans'].items() if count > 1]
+        print(f"{'':<10} 加速比 {old['mean_ms'] / new['mean_ms']:.1f}x")
+
+    if failed:
+        print(f"存在重复扫描: {', '.join(failed)}")
+        return 1
+    print("统计引擎每次请求对每张表最多整表扫描一次")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 // 全局变量
 let charts = {};
 let currentTab = 'dashboard';
+let dashboardData = null;
+let dashboardStream = null;
+let streamDate = null;
 
 // 页面加载完成后执行
 document.addEventListener('DOMContentLoaded', function() {
@@ -12,11 +15,13 @@ document.addEventListener('DOMContentLoaded', function() {
 
     document.getElementById('startDate').value = lastMonthDate;
     document.getElementById('endDate').value = today;
+    document.getElementById('statDate').value = today;
 
     // 加载数据
     loadDashboardData();
     loadCharts();
     loadOrderStatusChart();
+    connectDashboardStream();
     
 });
 
@@ -62,10 +67,14 @@ function switchTab(tabName) {
 // 加载仪表板数据
 async function loadDashboardData() {
     try {
-        const response = await fetch('/api/analytics/dashboard');
+        // 历史日期的收入与入住数取自日结快照
+        const statDate = document.getElementById('statDate').value;
+        const query = statDate ? `?stat_date=${statDate}` : '';
+        const response = await fetch(`/api/analytics/dashboard${query}`);
         const result = await response.json();
 
         if (result.success) {
+            dashboardData = result.data;
             updateDashboardStats(result.data);
         } else {
             showNotification('加载仪表板数据失败: ' + result.message, 'error');
@@ -75,6 +84,34 @@ async function loadDashboardData() {
     }
 }
 
+// 订阅实时指标，写入发生后服务端只推送变化的字段
+function connectDashboardStream() {
+    if (!window.EventSource || dashboardStream) return;
+
+    dashboardStream = new EventSource('/api/stream/dashboard');
+    const apply = event => applyDashboardDelta(JSON.parse(event.data));
+    dashboardStream.addEventListener('snapshot', apply);
+    dashboardStream.addEventListener('delta', apply);
+}
+
+function applyDashboardDelta(delta) {
+    // 增量只在日期变化时携带 stat_date，记录下来用于判断当前查看的是否为当天
+    if (delta.stat_date) streamDate = delta.stat_date;
+    if (!dashboardData || !streamDate) return;
+    const viewing = (dashboardData.summary.stat_date || '').replace(/\//g, '-');
+    if (viewing !== streamDate) return;
+
+    const summary = dashboardData.summary;
+    const fields = ['rooms', 'occupied_rooms', 'occupancy_rate', 'today_revenue', 'today_paid'];
+    let changed = false;
+    fields.forEach(field => {
+        if (delta[field] !== undefined) {
+            summary[field] = delta[field];
+            changed = true;
+        }
+    });
+    if (changed) updateDashboardStats(dashboardData);
+}
 
 // 更新仪表板统计数据
 function updateDashboardStats(data) {
@@ -271,12 +308,29 @@ function updateDashboardStats(data) {
 }
 
 async function loadCharts() {
-    // 员工部门分布图
-    await loadChart('employee_dept', 'employeeDeptChart', 'doughnut');
-    // 收入趋势图
-    await loadChart('revenue_trend', 'revenueTrendChart', 'line');
-    // 房型分布图
-    await loadChart('room_type', 'roomTypeChart', 'doughnut');
+    // 员工部门分布图、收入趋势图、房型分布图一次请求获取
+    const chartConfigs = [
+        { type: 'employee_dept', canvasId: 'employeeDeptChart', chartTypeName: 'doughnut' },
+        { type: 'revenue_trend', canvasId: 'revenueTrendChart', chartTypeName: 'line' },
+        { type: 'room_type', canvasId: 'roomTypeChart', chartTypeName: 'doughnut' }
+    ];
+
+    try {
+        const types = chartConfigs.map(config => config.type).join(',');
+        const response = await fetch(`/api/analytics/chart?type=${types}`);
+        const result = await response.json();
+
+        if (result.success) {
+            chartConfigs.forEach(config => {
+                const chartData = result.charts[config.type];
+                if (chartData && chartData.success) {
+                    renderChart(config.canvasId, chartData, config.chartTypeName);
+                }
+            });
+        }
+    } catch (error) {
+        console.error('加载图表失败:', error);
+    }
 }
 
 async function loadChart(chartType, canvasId, chartTypeName) {
@@ -822,6 +876,7 @@ function resetDateFilter() {
 
     document.getElementById('startDate').value = lastMonthDate;
     document.getElementById('endDate').value = today;
+    document.getElementById('statDate').value = today;
 
     applyDateFilter();
 }
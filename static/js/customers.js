@@ -2,6 +2,10 @@
 
 let deleteCustomerId = null;
 
+// 键集分页状态：afterId 为已加载的最后一位客户的 ID
+const PAGE_SIZE = 50;
+let listState = { afterId: null, hasMore: false, loading: false, loaded: 0, total: null };
+
 document.addEventListener('DOMContentLoaded', function() {
     loadCustomers();
 
@@ -21,19 +25,48 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
     }
+
+    // 滚动到列表底部时自动加载下一页
+    const loadMore = document.getElementById('customers-load-more');
+    if (loadMore && window.IntersectionObserver) {
+        new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting) loadMoreCustomers();
+        }).observe(loadMore);
+    }
 });
 
-// 1. 加载客户列表
+// 1. 加载客户列表（第一页）
 async function loadCustomers() {
+    listState = { afterId: null, hasMore: false, loading: false, loaded: 0, total: null };
+    showLoading('customers-table-body');
+    await loadMoreCustomers();
+}
+
+// 加载下一页并追加到表格
+async function loadMoreCustomers() {
+    const first = listState.afterId === null;
+    if (listState.loading || (!first && !listState.hasMore)) return;
+    listState.loading = true;
+
     try {
-        showLoading('customers-table-body');
-        const response = await fetch('/api/customer/list');
+        const [sort, order] = document.getElementById('customer-sort').value.split(':');
+        let url = `/api/customer/list?limit=${PAGE_SIZE}&sort=${sort}&order=${order}`;
+        url += first ? '&total=1' : `&after_id=${listState.afterId}`;
+        const response = await fetch(url);
         const data = await response.json();
 
         if (data.success) {
-            renderCustomersTable(data.data);
+            if (first) {
+                listState.total = data.paging.total;
+                renderCustomersTable(data.data);
+            } else {
+                appendCustomersRows(data.data);
+            }
+            listState.afterId = data.paging.next_after_id;
+            listState.hasMore = data.paging.has_more;
+            updateLoadMore();
         } else {
-            renderCustomersTable([]);
+            if (first) renderCustomersTable([]);
             if (data.message && !data.message.includes('未找到')) {
                 showError(data.message);
             }
@@ -41,6 +74,20 @@ async function loadCustomers() {
     } catch (error) {
         console.error('加载失败:', error);
         showError('加载客户列表失败');
+    } finally {
+        listState.loading = false;
+    }
+}
+
+function updateLoadMore() {
+    const loadMore = document.getElementById('customers-load-more');
+    const count = document.getElementById('customers-count');
+    if (!loadMore) return;
+    loadMore.style.display = listState.hasMore ? 'block' : 'none';
+    if (count) {
+        count.textContent = listState.total
+            ? `已加载 ${listState.loaded} / 约 ${listState.total} 位客户`
+            : `已加载 ${listState.loaded} 位客户`;
     }
 }
 
@@ -49,6 +96,7 @@ function renderCustomersTable(customers) {
     const tbody = document.getElementById('customers-table-body');
     const noDataDiv = document.getElementById('no-customers');
 
+    listState.loaded = 0;
     if (!customers || customers.length === 0) {
         tbody.innerHTML = '';
         if (noDataDiv) noDataDiv.style.display = 'block';
@@ -56,12 +104,21 @@ function renderCustomersTable(customers) {
     }
 
     if (noDataDiv) noDataDiv.style.display = 'none';
+    tbody.innerHTML = '';
+    appendCustomersRows(customers);
+}
+
+// 追加行，序号按当前列表中的位置连续编号
+function appendCustomersRows(customers) {
+    const tbody = document.getElementById('customers-table-body');
     let html = '';
 
     customers.forEach(customer => {
         const createdDate = customer.created_at ? customer.created_at.split(' ')[0] : '-';
+        listState.loaded += 1;
         html += `
             <tr>
+                <td>${listState.loaded}</td>
                 <td>${customer.id}</td>
                 <td>${customer.name}</td>
                 <td>${customer.phone}</td>
@@ -78,7 +135,7 @@ function renderCustomersTable(customers) {
             </tr>
         `;
     });
-    tbody.innerHTML = html;
+    tbody.insertAdjacentHTML('beforeend', html);
 }
 
 // 3. 点击“添加客户”按钮
@@ -180,8 +237,10 @@ function searchCustomers() {
         return;
     }
 
-    // 显示加载状态，提升体验
+    // 显示加载状态，提升体验；检索结果一次返回，不再分页
     showLoading('customers-table-body');
+    listState.hasMore = false;
+    updateLoadMore();
 
     fetch(`/api/customer/search?keyword=${encodeURIComponent(keyword)}`)
         .then(res => res.json())
@@ -213,7 +272,7 @@ function closeAllModals() {
 
 function showLoading(elementId) {
     const el = document.getElementById(elementId);
-    if(el) el.innerHTML = '<tr><td colspan="6" style="text-align: center; padding: 20px;"><i class="fas fa-spinner fa-spin"></i> 加载中...</td></tr>';
+    if(el) el.innerHTML = '<tr><td colspan="7" style="text-align: center; padding: 20px;"><i class="fas fa-spinner fa-spin"></i> 加载中...</td></tr>';
 }
 
 function showNotification(msg, type) {
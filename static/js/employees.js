@@ -14,6 +14,24 @@ document.addEventListener('DOMContentLoaded', function() {
     loadDepartments();
     loadStatistics();
 
+    // 搜索框、职位回车即搜索
+    ['employee-search', 'filter-position'].forEach(id => {
+        const el = document.getElementById(id);
+        if (el) el.addEventListener('keydown', e => { if (e.key === 'Enter') searchEmployees(); });
+    });
+    ['filter-hire-from', 'filter-hire-to'].forEach(id => {
+        const el = document.getElementById(id);
+        if (el) el.addEventListener('change', searchEmployees);
+    });
+
+    // 滚动到底部时自动加载下一页
+    const loadMore = document.getElementById('employees-load-more');
+    if (loadMore && window.IntersectionObserver) {
+        new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting) loadMoreEmployees();
+        }).observe(loadMore);
+    }
+
     // 初始化模态框关闭按钮
     document.querySelectorAll('.close-modal').forEach(button => {
         button.addEventListener('click', closeAllModals);
@@ -34,78 +52,140 @@ function switchTab(tabName, event) {
 
 // ========== 员工管理 ==========
 
-// 加载员工列表
+// 员工列表由服务端筛选、排序并按工号游标分页
+const EMPLOYEE_PAGE_SIZE = 50;
+let employeeState = { afterId: null, hasMore: false, total: 0, loaded: 0, loading: false };
+
+// 收集筛选与排序条件
+function employeeFilterParams() {
+    const value = id => {
+        const el = document.getElementById(id);
+        return el ? el.value.trim() : '';
+    };
+    const params = new URLSearchParams();
+    const filters = {
+        keyword: value('employee-search'),
+        department_id: value('filter-department'),
+        status: value('filter-status'),
+        position: value('filter-position'),
+        hire_from: value('filter-hire-from'),
+        hire_to: value('filter-hire-to')
+    };
+    Object.entries(filters).forEach(([key, val]) => { if (val) params.set(key, val); });
+
+    const [sort, order] = (value('employee-sort') || 'employee_id:asc').split(':');
+    params.set('sort', sort);
+    params.set('order', order);
+    return params;
+}
+
+function hasEmployeeFilters() {
+    return [...employeeFilterParams().keys()].some(key => key !== 'sort' && key !== 'order');
+}
+
+function employeeRow(emp) {
+    const statusClass = emp.status === '在职' ? 'active' : 'inactive';
+    const hireDate = emp.hire_date || '-';
+    return `
+        <tr>
+            <td>${emp.employee_id}</td>
+            <td>${emp.employee_name}</td>
+            <td>${emp.gender}</td>
+            <td>${emp.phone || '-'}</td>
+            <td>${emp.department_name || '-'}</td>
+            <td>${emp.position_name || '-'}</td>
+            <td>${hireDate}</td>
+            <td><span class="status-badge ${statusClass}">${emp.status}</span></td>
+            <td>
+                <button class="btn btn-warning btn-sm btn-icon" onclick="showEditEmployeeModal('${emp.employee_id}')">
+                    <i class="fas fa-edit"></i>
+                </button>
+                <button class="btn btn-danger btn-sm btn-icon" onclick="confirmDeleteEmployee('${emp.employee_id}', '${emp.employee_name}')">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </td>
+        </tr>
+    `;
+}
+
+// 加载员工列表（从第一页开始）
 async function loadEmployees() {
+    employeeState = { afterId: null, hasMore: false, total: 0, loaded: 0, loading: false };
+    await loadMoreEmployees();
+}
+
+// 加载下一页并追加到表格
+async function loadMoreEmployees() {
+    const first = employeeState.afterId === null;
+    if (employeeState.loading || (!first && !employeeState.hasMore)) return;
+    employeeState.loading = true;
+
     const tbody = document.getElementById('employees-table-body');
     const noDataDiv = document.getElementById('no-employees');
 
     try {
-        const response = await fetch('/api/employee/list');
+        const params = employeeFilterParams();
+        params.set('limit', EMPLOYEE_PAGE_SIZE);
+        if (first) params.set('total', '1');
+        else params.set('after_id', employeeState.afterId);
+        const response = await fetch(`/api/employee/list?${params}`);
         const data = await response.json();
 
         if (data.success) {
-            if (!data.data || data.data.length === 0) {
-                tbody.innerHTML = '';
-                tbody.style.display = 'none';
-                noDataDiv.style.display = 'block';
+            const rows = data.data || [];
+            if (first) {
+                employeeState.total = data.paging.total;
+                if (rows.length === 0 && !hasEmployeeFilters()) {
+                    tbody.innerHTML = '';
+                    tbody.style.display = 'none';
+                    noDataDiv.style.display = 'block';
+                } else {
+                    noDataDiv.style.display = 'none';
+                    tbody.style.display = 'table-row-group';
+                    tbody.innerHTML = rows.length
+                        ? rows.map(employeeRow).join('')
+                        : '<tr><td colspan="9" style="text-align: center;">没有符合条件的员工</td></tr>';
+                }
             } else {
-                noDataDiv.style.display = 'none';
-                tbody.style.display = 'table-row-group';
-
-                tbody.innerHTML = data.data.map(emp => {
-                    const statusClass = emp.status === '在职' ? 'active' : 'inactive';
-                    const hireDate = emp.hire_date || '-';
-                    return `
-                        <tr>
-                            <td>${emp.employee_id}</td>
-                            <td>${emp.employee_name}</td>
-                            <td>${emp.gender}</td>
-                            <td>${emp.phone || '-'}</td>
-                            <td>${emp.department_name || '-'}</td>
-                            <td>${emp.position_name || '-'}</td>
-                            <td>${hireDate}</td>
-                            <td><span class="status-badge ${statusClass}">${emp.status}</span></td>
-                            <td>
-                                <button class="btn btn-warning btn-sm btn-icon" onclick="showEditEmployeeModal('${emp.employee_id}')">
-                                    <i class="fas fa-edit"></i>
-                                </button>
-                                <button class="btn btn-danger btn-sm btn-icon" onclick="confirmDeleteEmployee('${emp.employee_id}', '${emp.employee_name}')">
-                                    <i class="fas fa-trash"></i>
-                                </button>
-                            </td>
-                        </tr>
-                    `;
-                }).join('');
+                tbody.insertAdjacentHTML('beforeend', rows.map(employeeRow).join(''));
             }
+            employeeState.loaded += rows.length;
+            employeeState.hasMore = data.paging.has_more;
+            employeeState.afterId = data.paging.next_after_id;
+            updateEmployeesLoadMore();
         } else {
             showNotification(data.message || '加载员工失败', 'error');
         }
     } catch (err) {
         console.error('加载员工失败', err);
         showNotification('加载员工失败', 'error');
+    } finally {
+        employeeState.loading = false;
     }
 }
 
-// 搜索员工
-function searchEmployees() {
-    const keyword = document.getElementById('employee-search').value.trim();
-    if (!keyword) {
-        loadEmployees();
-        return;
-    }
-
-    const tbody = document.getElementById('employees-table-body');
-    const rows = Array.from(tbody.querySelectorAll('tr'));
+function updateEmployeesLoadMore() {
+    const loadMore = document.getElementById('employees-load-more');
+    const count = document.getElementById('employees-count');
+    if (!loadMore) return;
+    loadMore.style.display = employeeState.hasMore ? 'block' : 'none';
+    if (count) count.textContent = `已加载 ${employeeState.loaded} / ${employeeState.total} 名员工`;
+}
 
-    rows.forEach(row => {
-        const match = Array.from(row.children).some(td => td.textContent.includes(keyword));
-        row.style.display = match ? '' : 'none';
-    });
+// 搜索员工：按当前条件从第一页重新加载
+function searchEmployees() {
+    loadEmployees();
 }
 
 // 清空搜索
 function clearSearch() {
-    document.getElementById('employee-search').value = '';
+    ['employee-search', 'filter-department', 'filter-status', 'filter-position',
+     'filter-hire-from', 'filter-hire-to'].forEach(id => {
+        const el = document.getElementById(id);
+        if (el) el.value = '';
+    });
+    const sort = document.getElementById('employee-sort');
+    if (sort) sort.value = 'employee_id:asc';
     loadEmployees();
 }
 
@@ -270,6 +350,7 @@ async function loadDepartments() {
         if (!resData.success) return;
 
         departmentsData = resData.data;
+        fillDepartmentFilter();
 
         const tbody = document.getElementById('departments-table-body');
         const noDataDiv = document.getElementById('no-departments');
@@ -305,6 +386,21 @@ async function loadDepartments() {
     }
 }
 
+// 筛选栏的部门选项，保留当前选择
+function fillDepartmentFilter() {
+    const select = document.getElementById('filter-department');
+    if (!select) return;
+    const selected = select.value;
+    select.innerHTML = '<option value="">部门: 全部</option>';
+    (departmentsData || []).forEach(dept => {
+        const option = document.createElement('option');
+        option.value = dept.department_id;
+        option.textContent = dept.department_name;
+        select.appendChild(option);
+    });
+    select.value = selected;
+}
+
 function showAddDepartmentModal() {
     document.getElementById('department-modal-title').textContent = '添加部门';
     document.getElementById('department-form').reset();
@@ -479,6 +575,7 @@ function renderDepartmentStats(by_department) {
 
 // ========== 全局挂载 ==========
 window.loadEmployees = loadEmployees;
+window.loadMoreEmployees = loadMoreEmployees;
 window.loadDepartments = loadDepartments;
 window.loadStatistics = loadStatistics;
 
@@ -1,8 +1,12 @@
 // static/js/rooms.js
+// 已加载的房间（当前筛选条件下的前几页）
 let allRooms = [];
+const PAGE_SIZE = 50;
+let roomState = { after: null, hasMore: false, loading: false, total: 0 };
 
 document.addEventListener('DOMContentLoaded', function() {
     loadRooms();
+    connectRoomStream();
 
     // 绑定模态框关闭按钮
     document.querySelectorAll('.close-modal').forEach(btn => {
@@ -11,8 +15,42 @@ document.addEventListener('DOMContentLoaded', function() {
             if(modal) modal.style.display = 'none';
         });
     });
+
+    // 滚动到列表底部时自动加载下一页
+    const loadMore = document.getElementById('rooms-load-more');
+    if (loadMore && window.IntersectionObserver) {
+        new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting) loadMoreRooms();
+        }).observe(loadMore);
+    }
 });
 
+// 收集筛选条件，由服务端过滤
+function roomFilterParams() {
+    const value = id => {
+        const el = document.getElementById(id);
+        return el ? el.value.trim() : '';
+    };
+    const params = new URLSearchParams();
+    const filters = {
+        keyword: value('room-search'),
+        status: value('filter-status'),
+        has_window: value('filter-window'),
+        room_type: value('filter-type'),
+        floor: value('filter-floor'),
+        // 例如搜索2人，则显示所有能住2人及以上的房间（2人、3人房）
+        min_capacity: value('filter-capacity'),
+        max_price: value('filter-max-price'),
+        check_in: value('filter-check-in'),
+        check_out: value('filter-check-out')
+    };
+    Object.entries(filters).forEach(([key, val]) => {
+        if (val !== '') params.set(key, val);
+    });
+    return params;
+}
+
+// 按当前筛选条件加载第一页
 async function loadRooms() {
     const tbody = document.getElementById('rooms-table-body');
     const loading = document.getElementById('loading-msg');
@@ -25,24 +63,126 @@ async function loadRooms() {
     tbody.innerHTML = '';
     if(noData) noData.style.display = 'none';
 
+    roomState = { after: null, hasMore: false, loading: false, total: 0 };
+    allRooms = [];
+    await loadMoreRooms();
+    loading.style.display = 'none';
+}
+
+// 加载下一页并追加到表格
+async function loadMoreRooms() {
+    const first = roomState.after === null;
+    if (roomState.loading || (!first && !roomState.hasMore)) return;
+    roomState.loading = true;
+
     try {
-        const res = await fetch('/api/rooms/list');
+        const params = roomFilterParams();
+        params.set('limit', PAGE_SIZE);
+        if (!first) params.set('after', roomState.after);
+        const res = await fetch(`/api/rooms/search?${params}`);
         const data = await res.json();
 
-        loading.style.display = 'none';
-
         if (data.success) {
-            allRooms = data.data;
-            // 加载完成后默认显示所有
-            renderTable(allRooms);
+            allRooms = allRooms.concat(data.data);
+            if (first) renderTable(data.data);
+            else appendRooms(data.data);
+            roomState.after = data.paging.next_after;
+            roomState.hasMore = data.paging.has_more;
+            roomState.total = data.paging.total;
+            updateLoadMore();
         } else {
+            if (first) renderTable([]);
             alert('加载失败: ' + (data.message || '未知错误'));
         }
     } catch (e) {
-        loading.style.display = 'none';
         console.error("Fetch error:", e);
         alert('网络请求失败，请检查后台服务');
+    } finally {
+        roomState.loading = false;
+    }
+}
+
+function updateLoadMore() {
+    const loadMore = document.getElementById('rooms-load-more');
+    const count = document.getElementById('rooms-count');
+    if (!loadMore) return;
+    loadMore.style.display = roomState.hasMore ? 'block' : 'none';
+    if (count) count.textContent = `已加载 ${allRooms.length} / ${roomState.total} 间房间`;
+}
+
+// 订阅房态变化，其他页面或终端修改房间状态后实时刷新
+function connectRoomStream() {
+    if (!window.EventSource) return;
+
+    const source = new EventSource('/api/stream/dashboard');
+    const apply = event => {
+        const board = JSON.parse(event.data).room_board;
+        if (!board || allRooms.length === 0) return;
+
+        let needReload = false;
+        Object.entries(board).forEach(([roomNumber, status]) => {
+            const room = allRooms.find(r => r.room_number === roomNumber);
+            if (status === null || (room && room.status !== status && document.getElementById('filter-status').value)) {
+                // 删除的房间或按状态筛选时状态变化，需要按条件重新查询
+                needReload = true;
+            } else if (room) {
+                room.status = status;
+            }
+        });
+
+        if (needReload) {
+            loadRooms();
+        } else {
+            renderTable(allRooms);
+        }
+    };
+    source.addEventListener('snapshot', apply);
+    source.addEventListener('delta', apply);
+}
+
+// 单行 HTML
+function roomRow(room) {
+    // 1. 状态显示逻辑
+    let statusHtml = `<span class="status-badge status-free">空闲</span>`;
+    let btnsHtml = `
+        <button class="btn btn-warning btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'reserve')">预订</button>
+        <button class="btn btn-success btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'checkin')">入住</button>
+        <button class="btn btn-secondary btn-sm action-btn" onclick="openEditModal('${room.room_number}')">编辑</button>
+        <button class="btn btn-danger btn-sm action-btn" onclick="deleteRoom('${room.room_number}')">删除</button>
+    `;
+
+    if (room.status === '已入住') {
+        statusHtml = `<span class="status-badge status-occupied">已入住</span>`;
+        btnsHtml = `
+            <button class="btn btn-warning btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'checkout')">退房</button>
+            <button class="btn btn-secondary btn-sm action-btn" onclick="openEditModal('${room.room_number}')">编辑</button>
+        `;
+    } else if (room.status === '已预订') {
+        statusHtml = `<span class="status-badge status-reserved">已预订</span>`;
+        btnsHtml = `
+            <button class="btn btn-success btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'checkin')">入住</button>
+            <button class="btn btn-danger btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'cancel')">取消</button>
+        `;
     }
+
+    // 2. 靠窗图标
+    const windowIcon = room.has_window
+        ? '<span style="color:#1890ff">✔ 有窗</span>'
+        : '<span style="color:#aaa">无</span>';
+
+    const tr = document.createElement('tr');
+    tr.style.borderBottom = "1px solid rgba(255,255,255,0.1)";
+    tr.innerHTML = `
+        <td style="padding:12px;"><strong>${room.room_number}</strong></td>
+        <td style="padding:12px;">${room.room_type}</td>
+        <td style="padding:12px;">${statusHtml}</td>
+        <td style="padding:12px;">${windowIcon}</td>
+        <td style="padding:12px;">${room.area || 23} m²</td>
+        <td style="padding:12px;">${room.capacity || 2} 人</td>
+        <td style="padding:12px; color: #00c6ff;">¥${room.price}</td>
+        <td style="padding:12px;">${btnsHtml}</td>
+    `;
+    return tr;
 }
 
 // 核心渲染函数
@@ -58,88 +198,36 @@ function renderTable(rooms) {
     }
     if(noData) noData.style.display = 'none';
 
-    rooms.forEach(room => {
-        // 1. 状态显示逻辑
-        let statusHtml = `<span class="status-badge status-free">空闲</span>`;
-        let btnsHtml = `
-            <button class="btn btn-warning btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'reserve')">预订</button>
-            <button class="btn btn-success btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'checkin')">入住</button>
-            <button class="btn btn-secondary btn-sm action-btn" onclick="openEditModal('${room.room_number}')">编辑</button>
-            <button class="btn btn-danger btn-sm action-btn" onclick="deleteRoom('${room.room_number}')">删除</button>
-        `;
-
-        if (room.status === '已入住') {
-            statusHtml = `<span class="status-badge status-occupied">已入住</span>`;
-            btnsHtml = `
-                <button class="btn btn-warning btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'checkout')">退房</button>
-                <button class="btn btn-secondary btn-sm action-btn" onclick="openEditModal('${room.room_number}')">编辑</button>
-            `;
-        } else if (room.status === '已预订') {
-            statusHtml = `<span class="status-badge status-reserved">已预订</span>`;
-            btnsHtml = `
-                <button class="btn btn-success btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'checkin')">入住</button>
-                <button class="btn btn-danger btn-sm action-btn" onclick="updateStatus('${room.room_number}', 'cancel')">取消</button>
-            `;
-        }
+    appendRooms(rooms);
+}
 
-        // 2. 靠窗图标
-        const windowIcon = room.has_window
-            ? '<span style="color:#1890ff">✔ 有窗</span>'
-            : '<span style="color:#aaa">无</span>';
-
-        const tr = document.createElement('tr');
-        tr.style.borderBottom = "1px solid rgba(255,255,255,0.1)";
-        tr.innerHTML = `
-            <td style="padding:12px;"><strong>${room.room_number}</strong></td>
-            <td style="padding:12px;">${room.room_type}</td>
-            <td style="padding:12px;">${statusHtml}</td>
-            <td style="padding:12px;">${windowIcon}</td>
-            <td style="padding:12px;">${room.area || 23} m²</td>
-            <td style="padding:12px;">${room.capacity || 2} 人</td>
-            <td style="padding:12px; color: #00c6ff;">¥${room.price}</td>
-            <td style="padding:12px;">${btnsHtml}</td>
-        `;
-        tbody.appendChild(tr);
-    });
+function appendRooms(rooms) {
+    const tbody = document.getElementById('rooms-table-body');
+    rooms.forEach(room => tbody.appendChild(roomRow(room)));
 }
 
 // ========== 增强的搜索功能 ==========
+// 筛选在服务端完成，只下载匹配的房间
 function searchRooms() {
-    // 获取所有筛选条件
-    const keyword = document.getElementById('room-search').value.trim();
-    const status = document.getElementById('filter-status').value;
-    const windowVal = document.getElementById('filter-window').value;
-    const capacity = document.getElementById('filter-capacity').value;
-
-    const filtered = allRooms.filter(r => {
-        // 1. 房号筛选 (模糊匹配)
-        const matchKeyword = !keyword || r.room_number.includes(keyword);
-
-        // 2. 状态筛选 (精确匹配)
-        const matchStatus = !status || r.status === status;
-
-        // 3. 窗户筛选 (注意: 数据库里可能是数字1/0，HTML value是字符串"1"/"0"，用 == 比较)
-        const matchWindow = windowVal === "" || r.has_window == windowVal;
-
-        // 4. 人数筛选 (大于等于)
-        // 例如搜索2人，则显示所有能住2人及以上的房间（2人、3人房）
-        const matchCapacity = !capacity || r.capacity >= parseInt(capacity);
-
-        return matchKeyword && matchStatus && matchWindow && matchCapacity;
-    });
-
-    renderTable(filtered);
+    const checkIn = document.getElementById('filter-check-in').value;
+    const checkOut = document.getElementById('filter-check-out').value;
+    if ((checkIn || checkOut) && !(checkIn && checkOut)) {
+        alert('请同时选择入住和退房日期');
+        return;
+    }
+    loadRooms();
 }
 
 // 重置搜索
 function resetSearch() {
-    document.getElementById('room-search').value = '';
-    document.getElementById('filter-status').value = '';
-    document.getElementById('filter-window').value = '';
-    document.getElementById('filter-capacity').value = '';
+    ['room-search', 'filter-status', 'filter-window', 'filter-type', 'filter-floor',
+     'filter-capacity', 'filter-max-price', 'filter-check-in', 'filter-check-out'].forEach(id => {
+        const el = document.getElementById(id);
+        if (el) el.value = '';
+    });
 
     // 恢复显示所有房间
-    renderTable(allRooms);
+    loadRooms();
 }
 // ===================================
 